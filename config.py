@@ -1,7 +1,47 @@
 import os
 
 CACHE_DIR = 'cache'
-CACHE_FILE = 'pdf_cache.json'
+PDF_CACHE_DIR = os.path.join(CACHE_DIR, 'pdf')
+EMBEDDINGS_DIR = os.path.join(CACHE_DIR, 'embeddings')
+CURRICULUM_DIR = 'curriculum'
+ESCO_LABELS_DB = os.path.join(CACHE_DIR, 'esco_labels.sqlite')
+ESCO_SKILLS_CSV = os.getenv('ESCO_SKILLS_CSV', os.path.join('data', 'esco', 'skills_en.csv'))
+UNIVERSITIES_DATASET = os.getenv('UNIVERSITIES_DATASET', os.path.join('data', 'universities.json'))
+
+INGEST_WORKERS = int(os.getenv('INGEST_WORKERS', os.cpu_count() or 1))
+UNIVERSITY_SCAN_PAGES = int(os.getenv('UNIVERSITY_SCAN_PAGES', 3))
+MARKER_SCAN_PAGES = int(os.getenv('MARKER_SCAN_PAGES', 50))  # pages held back while a better outline marker may follow
+UNIVERSITY_MATCH_THRESHOLD = int(os.getenv('UNIVERSITY_MATCH_THRESHOLD', 85))
+UNIVERSITY_ONLINE_LOOKUP = os.getenv('UNIVERSITY_ONLINE_LOOKUP', '').lower() in ('1', 'true', 'yes')
+JOB_WORKERS = int(os.getenv('JOB_WORKERS', 1))
+WARM_UP_MODELS = os.getenv('WARM_UP_MODELS', '').lower() in ('1', 'true', 'yes')
+SKILL_THRESHOLD = float(os.getenv('SKILL_THRESHOLD', 0.45))
+SKILL_BATCH_SIZE = int(os.getenv('SKILL_BATCH_SIZE', 128))
+SKILL_SEARCH_NGRAM_SIZE = int(os.getenv('SKILL_SEARCH_NGRAM_SIZE', 2))  # the server's ngram_token_size
+SKILL_MEMO_MEMORY_ITEMS = int(os.getenv('SKILL_MEMO_MEMORY_ITEMS', 4096))
+SKILL_MEMO_MAX_MB = int(os.getenv('SKILL_MEMO_MAX_MB', 256))
+STORE_EMBEDDINGS = os.getenv('STORE_EMBEDDINGS', '1').lower() in ('1', 'true', 'yes')
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 1024 * 1024))
+
+ESCO_API_URL = os.getenv('ESCO_API_URL', 'https://ec.europa.eu/esco/api')
+UNIVERSITY_API_URL = os.getenv('UNIVERSITY_API_URL', 'http://universities.hipolabs.com/search')
+SKILLAB_TRACKER_URL = os.getenv('SKILLAB_TRACKER_URL', 'https://skillab-tracker.csd.auth.gr/api')
+SKILLAB_VERIFY_SSL = os.getenv('SKILLAB_VERIFY_SSL', '').lower() in ('1', 'true', 'yes')
+SKILLAB_TRACKER_BATCH_SIZE = int(os.getenv('SKILLAB_TRACKER_BATCH_SIZE', 100))
+LABEL_RESOLVER_WORKERS = int(os.getenv('LABEL_RESOLVER_WORKERS', 8))
+LABEL_RESOLVER_TIMEOUT = float(os.getenv('LABEL_RESOLVER_TIMEOUT', 10))
+LABEL_RESOLVER_RETRIES = int(os.getenv('LABEL_RESOLVER_RETRIES', 3))
+LABEL_CACHE_TTL_HOURS = float(os.getenv('LABEL_CACHE_TTL_HOURS', 24 * 30))
+LABEL_NEGATIVE_TTL_HOURS = float(os.getenv('LABEL_NEGATIVE_TTL_HOURS', 24))
+
+DB_BATCH_SIZE = int(os.getenv('DB_BATCH_SIZE', 1000))
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 8))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', 5))
+DB_LOAD_WORKERS = int(os.getenv('DB_LOAD_WORKERS', os.cpu_count() or 1))
+DB_WRITE_CONNECTIONS = int(os.getenv('DB_WRITE_CONNECTIONS', 4))
+DB_DEADLOCK_RETRIES = int(os.getenv('DB_DEADLOCK_RETRIES', 3))
+MIGRATIONS_DIR = 'migrations'
+DB_MIGRATE_ON_STARTUP = os.getenv('DB_MIGRATE_ON_STARTUP', '1').lower() in ('1', 'true', 'yes')
 
 DB_CONFIG = {
     'host': os.getenv('DB_HOST', 'localhost'),
@@ -1,31 +1,40 @@
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+import contextlib
 import mysql.connector
-from esco_skill_extractor import SkillExtractor
-from skills import extract_and_get_title
+import db_pool
+import skill_counts
+from universities import is_known_country
+from skills import get_skill_titles, extract_skills_by_key
 from output import print_colored_text, print_horizontal_line, print_loading_line
-from helpers import load_from_cache, save_to_cache
+from helpers import load_from_cache, save_to_cache, description_hash
+from mysql.connector import errorcode
+from config import DB_BATCH_SIZE, DB_LOAD_WORKERS, DB_WRITE_CONNECTIONS, DB_DEADLOCK_RETRIES, CACHE_DIR
 
 from concurrent.futures import ThreadPoolExecutor
 
-skill_extractor = SkillExtractor()
-
 def is_database_connected(db_config):
+    """Health check through the shared pool: a pooled connection is pinged, no new connection is opened."""
     try:
-        conn = mysql.connector.connect(**db_config)
-        if conn.is_connected():
-            conn.close()
-            return True
+        with db_pool.connect(db_config) as conn:
+            return conn.is_connected()
     except mysql.connector.Error:
         return False
-    return False
+
+UNIVERSITY_ID_QUERY = "SELECT university_id, number_of_semesters FROM University WHERE university_name = %s AND country = %s"
+
 
 def get_university_id(cursor, university_name, country, number_of_semesters):
-    cursor.execute(
-        "SELECT university_id FROM University WHERE university_name LIKE %s AND country = %s",
-        (university_name, country),
-    )
+    cursor.execute(UNIVERSITY_ID_QUERY, (university_name, country))
     result = cursor.fetchone()
 
     if result:
+        if result[1] != number_of_semesters:
+            cursor.execute("UPDATE University SET number_of_semesters = %s WHERE university_id = %s", (number_of_semesters, result[0]))
         return result[0]
     
     cursor.execute(
@@ -34,81 +43,84 @@ def get_university_id(cursor, university_name, country, number_of_semesters):
     )
     return cursor.lastrowid
 
-def write_to_database(all_data, db_config, university_name, country, number_of_semesters):
-    try:
-        connection = mysql.connector.connect(**db_config)
-        cursor = connection.cursor()
-
-        print("✅ Database connection established.")
+def _batches(rows: list, batch_size: int):
+    for start in range(0, len(rows), batch_size):
+        yield rows[start:start + batch_size]
 
-        university_id = get_university_id(cursor, university_name, country, number_of_semesters)
 
+def prepare_university_rows(all_data, university_name, cached_data=None):
+    """
+    Turns a university's lessons into rows for the bulk loader, extracting skills (in one batched pass)
+    only for lessons whose cached skills are missing or stale, and writes those back to the cache.
+    cached_data is the university's cache file when the caller has already read it.
+    Returns (lesson_rows, skill_rows): [(lesson_name, semester, description)] and
+    [(semester, lesson_name, skill_name, skill_url)].
+    """
+    if cached_data is None:
         cached_data = load_from_cache(university_name) or {}
-        cached_skills = {}
+    cached_skills = {}
 
-        for semester, lessons in cached_data.items():
-            if isinstance(lessons, dict):
-                for lesson, data in lessons.items():
-                    if isinstance(data, dict) and "skill_names" in data and "skills" in data:
-                        cached_skills[lesson] = {
-                            "skill_names": list(data["skill_names"]),
-                            "skills": list(data["skills"]),
-                            "skill_connect": data.get("skill_connect", {}),
-                            "description": data.get("description", "")  # ✅ Ensure description is loaded
-                        }
+    for semester, lessons in cached_data.items():
+        if isinstance(lessons, dict):
+            for lesson, data in lessons.items():
+                if isinstance(data, dict) and "skill_names" in data and "skills" in data:
+                    cached_skills[lesson] = {
+                        "skill_names": list(data["skill_names"]),
+                        "skills": list(data["skills"]),
+                        "skill_connect": data.get("skill_connect", {}),
+                        "description": data.get("description", "")  # ✅ Ensure description is loaded
+                    }
 
-        updated_skills_cache = {}
+    def has_cached_skills(lesson_name, lesson_desc):
+        return lesson_name in cached_skills and description_hash(cached_skills[lesson_name]["description"]) == description_hash(lesson_desc)
 
-        for semester_name, lessons in all_data.items():
-            if not isinstance(lessons, dict):
+    lesson_skill_urls = extract_skills_by_key({
+        (semester_name, lesson_name): lesson_info.get("description", "")
+        for semester_name, lessons in all_data.items() if isinstance(lessons, dict)
+        for lesson_name, lesson_info in lessons.items()
+        if isinstance(lesson_info, dict) and not has_cached_skills(lesson_name, lesson_info.get("description", ""))
+    })
+    skill_titles = get_skill_titles(url for skill_urls in lesson_skill_urls.values() for url in skill_urls)
+
+    lesson_rows = []
+    skill_rows = []
+    updated_skills_cache = {}
+
+    for semester_name, lessons in all_data.items():
+        if not isinstance(lessons, dict):
+            continue
+
+        for lesson_name, lesson_info in lessons.items():
+            if not isinstance(lesson_info, dict):
                 continue
 
-            for lesson_name, lesson_info in lessons.items():
-                if not isinstance(lesson_info, dict):
-                    continue
-
-                lesson_desc = lesson_info.get("description", "")
-
-                semester_name = semester_name if semester_name else ""
-
-                cursor.execute(
-                    "INSERT INTO Lessons (lesson_name, semester, description, university_id) VALUES (%s, %s, %s, %s)",
-                    (lesson_name, semester_name, lesson_desc, university_id),
-                )
-                lesson_id = cursor.lastrowid
-
-                if lesson_name in cached_skills:
-                    extracted_skills = cached_skills[lesson_name]["skill_names"]
-                    extracted_skill_urls = cached_skills[lesson_name]["skills"]
-                    skill_connect = cached_skills[lesson_name].get("skill_connect", {})
-                else:
-                    skills_list = skill_extractor.get_skills([lesson_desc])
-                    extracted_skills = []
-                    extracted_skill_urls = []
-                    skill_connect = {}
-
-                    for skill_set in skills_list:
-                        for skill_url in skill_set:
-                            skill_name = extract_and_get_title(skill_url) or "Unknown Skill"
-                            skill_connect[skill_url] = skill_name  
-
-                    extracted_skill_urls = list(skill_connect.keys())
-                    extracted_skills = list(skill_connect.values())
-
-                    updated_skills_cache[lesson_name] = {
-                        "skill_names": extracted_skills,
-                        "skills": extracted_skill_urls,
-                        "skill_connect": skill_connect,
-                        "description": lesson_desc  # ✅ Store description in cache
-                    }
+            lesson_desc = lesson_info.get("description", "")
+
+            semester_name = semester_name if semester_name else ""
+
+            lesson_rows.append((lesson_name, semester_name, lesson_desc))
+
+            if has_cached_skills(lesson_name, lesson_desc):
+                skill_connect = cached_skills[lesson_name].get("skill_connect", {})
+            else:
+                skill_connect = {}
+
+                for skill_url in lesson_skill_urls.get((semester_name, lesson_name), []):
+                    skill_connect[skill_url] = skill_titles.get(skill_url) or "Unknown Skill"
 
-                for skill_url, skill_name in skill_connect.items():
-                    cursor.execute(
-                        "INSERT INTO Skills (skill_name, skill_url, lesson_id) VALUES (%s, %s, %s)",
-                        (skill_name, skill_url, lesson_id),
-                    )
+                updated_skills_cache[lesson_name] = {
+                    "skill_names": list(skill_connect.values()),
+                    "skills": list(skill_connect.keys()),
+                    "skill_connect": skill_connect,
+                    "description": lesson_desc  # ✅ Store description in cache
+                }
 
+            skill_rows.extend((semester_name, lesson_name, skill_name, skill_url) for skill_url, skill_name in skill_connect.items())
+
+    if updated_skills_cache:
         for semester_name, lessons in all_data.items():
+            if not isinstance(lessons, dict):
+                continue
             if semester_name not in cached_data:
                 cached_data[semester_name] = {}
 
@@ -122,16 +134,262 @@ def write_to_database(all_data, db_config, university_name, country, number_of_s
 
         save_to_cache(university_name, cached_data)
 
-        connection.commit()
-        print("✅ Data successfully written to the database!")
+    return lesson_rows, skill_rows
+
+
+def skill_url_hash(skill_url: str) -> bytes:
+    """SHA-256 of a skill URL, the unique key of SkillCatalog (equal to UNHEX(SHA2(url, 256)) in SQL)."""
+    return hashlib.sha256(skill_url.encode('utf-8')).digest()
+
+
+def upsert_skill_catalog(cursor, skill_names: dict, batch_size=None) -> dict:
+    """
+    Adds {url: name} to SkillCatalog (a known name replaces 'Unknown Skill', never the reverse)
+    and returns {url: skill_id}, resolved with one SELECT per batch. Rows are written in url_hash order,
+    so concurrent syncs sharing skills lock them in the same order instead of deadlocking.
+    """
+    batch_size = batch_size or DB_BATCH_SIZE
+    rows = sorted((skill_url_hash(url), url, name) for url, name in skill_names.items())
+
+    for batch in _batches(rows, batch_size):
+        cursor.executemany(
+            "INSERT INTO SkillCatalog (url_hash, url, name) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE name = IF(VALUES(name) = 'Unknown Skill', name, VALUES(name))",
+            batch,
+        )
+
+    skill_ids = {}
+    for batch in _batches(rows, batch_size):
+        placeholders = ", ".join(["%s"] * len(batch))
+        cursor.execute(f"SELECT skill_id, url FROM SkillCatalog WHERE url_hash IN ({placeholders})", [row[0] for row in batch])
+        skill_ids.update((url, skill_id) for skill_id, url in cursor.fetchall())
+    return skill_ids
+
+
+def lesson_content_hash(description, skills) -> str:
+    """Hash of everything stored for a lesson: its description and its (skill_url, skill_name) pairs."""
+    content = json.dumps([description, sorted(skills)], ensure_ascii=False)
+    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+
+
+def _link_skills(cursor, lesson_skills: dict, batch_size: int) -> int:
+    """Inserts the LessonSkill rows for {lesson_id: {skill_url: skill_name}}, upserting the catalog first."""
+    skill_names = {}
+    for skills in lesson_skills.values():
+        for skill_url, skill_name in skills.items():
+            if skill_name != "Unknown Skill" or skill_url not in skill_names:
+                skill_names[skill_url] = skill_name
+    skill_ids = upsert_skill_catalog(cursor, skill_names, batch_size)
+
+    links = [(lesson_id, skill_ids[skill_url]) for lesson_id, skills in lesson_skills.items() for skill_url in skills]
+    for batch in _batches(links, batch_size):
+        cursor.executemany(
+            "INSERT IGNORE INTO LessonSkill (lesson_id, skill_id) VALUES (%s, %s)",
+            batch,
+        )
+    return len(links)
+
+
+semester_count_regex = re.compile(r'\s*\(\d+ lessons?\)\s*$')
+
+
+def semester_key(semester: str) -> str:
+    """A semester label without its lesson count, e.g. 'Semester 1 (12 lessons)' -> 'Semester 1'."""
+    return semester_count_regex.sub('', semester or '')
+
 
+def sync_university(cursor, university_id, lesson_rows, skill_rows, batch_size=None):
+    """
+    Brings a university's stored lessons in line with lesson_rows/skill_rows, keyed by (semester_key, lesson_name)
+    and compared by lesson_content_hash. Only new lessons are inserted, changed ones updated (their skill
+    links rewritten) and vanished or duplicate ones deleted, so syncing an unchanged corpus writes nothing.
+    A semester whose label changed only because its lesson count did is relabelled with one UPDATE.
+    Returns counts of inserted, updated, deleted and unchanged lessons and of skill links written.
+    """
+    batch_size = batch_size or DB_BATCH_SIZE
+
+    skills_by_lesson = {}
+    for semester, lesson_name, skill_name, skill_url in skill_rows:
+        skills_by_lesson.setdefault((semester, lesson_name), {})[skill_url] = skill_name
+
+    wanted = {}  # (semester_key, lesson_name) -> (semester, description, skills, content_hash)
+    for lesson_name, semester, description in lesson_rows:
+        skills = skills_by_lesson.get((semester, lesson_name), {})
+        wanted[(semester_key(semester), lesson_name)] = (semester, description, skills, lesson_content_hash(description, list(skills.items())))
+
+    cursor.execute(
+        "SELECT lesson_id, semester, lesson_name, content_hash FROM Lessons WHERE university_id = %s ORDER BY lesson_id",
+        (university_id,),
+    )
+    stored = {}
+    to_delete = []
+    relabel = {}
+    for lesson_id, semester, lesson_name, content_hash in cursor.fetchall():
+        key = (semester_key(semester), lesson_name)
+        if key in stored or key not in wanted:
+            to_delete.append(lesson_id)  # earlier non-idempotent loads left duplicates behind
+        else:
+            stored[key] = (lesson_id, content_hash)
+            if semester != wanted[key][0]:
+                relabel[semester] = wanted[key][0]
+
+    to_insert = [key for key in wanted if key not in stored]
+    to_update = [key for key in wanted if key in stored and stored[key][1] != wanted[key][3]]
+
+    for batch in _batches(to_delete, batch_size):
+        placeholders = ", ".join(["%s"] * len(batch))
+        cursor.execute(f"DELETE FROM Lessons WHERE lesson_id IN ({placeholders})", batch)  # cascades to LessonSkill
+
+    if relabel:
+        cursor.executemany(
+            "UPDATE Lessons SET semester = %s WHERE university_id = %s AND semester = %s",
+            [(new_label, university_id, old_label) for old_label, new_label in relabel.items()],
+        )
+
+    relink = {}
+    if to_update:
+        update_rows = [(wanted[key][1], wanted[key][3], stored[key][0]) for key in to_update]
+        for batch in _batches(update_rows, batch_size):
+            cursor.executemany("UPDATE Lessons SET description = %s, content_hash = %s WHERE lesson_id = %s", batch)
+        for batch in _batches([stored[key][0] for key in to_update], batch_size):
+            placeholders = ", ".join(["%s"] * len(batch))
+            cursor.execute(f"DELETE FROM LessonSkill WHERE lesson_id IN ({placeholders})", batch)
+        relink.update((stored[key][0], wanted[key][2]) for key in to_update)
+
+    if to_insert:
+        insert_rows = [(key[1], wanted[key][0], wanted[key][1], wanted[key][3], university_id) for key in to_insert]
+        for batch in _batches(insert_rows, batch_size):
+            cursor.executemany(
+                "INSERT INTO Lessons (lesson_name, semester, description, content_hash, university_id) VALUES (%s, %s, %s, %s, %s)",
+                batch,
+            )
+        # One SELECT resolves the ids of every lesson just inserted.
+        cursor.execute(
+            "SELECT lesson_id, semester, lesson_name FROM Lessons WHERE university_id = %s ORDER BY lesson_id",
+            (university_id,),
+        )
+        inserted = set(to_insert)
+        relink.update((lesson_id, wanted[(semester_key(semester), lesson_name)][2])
+                      for lesson_id, semester, lesson_name in cursor.fetchall() if (semester_key(semester), lesson_name) in inserted)
+
+    links = _link_skills(cursor, relink, batch_size) if relink else 0
+    return {
+        "inserted": len(to_insert),
+        "updated": len(to_update),
+        "deleted": len(to_delete),
+        "unchanged": len(wanted) - len(to_insert) - len(to_update),
+        "skills": links,
+    }
+
+
+RETRYABLE_ERRORS = {errorcode.ER_LOCK_DEADLOCK, errorcode.ER_LOCK_WAIT_TIMEOUT}
+
+
+def _sync_to_database(db_config, university_name, country, number_of_semesters, lesson_rows, skill_rows) -> dict:
+    """
+    Syncs one university over a pooled connection and refreshes its skill count aggregates,
+    in a single transaction (rolled back on error). A transaction lost to a deadlock or lock wait
+    timeout is retried up to DB_DEADLOCK_RETRIES times.
+    """
+    with db_pool.connect(db_config) as connection:
+        for attempt in range(DB_DEADLOCK_RETRIES + 1):
+            cursor = connection.cursor()
+            try:
+                university_id = get_university_id(cursor, university_name, country, number_of_semesters)
+                counts = sync_university(cursor, university_id, lesson_rows, skill_rows)
+                if counts["inserted"] or counts["updated"] or counts["deleted"]:
+                    counts["aggregates"] = skill_counts.refresh_university(cursor, university_id, country)
+                connection.commit()
+                return counts
+            except mysql.connector.Error as err:
+                connection.rollback()
+                if err.errno not in RETRYABLE_ERRORS or attempt == DB_DEADLOCK_RETRIES:
+                    raise
+                print(f"[WARNING] {university_name}: {err.msg}, retrying ({attempt + 1}/{DB_DEADLOCK_RETRIES})")
+                time.sleep(0.1 * (attempt + 1))
+            finally:
+                cursor.close()
+
+
+def write_to_database(all_data, db_config, university_name, country, number_of_semesters):
+    try:
+        lesson_rows, skill_rows = prepare_university_rows(all_data, university_name)
+        counts = _sync_to_database(db_config, university_name, country, number_of_semesters, lesson_rows, skill_rows)
     except mysql.connector.Error as err:
         print(f"❌ Database Error: {err}")
-        if connection.is_connected():
-            connection.rollback()
-
-    finally:
-        if connection.is_connected():
-            cursor.close()
-            connection.close()
-            print("🔒 Database connection closed.")
\ No newline at end of file
+        return None
+
+    if counts["inserted"] or counts["updated"] or counts["deleted"]:
+        print(f"✅ Database synced: {counts['inserted']} lessons inserted, {counts['updated']} updated, "
+              f"{counts['deleted']} deleted, {counts['unchanged']} unchanged ({counts['skills']} skill links written)")
+    else:
+        print(f"✅ Database already up to date ({counts['unchanged']} lessons unchanged)")
+    return counts
+
+
+def resolve_university_country(university_name: str, university_country: str) -> str:
+    """The cached country, or a fresh lookup when the cache says 'Unknown' (caches written before the offline dataset)."""
+    if is_known_country(university_country):
+        return university_country.strip()
+    from skillcrawl import get_university_country  # skillcrawl imports this module
+    return get_university_country(university_name)
+
+
+def load_cache_file(json_path: str, db_config, write_slots=None) -> dict:
+    """
+    Reads, prepares and syncs one university cache file and returns its report entry.
+    Preparation runs unthrottled; the write waits for one of write_slots (a semaphore), if given.
+    """
+    report = {"file": os.path.basename(json_path), "university_name": None, "status": "failed"}
+    try:
+        return _load_cache_file(json_path, db_config, write_slots, report)
+    except json.JSONDecodeError:
+        report["error"] = "Corrupted or invalid JSON file"
+    except mysql.connector.Error as err:
+        report["error"] = f"Database error: {err}"
+    except Exception as e:  # a malformed file must not cost the report of the others
+        report["error"] = f"{type(e).__name__}: {e}"
+    return report
+
+
+def _load_cache_file(json_path: str, db_config, write_slots, report: dict) -> dict:
+    started = time.perf_counter()
+    with open(json_path, "r", encoding="utf-8") as file:
+        data = json.load(file)
+
+    university_name = data.get("university_name", "").replace("_cache", "").strip()
+    university_country = resolve_university_country(university_name, data.get("university_country", "")) if university_name else ""
+    number_of_semesters = len([key for key in data.keys() if key not in ["university_name", "university_country"]])
+    report["university_name"] = university_name
+
+    if not university_name or not is_known_country(university_country):
+        report.update(status="skipped", error="Missing university name or country")
+        return report
+
+    # The file being loaded usually is this university's cache, so it is not read a second time.
+    is_cache_file = os.path.abspath(json_path) == os.path.abspath(os.path.join(CACHE_DIR, f"{university_name}_cache.json"))
+    lesson_rows, skill_rows = prepare_university_rows(data, university_name, cached_data=data if is_cache_file else None)
+    report["prepare_seconds"] = round(time.perf_counter() - started, 3)
+
+    with write_slots or contextlib.nullcontext():
+        write_started = time.perf_counter()
+        counts = _sync_to_database(db_config, university_name, university_country, number_of_semesters, lesson_rows, skill_rows)
+    report["write_seconds"] = round(time.perf_counter() - write_started, 3)
+
+    report.update(status="saved", lessons=len(lesson_rows), skill_rows=len(skill_rows), **counts)
+    return report
+
+
+def load_cache_files(json_paths: list, db_config, workers=None, write_connections=None) -> list:
+    """
+    Loads university cache files into the database: DB_LOAD_WORKERS threads parse and prepare them
+    concurrently, and at most DB_WRITE_CONNECTIONS pooled connections write at once, one transaction
+    per university. Returns one report entry per file, in input order.
+    """
+    workers = max(1, min(workers or DB_LOAD_WORKERS, len(json_paths) or 1))
+    write_connections = max(1, min(write_connections or DB_WRITE_CONNECTIONS, db_pool.DB_POOL_SIZE))
+
+    write_slots = threading.BoundedSemaphore(write_connections)
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db-load") as executor:
+        return list(executor.map(lambda json_path: load_cache_file(json_path, db_config, write_slots), json_paths))
@@ -1,3 +1,4 @@
+-- Initial schema. Later changes (indexes included) live in migrations/ and are applied with `python migrate.py`.
 CREATE DATABASE IF NOT EXISTS SkillCrawl;
 USE SkillCrawl;
 
@@ -0,0 +1,126 @@
+import time
+import threading
+
+import mysql.connector
+from mysql.connector import pooling, errors
+
+from config import DB_POOL_SIZE, DB_POOL_TIMEOUT
+
+# One MySQL connection pool per database config, shared by every endpoint and helper.
+# Connections are pinged when they are checked out (and reconnected if the server dropped them),
+# so callers no longer open a separate probe connection before doing real work.
+
+_pools = {}
+_lock = threading.Lock()
+_metrics = {
+    "checkouts": 0,
+    "checkout_failures": 0,
+    "reconnects": 0,
+    "waits": 0,
+    "wait_seconds": 0.0,
+    "in_use": 0,
+    "peak_in_use": 0,
+}
+
+
+def _pool_key(db_config: dict):
+    return tuple(sorted(db_config.items()))
+
+
+def get_pool(db_config: dict) -> pooling.MySQLConnectionPool:
+    key = _pool_key(db_config)
+    if key not in _pools:
+        with _lock:
+            if key not in _pools:
+                pool_size = max(1, min(DB_POOL_SIZE, pooling.CNX_POOL_MAXSIZE))
+                _pools[key] = pooling.MySQLConnectionPool(pool_name=f"skillcrawl_{len(_pools)}", pool_size=pool_size, **db_config)
+    return _pools[key]
+
+
+class PooledConnection:
+    """A checked-out connection; close() (or leaving a with-block) hands it back to the pool."""
+
+    def __init__(self, cnx):
+        self._cnx = cnx
+
+    def __getattr__(self, name):
+        return getattr(self._cnx, name)
+
+    def is_connected(self):
+        return self._cnx is not None and self._cnx.is_connected()
+
+    def close(self):
+        if self._cnx is None:
+            return
+        cnx, self._cnx = self._cnx, None
+        try:
+            cnx.close()
+        finally:
+            with _lock:
+                _metrics["in_use"] -= 1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _checkout(pool):
+    """Waits up to DB_POOL_TIMEOUT seconds for a free connection."""
+    started = time.perf_counter()
+    waited = False
+    while True:
+        try:
+            cnx = pool.get_connection()
+            break
+        except errors.PoolError:
+            if time.perf_counter() - started >= DB_POOL_TIMEOUT:
+                raise
+            waited = True
+            time.sleep(0.05)
+    if waited:
+        with _lock:
+            _metrics["waits"] += 1
+            _metrics["wait_seconds"] += time.perf_counter() - started
+    return cnx
+
+
+def connect(db_config: dict) -> PooledConnection:
+    """
+    Checks a connection out of the shared pool, pinging it first and reconnecting a stale one.
+    Raises mysql.connector.Error if the database cannot be reached.
+    """
+    try:
+        cnx = _checkout(get_pool(db_config))
+    except mysql.connector.Error:
+        with _lock:
+            _metrics["checkout_failures"] += 1
+        raise
+
+    try:
+        cnx.ping(reconnect=False)
+    except mysql.connector.Error:
+        try:
+            cnx.reconnect(attempts=1)
+            with _lock:
+                _metrics["reconnects"] += 1
+        except mysql.connector.Error:
+            cnx.close()
+            with _lock:
+                _metrics["checkout_failures"] += 1
+            raise
+
+    with _lock:
+        _metrics["checkouts"] += 1
+        _metrics["in_use"] += 1
+        _metrics["peak_in_use"] = max(_metrics["peak_in_use"], _metrics["in_use"])
+    return PooledConnection(cnx)
+
+
+def pool_metrics() -> dict:
+    with _lock:
+        metrics = dict(_metrics)
+    metrics["wait_seconds"] = round(metrics["wait_seconds"], 3)
+    metrics["pools"] = [{"name": pool.pool_name, "size": pool.pool_size} for pool in _pools.values()]
+    return metrics
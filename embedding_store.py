@@ -0,0 +1,200 @@
+import os
+import re
+import json
+import tempfile
+
+import numpy as np
+
+from config import EMBEDDINGS_DIR
+from helpers import load_from_cache, description_hash
+from resources import get_skill_extractor
+
+# Sentence embeddings of lesson descriptions, one memory-mapped float32 matrix per university
+# (<university>.npy) plus a sidecar index (<university>.index.json) mapping (semester, lesson) to its
+# rows. The extractor scores descriptions sentence by sentence, so the rows are sentence
+# vectors: re-extraction at another threshold reproduces SkillExtractor.get_skills exactly.
+# Files are replaced atomically and opened with mmap_mode='r', so worker processes share pages.
+
+META_KEYS = ["university_name", "university_country"]
+
+_open_stores = {}
+_skill_matrices = {}
+
+
+def _store_paths(university_name: str):
+    base = os.path.join(EMBEDDINGS_DIR, re.sub(r'[^\w\- ]', '_', university_name))
+    return f"{base}.npy", f"{base}.index.json"
+
+
+def _skill_matrix(extractor) -> np.ndarray:
+    """The extractor's normalised skill embeddings as a NumPy matrix (converted once per extractor)."""
+    if id(extractor) not in _skill_matrices:
+        embeddings = extractor._skill_embeddings
+        if hasattr(embeddings, 'cpu'):
+            embeddings = embeddings.cpu().numpy()
+        _skill_matrices[id(extractor)] = np.asarray(embeddings, dtype=np.float32)
+    return _skill_matrices[id(extractor)]
+
+
+def _encode_sentences(extractor, sentences: list) -> np.ndarray:
+    if not sentences:
+        return np.zeros((0, _skill_matrix(extractor).shape[1]), dtype=np.float32)
+    return np.asarray(extractor._model.encode(sentences, normalize_embeddings=True, convert_to_numpy=True), dtype=np.float32)
+
+
+def load_embeddings(university_name: str):
+    """
+    Returns (matrix, index) for a university, the matrix memory-mapped read-only and the index
+    a {(semester, lesson): entry} dict; (None, {}) if nothing has been stored yet.
+    """
+    matrix_path, index_path = _store_paths(university_name)
+    if not os.path.exists(index_path):
+        return None, {}
+
+    stamp = os.stat(index_path).st_mtime_ns
+    cached = _open_stores.get(university_name)
+    if cached is None or cached[0] != stamp:
+        with open(index_path, 'r', encoding='utf-8') as f:
+            entries = json.load(f)["lessons"]
+        matrix = np.load(matrix_path, mmap_mode='r')
+        index = {(entry["semester"], entry["lesson"]): entry for entry in entries}
+        _open_stores[university_name] = cached = (stamp, matrix, index)
+    return cached[1], cached[2]
+
+
+def lesson_embeddings(university_name: str, semester: str, lesson: str):
+    """Zero-copy view of a lesson's sentence vectors, or None if it is not stored."""
+    matrix, index = load_embeddings(university_name)
+    entry = index.get((semester, lesson))
+    if entry is None:
+        return None
+    return matrix[entry["start"]:entry["start"] + entry["count"]]
+
+
+def build_embeddings(university_name: str, extractor=None) -> dict:
+    """
+    Brings a university's embedding store in line with cache/<university>_cache.json.
+    Rows of lessons whose description is unchanged are copied over; only new or edited
+    descriptions are encoded, and the model is not loaded at all when nothing changed.
+    """
+    data = load_from_cache(university_name) or {}
+    lessons = [
+        (semester, lesson, entry.get("description", "") if isinstance(entry, dict) else "")
+        for semester, semester_lessons in data.items() if semester not in META_KEYS and isinstance(semester_lessons, dict)
+        for lesson, entry in semester_lessons.items()
+    ]
+    old_matrix, old_index = load_embeddings(university_name)
+
+    pending = [
+        (semester, lesson, description) for semester, lesson, description in lessons
+        if old_index.get((semester, lesson), {}).get("description_hash") != description_hash(description)
+    ]
+    if not pending and len(old_index) == len(lessons):
+        return {"lessons": len(lessons), "encoded": 0}
+
+    encoded = {}
+    if pending:
+        extractor = extractor or get_skill_extractor()
+        sentences_per_lesson = [extractor._text_to_sentences(description) if isinstance(description, str) else [] for _, _, description in pending]
+        vectors = _encode_sentences(extractor, [s for sentences in sentences_per_lesson for s in sentences])
+        row = 0
+        for (semester, lesson, _), sentences in zip(pending, sentences_per_lesson):
+            encoded[(semester, lesson)] = vectors[row:row + len(sentences)]
+            row += len(sentences)
+
+    blocks = []
+    entries = []
+    start = 0
+    for semester, lesson, description in lessons:
+        if (semester, lesson) in encoded:
+            block = encoded[(semester, lesson)]
+        else:
+            old_entry = old_index[(semester, lesson)]
+            block = old_matrix[old_entry["start"]:old_entry["start"] + old_entry["count"]]
+        blocks.append(block)
+        entries.append({"semester": semester, "lesson": lesson, "start": start, "count": len(block),
+                        "description_hash": description_hash(description)})
+        start += len(block)
+
+    dim = blocks[0].shape[1] if blocks else 0
+    matrix = np.concatenate(blocks).astype(np.float32, copy=False) if blocks else np.zeros((0, dim), dtype=np.float32)
+    _write_store(university_name, matrix, entries)
+    print(f"[INFO] Stored {matrix.shape[0]} sentence embeddings for {len(entries)} lessons of {university_name} ({len(pending)} encoded)")
+    return {"lessons": len(entries), "encoded": len(pending)}
+
+
+def _write_store(university_name: str, matrix: np.ndarray, entries: list):
+    matrix_path, index_path = _store_paths(university_name)
+    os.makedirs(EMBEDDINGS_DIR, exist_ok=True)
+
+    fd, tmp_matrix = tempfile.mkstemp(dir=EMBEDDINGS_DIR, suffix='.npy.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        np.save(f, matrix)
+    os.replace(tmp_matrix, matrix_path)
+
+    fd, tmp_index = tempfile.mkstemp(dir=EMBEDDINGS_DIR, suffix='.json.tmp')
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({"university_name": university_name, "rows": int(matrix.shape[0]), "lessons": entries}, f, ensure_ascii=False)
+    os.replace(tmp_index, index_path)
+    _open_stores.pop(university_name, None)
+
+
+def reextract_skills(university_name: str, threshold: float, extractor=None) -> dict:
+    """
+    Re-runs skill matching at a new threshold from the stored sentence vectors, without
+    re-encoding any text. Returns {(semester, lesson): skill URLs}, in get_skills order.
+    """
+    matrix, index = load_embeddings(university_name)
+    if matrix is None:
+        return {}
+    if not len(matrix):
+        return {key: [] for key in index}
+    extractor = extractor or get_skill_extractor()
+
+    scores = matrix @ _skill_matrix(extractor).T
+    best_skill = scores.argmax(axis=1)
+    best_score = scores.max(axis=1)
+
+    skills = {}
+    for key, entry in index.items():
+        rows = slice(entry["start"], entry["start"] + entry["count"])
+        matched = np.unique(best_skill[rows][best_score[rows] > threshold])
+        skills[key] = [str(skill_id) for skill_id in np.take(extractor._skill_ids, matched)]
+    return skills
+
+
+def stored_universities() -> list:
+    universities = []
+    for index_file in sorted(os.listdir(EMBEDDINGS_DIR)) if os.path.isdir(EMBEDDINGS_DIR) else []:
+        if index_file.endswith(".index.json"):
+            with open(os.path.join(EMBEDDINGS_DIR, index_file), 'r', encoding='utf-8') as f:
+                universities.append(json.load(f)["university_name"])
+    return universities
+
+
+def description_vector(university_name: str, semester: str, lesson: str):
+    """Unit-length mean of a lesson's sentence vectors (None if it has no stored sentences)."""
+    vectors = lesson_embeddings(university_name, semester, lesson)
+    if vectors is None or not len(vectors):
+        return None
+    mean = vectors.mean(axis=0)
+    return mean / (np.linalg.norm(mean) or 1.0)
+
+
+def similar_lessons(university_name: str, semester: str, lesson: str, top_n: int = 10) -> list:
+    """Ranks the stored lessons of every university by cosine similarity to the given lesson."""
+    query = description_vector(university_name, semester, lesson)
+    if query is None:
+        return []
+
+    results = []
+    for other_university in stored_universities():
+        for other_semester, other_lesson in load_embeddings(other_university)[1]:
+            if (other_university, other_semester, other_lesson) == (university_name, semester, lesson):
+                continue
+            vector = description_vector(other_university, other_semester, other_lesson)
+            if vector is not None:
+                results.append((float(vector @ query), other_university, other_semester, other_lesson))
+
+    results.sort(reverse=True)
+    return [{"university_name": u, "semester": s, "lesson": l, "similarity": round(score, 4)} for score, u, s, l in results[:top_n]]
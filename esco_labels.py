@@ -0,0 +1,90 @@
+import os
+import csv
+import sqlite3
+import threading
+
+from config import ESCO_LABELS_DB, ESCO_SKILLS_CSV
+
+# Offline index of ESCO skill labels (conceptUri -> preferredLabel), built from the ESCO
+# CSV dump (skills_en.csv, https://esco.ec.europa.eu/en/use-esco/download) into SQLite.
+# A lookup is a primary-key read; a lesson's URLs are resolved with one query.
+
+SQLITE_MAX_PARAMS = 900
+
+_local = threading.local()
+_build_lock = threading.Lock()
+
+
+def build_label_index(csv_path: str = None, db_path: str = None) -> int:
+    """(Re)builds the label index from an ESCO skills CSV and returns the number of labels stored."""
+    csv_path = csv_path or ESCO_SKILLS_CSV
+    db_path = db_path or ESCO_LABELS_DB
+    os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+    tmp_path = f"{db_path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    with open(csv_path, 'r', encoding='utf-8-sig', newline='') as f:
+        rows = [
+            (row['conceptUri'].strip(), row['preferredLabel'].strip())
+            for row in csv.DictReader(f)
+            if row.get('conceptUri') and row.get('preferredLabel')
+        ]
+
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute("CREATE TABLE labels (uri TEXT PRIMARY KEY, label TEXT NOT NULL) WITHOUT ROWID")
+        conn.executemany("INSERT OR REPLACE INTO labels (uri, label) VALUES (?, ?)", rows)
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, db_path)
+    _local.__dict__.clear()
+
+    print(f"[INFO] Indexed {len(rows)} ESCO skill labels from {csv_path}")
+    return len(rows)
+
+
+def _connection():
+    """Per-thread read connection to the index, building it from ESCO_SKILLS_CSV on first use if possible."""
+    conn = getattr(_local, 'conn', None)
+    if conn is not None:
+        return conn
+
+    if not os.path.exists(ESCO_LABELS_DB):
+        with _build_lock:
+            if not os.path.exists(ESCO_LABELS_DB):
+                if not os.path.exists(ESCO_SKILLS_CSV):
+                    return None
+                build_label_index()
+
+    _local.conn = sqlite3.connect(f"file:{ESCO_LABELS_DB}?mode=ro", uri=True, check_same_thread=False)
+    return _local.conn
+
+
+def label_index_available() -> bool:
+    return _connection() is not None
+
+
+def get_label(skill_url: str):
+    """Returns the preferred label of a skill URL, or None if it is not in the index."""
+    conn = _connection()
+    if conn is None:
+        return None
+    row = conn.execute("SELECT label FROM labels WHERE uri = ?", (skill_url,)).fetchone()
+    return row[0] if row else None
+
+
+def get_labels(skill_urls) -> dict:
+    """Resolves many skill URLs at once; URLs missing from the index are left out of the result."""
+    conn = _connection()
+    skill_urls = list(dict.fromkeys(skill_urls))
+    if conn is None or not skill_urls:
+        return {}
+
+    labels = {}
+    for start in range(0, len(skill_urls), SQLITE_MAX_PARAMS):
+        chunk = skill_urls[start:start + SQLITE_MAX_PARAMS]
+        placeholders = ", ".join("?" * len(chunk))
+        labels.update(conn.execute(f"SELECT uri, label FROM labels WHERE uri IN ({placeholders})", chunk).fetchall())
+    return labels
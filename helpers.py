@@ -2,13 +2,15 @@ from collections import Counter
 import os
 import re
 import json
+import hashlib
+import tempfile
 import requests
-import pdfplumber
+from itertools import islice
 from fuzzywuzzy import fuzz
-from esco_skill_extractor import SkillExtractor
+from config import PDF_CACHE_DIR, UNIVERSITY_SCAN_PAGES
+from segmentation import clean_lesson_name, scan_markers
 
 CACHE_DIR = 'cache'
-CACHE_FILE = 'pdf_cache.json'
 
 os.makedirs(CACHE_DIR, exist_ok=True)
 
@@ -27,6 +29,15 @@ def save_cache():
     with open(UNI_FILE, "w") as f:
         json.dump(university_cache, f, indent=4)
 
+def update_university_cache(entries: dict) -> bool:
+    """Merges {key: entry} into the university cache, rewriting the file once and only if something changed."""
+    changed = {key: entry for key, entry in entries.items() if university_cache.get(key) != entry}
+    if not changed:
+        return False
+    university_cache.update(changed)
+    save_cache()
+    return True
+
 def load_university_cache():
     """Load the university cache from JSON file."""
     if not os.path.exists(UNI_FILE):
@@ -38,8 +49,6 @@ def load_university_cache():
         print("❌ Error: Corrupted university_cache.json file. Resetting cache.")
         return {}
 
-skill_extractor = SkillExtractor()
-
 
 def load_from_cache(university_name):
     cache_file = os.path.join(CACHE_DIR, f"{university_name}_cache.json")
@@ -54,20 +63,166 @@ def save_to_cache(university_name, data):
         json.dump(data, f, indent=4, ensure_ascii=False)  
 
 
-def clean_lesson_name(name: str) -> str:
-    return re.sub(r'\s*\(.*?\)\s*', '', name).strip()
 
-def load_cache():
-    cache_file_path = os.path.join(CACHE_DIR, CACHE_FILE)
-    if os.path.exists(cache_file_path):
-        with open(cache_file_path, 'r') as cache_file:
-            return json.load(cache_file)
-    return {}
+_file_hashes = {}
+_known_shards = set()
+
+
+def file_hash(file_path: str) -> str:
+    """Returns the SHA-256 of a file's content, memoized on (path, size, mtime)."""
+    stat = os.stat(file_path)
+    memo_key = (os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _file_hashes:
+        digest = hashlib.sha256()
+        with open(file_path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                digest.update(chunk)
+        _file_hashes[memo_key] = digest.hexdigest()
+    return _file_hashes[memo_key]
+
+
+def cache_key(namespace: str, content) -> str:
+    """Builds a content-addressed cache key, e.g. 'text/3fa4...'."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return f"{namespace}/{hashlib.sha256(content).hexdigest()}"
+
+
+def cache_namespace_dir(namespace: str) -> str:
+    return os.path.join(PDF_CACHE_DIR, namespace)
+
+
+def _shard_path(key: str, extension: str = '.json') -> str:
+    namespace, digest = key.split('/', 1)
+    return os.path.join(cache_namespace_dir(namespace), digest[:2], f"{digest}{extension}")
+
+
+def _namespace_shards(namespace: str):
+    for root, _, files in os.walk(cache_namespace_dir(namespace)):
+        for name in files:
+            if name.endswith(('.json', '.jsonl')):
+                path = os.path.join(root, name)
+                try:
+                    yield path, os.stat(path)
+                except FileNotFoundError:
+                    continue
+
+
+def cache_namespace_size(namespace: str) -> int:
+    """Total bytes of the shards stored under a namespace."""
+    return sum(stat.st_size for _, stat in _namespace_shards(namespace))
+
+
+def touch_cache_entry(key):
+    """Marks a shard as recently used, so size-based eviction keeps it."""
+    try:
+        os.utime(_shard_path(key))
+    except FileNotFoundError:
+        pass
+
+
+def trim_cache_namespace(namespace: str, max_bytes: int) -> int:
+    """Deletes the least recently used shards of a namespace until it fits in max_bytes; returns its new size."""
+    shards = sorted(_namespace_shards(namespace), key=lambda shard: shard[1].st_mtime)
+    total = sum(stat.st_size for _, stat in shards)
+    evicted = 0
+    for path, stat in shards:
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= stat.st_size
+        evicted += 1
+    if evicted:
+        _known_shards.clear()
+        print(f"[CACHE] Evicted {evicted} '{namespace}' shards, {total} bytes left")
+    return total
+
+
+def description_hash(description) -> str:
+    """Hash of a lesson description, used to tell whether its extracted skills are still valid."""
+    if not isinstance(description, str):
+        description = json.dumps(description, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(description.strip().encode('utf-8')).hexdigest()
 
 
 def is_cached(key):
-    cache = load_cache()
-    return key in cache
+    if key in _known_shards:
+        return True
+    if os.path.exists(_shard_path(key)):
+        _known_shards.add(key)
+        return True
+    return False
+
+
+def load_cache(key):
+    """Reads a single cache shard. Returns None on a miss or a corrupted shard."""
+    try:
+        with open(_shard_path(key), 'r', encoding='utf-8') as shard:
+            value = json.load(shard)
+    except (FileNotFoundError, json.JSONDecodeError):
+        _known_shards.discard(key)
+        return None
+    _known_shards.add(key)
+    return value
+
+
+def save_cache_entry(key, value):
+    """Writes a single cache shard atomically (temp file + rename)."""
+    shard_path = _shard_path(key)
+    os.makedirs(os.path.dirname(shard_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(shard_path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as tmp:
+            json.dump(value, tmp, ensure_ascii=False)
+        os.replace(tmp_path, shard_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _known_shards.add(key)
+
+
+def open_cache_stream(key):
+    """Returns an iterator over a JSON-lines shard, one value per line, or None on a miss."""
+    try:
+        shard = open(_shard_path(key, '.jsonl'), 'r', encoding='utf-8')
+    except FileNotFoundError:
+        return None
+    return _read_cache_stream(shard)
+
+
+def _read_cache_stream(shard):
+    with shard:
+        for line in shard:
+            yield json.loads(line)
+
+
+def save_cache_stream(key, values):
+    """
+    Passes values through while appending them to a JSON-lines shard.
+    The shard is only published (atomically) once the stream has been fully consumed without
+    an error and produced at least one value, so a failed or interrupted extraction never leaves
+    a truncated or empty cache entry behind.
+    """
+    shard_path = _shard_path(key, '.jsonl')
+    os.makedirs(os.path.dirname(shard_path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(shard_path), suffix='.tmp')
+    count = 0
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as tmp:
+            for value in values:
+                tmp.write(json.dumps(value, ensure_ascii=False) + '\n')
+                count += 1
+                yield value
+        if count:
+            os.replace(tmp_path, shard_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
 
 def contains_greek_characters(text: str) -> bool:
     return bool(re.search(r'[Α-ω]', text))
@@ -75,32 +230,69 @@ def contains_greek_characters(text: str) -> bool:
 def contains_no_lowercase_letters(text: str) -> bool:
     return not any(char.islower() for char in text)
 
-def extract_description(text: str) -> str:
+def extract_description(text: str, scan=None) -> str:
     start_marker = 'General competences'
     end_marker = 'Assessment'
-    start_index = text.find(start_marker)
-    if start_index == -1:
+    scan = scan or scan_markers(text)
+    if not scan.sections[start_marker]:
         return ""
-    end_index = text.find(end_marker, start_index)
-    if end_index == -1:
-        end_index = len(text)
+    start_index = scan.sections[start_marker][0]
+    end_index = next((index for index in scan.sections[end_marker] if index >= start_index), len(text))
     description = text[start_index + len(start_marker):end_index].strip()
     description = description.replace('Course content', '').strip()
     return description if description else "This lesson has no data!"
 
 
 
-def find_possible_university(pdf_file_path):
-    from skills import save_cache
-    """Extracts university name from PDF or assigns a unique 'Unknown University' label."""
-    with pdfplumber.open(pdf_file_path) as pdf:
-        all_text = " ".join(page.extract_text() or '' for page in pdf.pages)
+university_name_regex = re.compile(r'\b([A-Z][a-z]+(?: [A-Z][a-z]+)* (?:University|College|Institute|School|Academy|College))\b|\b(?:University|College|Institute|School|Academy|College) of [A-Z][a-z]+(?: [A-Z][a-z]+)*\b')
+
+_detected_universities = {}
+
+
+def detect_university_name(pages):
+    """
+    Searches the page texts for a university name, looking at the first few pages before the rest.
+    A match touching the end of the first pages is re-checked against the full text, since it
+    may continue onto the next page.
+    """
+    pages = iter(pages)
+    head_text = " ".join(page or '' for page in islice(pages, UNIVERSITY_SCAN_PAGES))
+    match = university_name_regex.search(head_text)
+    if match and match.end() < len(head_text):
+        return match.group(0).strip()
+
+    rest_pages = [page or '' for page in pages]
+    match = university_name_regex.search(" ".join([head_text] + rest_pages) if rest_pages else head_text)
+    return match.group(0).strip() if match else None
+
+
+def find_possible_university(pdf_file_path, pages=None):
+    """
+    Extracts university name from PDF or assigns a unique 'Unknown University' label.
+    Reads the cached page texts (or decodes pages lazily) and memoizes the result by file hash.
+    """
+    from pdf_utils import iter_pdf_pages, PDFReadError
 
-    pattern = r'\b([A-Z][a-z]+(?: [A-Z][a-z]+)* (?:University|College|Institute|School|Academy|College))\b|\b(?:University|College|Institute|School|Academy|College) of [A-Z][a-z]+(?: [A-Z][a-z]+)*\b'
-    match = re.search(pattern, all_text)
+    key = cache_key('university', file_hash(pdf_file_path))
+    if key not in _detected_universities:
+        cached = load_cache(key)
+        if cached is None:
+            try:
+                cached = {"name": detect_university_name(pages if pages is not None else iter_pdf_pages(pdf_file_path))}
+            except PDFReadError as e:
+                print(f"[WARNING] Could not read {pdf_file_path}: {e}")
+                cached = {"name": None}  # not saved, so the next call tries the file again
+            else:
+                save_cache_entry(key, cached)
+                _detected_universities[key] = cached["name"]
+        else:
+            _detected_universities[key] = cached["name"]
+        detected = cached["name"]
+    else:
+        detected = _detected_universities[key]
 
-    if match:
-        return match.group(0).strip()  # Return found university name
+    if detected:
+        return detected  # Return found university name
 
     # If unknown, check if this file has been processed before
     if pdf_file_path in university_cache:
@@ -111,6 +303,6 @@ def find_possible_university(pdf_file_path):
     unknown_name = f"Unknown University {unknown_count}"
     
     university_cache[pdf_file_path] = {"name": unknown_name}  # Store name & default country
-    save_cache(university_cache)
+    save_cache()
 
     return unknown_name
\ No newline at end of file
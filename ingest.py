@@ -0,0 +1,251 @@
+import os
+import re
+import time
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from config import CURRICULUM_DIR, INGEST_WORKERS, STORE_EMBEDDINGS
+from helpers import save_to_cache, load_from_cache, load_cache, save_cache_entry, cache_key, file_hash, description_hash
+from pdf_utils import iter_pdf_pages, iter_semester_lessons, process_pages_by_lesson
+from skills import extract_skills_by_key
+from embedding_store import build_embeddings
+from skill_memo import EXTRACTOR_VERSION
+from resources import skill_threshold
+
+MARKERS = ['Course Outlines', 'Course Content']
+META_KEYS = ["university_name", "university_country"]
+
+
+def university_name_from_path(pdf_path: str) -> str:
+    """Derives a university name from the PDF filename, e.g. 'University_of_Groningen.pdf'."""
+    return re.sub(r"[_\W]+", " ", os.path.basename(pdf_path).replace(".pdf", "")).strip()
+
+
+def _manifest_key(pdf_path: str) -> str:
+    return cache_key('manifest', os.path.abspath(pdf_path))
+
+
+def extraction_settings() -> dict:
+    """What the stored skills depend on besides the text; a manifest made with other settings is stale."""
+    return {"extractor_version": EXTRACTOR_VERSION, "threshold": skill_threshold()}
+
+
+def is_unchanged(pdf_path: str, manifest: dict) -> bool:
+    """
+    Compares a PDF with its manifest entry: equal size and mtime are trusted as is,
+    otherwise the content hash decides (a touched but identical file still counts as unchanged).
+    """
+    if not manifest or manifest.get("extraction") != extraction_settings():
+        return False
+    stat = os.stat(pdf_path)
+    if stat.st_size != manifest["size"]:
+        return False
+    if stat.st_mtime_ns == manifest["mtime_ns"]:
+        return True
+    if file_hash(pdf_path) != manifest["hash"]:
+        return False
+    manifest["mtime_ns"] = stat.st_mtime_ns
+    save_cache_entry(_manifest_key(pdf_path), manifest)
+    return True
+
+
+def _no_progress(counter: str, amount: int = 1):
+    pass
+
+
+def _count_pages(pages, progress):
+    for page in pages:
+        progress("pages_parsed")
+        yield page
+
+
+def extract_semester_skills(semesters: dict, reusable_lessons: dict = None, progress=_no_progress) -> dict:
+    """
+    Extracts skills for every lesson of a university in batched extractor calls,
+    reusing the cached entry of lessons whose description did not change.
+    """
+    reusable_lessons = reusable_lessons or {}
+    pending = {
+        (semester, lesson): desc
+        for semester, lessons in semesters.items()
+        for lesson, desc in lessons.items()
+        if description_hash(desc) != reusable_lessons.get(lesson, {}).get("description_hash")
+    }
+    extracted = extract_skills_by_key(pending)
+
+    all_data = {}
+    for semester, lessons in semesters.items():
+        all_data[semester] = {}
+        for lesson, desc in lessons.items():
+            if (semester, lesson) in extracted:
+                all_data[semester][lesson] = {"description": desc, "skills": extracted[(semester, lesson)]}
+            else:
+                all_data[semester][lesson] = dict(reusable_lessons[lesson]["entry"], description=desc)
+            progress("lessons_processed")
+            progress("skills_extracted", len(all_data[semester][lesson].get("skills", [])))
+    return all_data
+
+
+def _reusable_lessons(previous_data: dict, manifest: dict) -> dict:
+    """Cached lessons whose skills were extracted with the current extractor version and threshold."""
+    settings = extraction_settings()
+    lesson_hashes = {
+        lesson: entry["description_hash"]
+        for lesson, entry in manifest.get("lessons", {}).items()
+        if isinstance(entry, dict) and entry.get("extraction") == settings
+    }
+    return {
+        lesson: {"description_hash": lesson_hashes[lesson], "entry": entry}
+        for semester, lessons in previous_data.items() if semester not in META_KEYS and isinstance(lessons, dict)
+        for lesson, entry in lessons.items() if lesson in lesson_hashes and isinstance(entry, dict)
+    }
+
+
+def _load_manifest(pdf_path: str, university_name: str) -> dict:
+    manifest = load_cache(_manifest_key(pdf_path)) or {}
+    return manifest if manifest.get("university_name") == university_name else {}
+
+
+def _unchanged_data(pdf_path: str, manifest: dict, previous_data: dict, university_country: str):
+    if not previous_data or not is_unchanged(pdf_path, manifest):
+        return None
+    print(f"[CACHE] {pdf_path} is unchanged since the last run, skipping extraction")
+    previous_data["university_country"] = university_country
+    return previous_data
+
+
+def _ingest(pdf_path: str, university_name: str, university_country: str, force: bool = False, progress=_no_progress):
+    manifest = _load_manifest(pdf_path, university_name)
+    previous_data = {} if force else load_from_cache(university_name) or {}
+
+    unchanged_data = _unchanged_data(pdf_path, manifest, previous_data, university_country)
+    if unchanged_data is not None:
+        return unchanged_data, True
+
+    semesters = {}
+    pages = _count_pages(iter_pdf_pages(pdf_path), progress)
+    for i, lessons in iter_semester_lessons(pdf_path, MARKERS, pages=pages):
+        progress("lessons_found", len(lessons))
+        semesters[f"Semester {i} ({len(lessons)} lessons)"] = lessons
+
+    if not semesters:
+        lessons = process_pages_by_lesson(iter_pdf_pages(pdf_path))
+        progress("lessons_found", len(lessons))
+        semesters["Lessons Only"] = lessons
+
+    all_data = extract_semester_skills(semesters, _reusable_lessons(previous_data, manifest), progress)
+
+    all_data.update({"university_name": university_name, "university_country": university_country})
+    save_to_cache(university_name, all_data)
+
+    if STORE_EMBEDDINGS:
+        try:
+            build_embeddings(university_name)
+        except Exception as e:
+            print(f"[WARNING] Could not store description embeddings for {university_name}: {e}")
+
+    stat = os.stat(pdf_path)
+    settings = extraction_settings()
+    save_cache_entry(_manifest_key(pdf_path), {
+        "university_name": university_name,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hash": file_hash(pdf_path),
+        "extraction": settings,
+        "lessons": {
+            lesson: {"description_hash": description_hash(entry["description"]), "extraction": settings}
+            for semester, lessons in all_data.items() if semester not in META_KEYS
+            for lesson, entry in lessons.items()
+        },
+    })
+    return all_data, False
+
+
+def ingest_pdf(pdf_path: str, university_name: str, university_country: str, force: bool = False) -> dict:
+    """
+    Runs the full pipeline for one PDF (pages -> semesters -> lessons -> skills)
+    and writes the result to cache/<university>_cache.json.
+    PDFs unchanged since the last run are served from that file, and lessons whose description
+    did not change keep their cached skills; force=True re-extracts everything.
+    """
+    return _ingest(pdf_path, university_name, university_country, force)[0]
+
+
+def ingest_pdf_job(pdf_path: str, university_name: str, university_country: str, force: bool = False, progress=_no_progress) -> dict:
+    """Background job entry point: ingests one PDF, reporting progress, and returns its summary report."""
+    started = time.perf_counter()
+    all_data, unchanged = _ingest(pdf_path, university_name, university_country, force, progress)
+    return _file_report(pdf_path, university_name, all_data, unchanged, started)
+
+
+def _file_report(pdf_path: str, university_name: str, all_data: dict, unchanged: bool, started: float) -> dict:
+    semesters = [key for key in all_data if key not in META_KEYS]
+    return {
+        "filename": os.path.basename(pdf_path),
+        "university_name": university_name,
+        "status": "unchanged" if unchanged else "ok",
+        "semesters": len(semesters),
+        "lessons": sum(len(all_data[semester]) for semester in semesters),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def _ingest_worker(pdf_path: str, university_name: str, university_country: str, force: bool = False) -> dict:
+    """Process pool entry point: ingests one PDF and reports how it went."""
+    started = time.perf_counter()
+    try:
+        all_data, unchanged = _ingest(pdf_path, university_name, university_country, force)
+        return _file_report(pdf_path, university_name, all_data, unchanged, started)
+    except Exception as e:
+        return {"filename": os.path.basename(pdf_path), "university_name": university_name,
+                "status": "error", "error": str(e), "seconds": round(time.perf_counter() - started, 3)}
+
+
+def ingest_all_pdfs(curriculum_folder: str = CURRICULUM_DIR, workers: int = None, force: bool = False) -> dict:
+    """
+    Fans every PDF in the curriculum folder out over a process pool.
+    Countries are resolved up front in this process, so workers never race on university_cache.json,
+    and PDFs unchanged since the last run are answered from their manifest without starting the pool.
+    """
+    from skillcrawl import get_university_country
+
+    workers = workers or INGEST_WORKERS
+    pdf_paths = sorted(
+        os.path.join(curriculum_folder, f) for f in os.listdir(curriculum_folder) if f.endswith(".pdf")
+    )
+    started = time.perf_counter()
+    jobs = []
+    reports = []
+    for pdf_path in pdf_paths:
+        university_name = university_name_from_path(pdf_path)
+        university_country = get_university_country(university_name)
+        if not force:
+            file_started = time.perf_counter()
+            previous_data = load_from_cache(university_name) or {}
+            unchanged_data = _unchanged_data(pdf_path, _load_manifest(pdf_path, university_name), previous_data, university_country)
+            if unchanged_data is not None:
+                reports.append(_file_report(pdf_path, university_name, unchanged_data, True, file_started))
+                continue
+        jobs.append((pdf_path, university_name, university_country, force))
+
+    if not jobs:
+        print(f"[INFO] All {len(reports)} PDFs are unchanged, nothing to ingest")
+        reports.sort(key=lambda report: report["filename"])
+        return {"workers": 0, "total_seconds": round(time.perf_counter() - started, 3), "files": reports}
+
+    print(f"[INFO] Ingesting {len(jobs)} PDFs with {workers} workers...")
+
+    # Spawned (not forked) workers: the parent may already hold torch/OpenMP threads.
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        futures = [executor.submit(_ingest_worker, *job) for job in jobs]
+        for future in as_completed(futures):
+            report = future.result()
+            print(f"[INFO] {report['filename']}: {report['status']} in {report['seconds']}s")
+            reports.append(report)
+
+    reports.sort(key=lambda report: report["filename"])
+    return {
+        "workers": workers,
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "files": reports,
+    }
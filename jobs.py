@@ -0,0 +1,61 @@
+import time
+import uuid
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from config import JOB_WORKERS
+
+# In-process registry of background jobs; entries live until the API process restarts.
+_jobs = {}
+_jobs_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=JOB_WORKERS, thread_name_prefix="job")
+
+
+def submit_job(target, *args, **kwargs) -> str:
+    """
+    Queues target(*args, progress=..., **kwargs) on the job executor and returns its job id.
+    The target reports progress by calling progress(counter, amount).
+    """
+    job_id = uuid.uuid4().hex
+    with _jobs_lock:
+        _jobs[job_id] = {
+            "job_id": job_id,
+            "status": "queued",
+            "progress": {},
+            "result": None,
+            "error": None,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+        }
+    _executor.submit(_run_job, job_id, target, args, kwargs)
+    return job_id
+
+
+def _update_job(job_id: str, **fields):
+    with _jobs_lock:
+        _jobs[job_id].update(fields)
+
+
+def advance_job(job_id: str, counter: str, amount: int = 1):
+    with _jobs_lock:
+        progress = _jobs[job_id]["progress"]
+        progress[counter] = progress.get(counter, 0) + amount
+
+
+def _run_job(job_id: str, target, args, kwargs):
+    _update_job(job_id, status="running", started_at=time.time())
+    try:
+        result = target(*args, progress=lambda counter, amount=1: advance_job(job_id, counter, amount), **kwargs)
+    except Exception as e:
+        print(f"[ERROR] Job {job_id} failed: {e}")
+        _update_job(job_id, status="error", error=str(e), finished_at=time.time())
+    else:
+        _update_job(job_id, status="done", result=result, finished_at=time.time())
+
+
+def get_job(job_id: str):
+    """Returns a snapshot of the job, or None if the id is unknown."""
+    with _jobs_lock:
+        job = _jobs.get(job_id)
+        return None if job is None else dict(job, progress=dict(job["progress"]))
@@ -0,0 +1,181 @@
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from config import (ESCO_API_URL, SKILLAB_TRACKER_URL, SKILLAB_VERIFY_SSL, SKILLAB_TRACKER_BATCH_SIZE, LABEL_RESOLVER_WORKERS,
+                    LABEL_RESOLVER_TIMEOUT, LABEL_RESOLVER_RETRIES, LABEL_CACHE_TTL_HOURS, LABEL_NEGATIVE_TTL_HOURS)
+from helpers import cache_key, load_cache, save_cache_entry
+
+# Remote skill-label lookups (ESCO API, Skillab tracker) behind one pooled, retrying session.
+# Results are kept in the 'labels' cache namespace with a TTL; URLs that 404, time out or cannot be
+# reached are cached as None for a shorter time, so a dead URL is not retried on every lesson.
+# Server errors and rate limits that outlast the retries (5xx/429) and unreadable answers are
+# transient: they are not cached and are tried again next time.
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+_labels = {}
+_UNRESOLVED = object()
+
+
+def get_session() -> requests.Session:
+    """Shared session: keep-alive connections for LABEL_RESOLVER_WORKERS threads, retries with backoff."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                retry = Retry(total=LABEL_RESOLVER_RETRIES, backoff_factor=0.5, status_forcelist=RETRY_STATUSES,
+                              allowed_methods=frozenset({"GET", "POST"}), raise_on_status=False)
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=LABEL_RESOLVER_WORKERS, max_retries=retry)
+                session = requests.Session()
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                _session = session
+    return _session
+
+
+def _label_key(source: str, skill_url: str) -> str:
+    return cache_key('labels', f"{source} {skill_url}")
+
+
+def cached_label(source: str, skill_url: str):
+    """Returns (hit, label) for a cached lookup; a hit with label None is a cached failure."""
+    key = _label_key(source, skill_url)
+    entry = _labels.get(key)
+    if entry is None:
+        entry = load_cache(key)
+    if entry is None:
+        return False, None
+
+    ttl_hours = LABEL_CACHE_TTL_HOURS if entry["label"] is not None else LABEL_NEGATIVE_TTL_HOURS
+    if time.time() - entry["fetched_at"] > ttl_hours * 3600:
+        _labels.pop(key, None)
+        return False, None
+    _labels[key] = entry
+    return True, entry["label"]
+
+
+def store_label(source: str, skill_url: str, label):
+    key = _label_key(source, skill_url)
+    _labels[key] = {"label": label, "fetched_at": time.time()}
+    save_cache_entry(key, _labels[key])
+
+
+def clear_memory():
+    _labels.clear()
+
+
+def _fetch_esco_label(skill_url: str):
+    """Returns the label, None for a 404 or a dead endpoint (cached), or _UNRESOLVED for a transient failure (not cached)."""
+    try:
+        response = get_session().get(f"{ESCO_API_URL}/resource/skill", params={"uri": skill_url}, timeout=LABEL_RESOLVER_TIMEOUT)
+        if response.status_code == 404:
+            return None
+        if response.status_code != 200:
+            print(f"[WARNING] ESCO API returned {response.status_code} for {skill_url}")
+            return _UNRESOLVED
+        return response.json().get('preferredLabel', {}).get('en-us', None)
+    except (requests.Timeout, requests.ConnectionError) as e:
+        print(f"[WARNING] ESCO API unreachable for {skill_url}: {e}")
+        return None
+    except (requests.RequestException, ValueError) as e:
+        print(f"[WARNING] ESCO API lookup failed for {skill_url}: {e}")
+        return _UNRESOLVED
+
+
+def resolve_labels(skill_urls) -> dict:
+    """
+    Resolves skill URLs to ESCO preferred labels, {url: label or None}.
+    Cached URLs are answered locally; the rest are fetched LABEL_RESOLVER_WORKERS at a time.
+    """
+    labels = {}
+    missing = []
+    for skill_url in dict.fromkeys(skill_urls):
+        hit, label = cached_label('esco', skill_url)
+        if hit:
+            labels[skill_url] = label
+        else:
+            missing.append(skill_url)
+
+    if missing:
+        with ThreadPoolExecutor(max_workers=min(LABEL_RESOLVER_WORKERS, len(missing))) as executor:
+            for skill_url, label in zip(missing, executor.map(_fetch_esco_label, missing)):
+                if label is _UNRESOLVED:
+                    labels[skill_url] = None
+                    continue
+                store_label('esco', skill_url, label)
+                labels[skill_url] = label
+        print(f"[INFO] Resolved {len(labels)} skill labels ({len(missing)} fetched from the ESCO API)")
+    return labels
+
+
+def resolve_label(skill_url: str):
+    return resolve_labels([skill_url])[skill_url]
+
+
+def _tracker_label(skill: dict) -> str:
+    return skill.get("label") or (skill.get("alternative_labels")[0] if skill.get("alternative_labels") else "Unknown Skill")
+
+
+def _post_tracker_ids(skill_urls: list) -> dict:
+    """
+    Posts one chunk of ids to the tracker, following result pages until every id is
+    answered or a page adds nothing new. Returns {url: label} for the ids it knows.
+    """
+    found = {}
+    page = 1
+    while True:
+        response = get_session().post(
+            f"{SKILLAB_TRACKER_URL}/skills",
+            params={"page": page},
+            data=[("ids", skill_url) for skill_url in skill_urls],
+            headers={"accept": "application/json"},
+            timeout=LABEL_RESOLVER_TIMEOUT,
+            verify=SKILLAB_VERIFY_SSL,
+        )
+        if response.status_code != 200:
+            raise requests.HTTPError(f"Skillab tracker returned {response.status_code} - {response.text}", response=response)
+
+        page_labels = {skill.get("id"): _tracker_label(skill) for skill in response.json().get("items", [])}
+        new_ids = page_labels.keys() - found.keys()
+        found.update(page_labels)
+        if not new_ids or all(skill_url in found for skill_url in skill_urls):
+            return found
+        page += 1
+
+
+def track_skills(skill_urls) -> OrderedDict:
+    """
+    Looks skill URLs up on the Skillab tracker, {url: label} sorted by label.
+    Only uncached URLs are posted, SKILLAB_TRACKER_BATCH_SIZE ids per request and up to
+    LABEL_RESOLVER_WORKERS requests at once; ids the tracker does not return are cached as unknown.
+    Raises requests.RequestException if the tracker cannot be reached.
+    """
+    labels = {}
+    missing = []
+    for skill_url in dict.fromkeys(skill_urls):
+        hit, label = cached_label('tracker', skill_url)
+        if hit:
+            if label is not None:
+                labels[skill_url] = label
+        else:
+            missing.append(skill_url)
+
+    if missing:
+        chunks = [missing[start:start + SKILLAB_TRACKER_BATCH_SIZE] for start in range(0, len(missing), SKILLAB_TRACKER_BATCH_SIZE)]
+        with ThreadPoolExecutor(max_workers=min(LABEL_RESOLVER_WORKERS, len(chunks))) as executor:
+            for chunk, found in zip(chunks, executor.map(_post_tracker_ids, chunks)):
+                for skill_url in chunk:
+                    store_label('tracker', skill_url, found.get(skill_url))
+                    if found.get(skill_url) is not None:
+                        labels[skill_url] = found[skill_url]
+        print(f"[INFO] Resolved {len(missing)} skills on the Skillab tracker in {len(chunks)} bulk requests")
+
+    return OrderedDict(sorted(labels.items(), key=lambda item: item[1]))
@@ -1,18 +1,30 @@
 from fastapi import FastAPI, Depends, HTTPException
 from pydantic import BaseModel
-from database import write_to_database, is_database_connected
-from skills import get_skills_for_lesson, search_courses_by_skill, search_courses_by_skill_database, extract_and_get_title, search_courses_by_skill_url
-from pdf_utils import extract_text_from_pdf, split_by_semester, process_pages_by_lesson, extract_text_after_marker
-from config import DB_CONFIG
-from collections import Counter, defaultdict
+from database import write_to_database, load_cache_files, resolve_university_country
+from skills import get_skills_for_lesson, search_courses_by_skill, search_courses_by_skill_database, extract_and_get_title, search_courses_by_skill_url, extract_skills_by_key, lesson_description_text, UNIVERSITIES_BY_SKILLS_QUERY
+from pdf_utils import PDFReadError
+from ingest import ingest_pdf, ingest_pdf_job, ingest_all_pdfs, university_name_from_path
+from jobs import submit_job, get_job
+from embedding_store import build_embeddings, reextract_skills, similar_lessons
+from label_resolver import track_skills
+from db_pool import connect as db_connect, pool_metrics
+import skill_counts
+from migrate import apply_migrations, MigrationCheckError
+from config import DB_CONFIG, CURRICULUM_DIR, UPLOAD_CHUNK_SIZE, WARM_UP_MODELS, DB_MIGRATE_ON_STARTUP
+from resources import warm_up
+from contextlib import asynccontextmanager
+from collections import defaultdict
 import os
 import json
-from helpers import find_possible_university, load_from_cache, save_to_cache, load_university_cache, save_cache
+import time
+import shutil
+import tempfile
+from helpers import find_possible_university, load_from_cache, save_to_cache, load_university_cache, save_cache, update_university_cache
 from skillcrawl import get_university_country
+from universities import is_known_country
 from typing import List
 from fuzzywuzzy import process
 from fastapi import UploadFile
-from esco_skill_extractor import SkillExtractor
 from typing import Dict, Optional
 import re
 from crawler import UniversityCrawler
@@ -22,8 +34,6 @@ import mysql.connector
 from concurrent.futures import ThreadPoolExecutor
 import requests
 
-skill_extractor = SkillExtractor()
-
 UNI_FILE = "university_cache.json"
 
 if os.path.exists(UNI_FILE):
@@ -32,7 +42,27 @@ if os.path.exists(UNI_FILE):
 else:
     university_cache = {}
 
-app = FastAPI(title="SkillCrawl API", description="API for skill extraction and course search.")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The ESCO model is loaded on first use; set WARM_UP_MODELS=1 to pay that cost at startup instead.
+    if WARM_UP_MODELS:
+        warm_up()
+    if DB_MIGRATE_ON_STARTUP:
+        try:
+            apply_migrations(destructive=False)
+        except (mysql.connector.Error, MigrationCheckError) as e:
+            print(f"[WARNING] Could not apply database migrations: {e}")
+    yield
+
+app = FastAPI(title="SkillCrawl API", description="API for skill extraction and course search.", lifespan=lifespan)
+
+
+def get_db_connection():
+    """Checks a connection out of the shared pool (pinged on checkout); 500 if the database is unreachable."""
+    try:
+        return db_connect(DB_CONFIG)
+    except mysql.connector.Error:
+        raise HTTPException(status_code=500, detail="Database connection failed.")
 
 
 class CrawlRequest(BaseModel):
@@ -43,6 +73,8 @@ class SkillListRequest(BaseModel):
 
 class PDFProcessingRequest(BaseModel):
     pdf_name: str
+    force: bool = False
+    background: bool = False
 
 class SkillSearchRequest(BaseModel):
     skill: str
@@ -63,21 +95,31 @@ class TopSkillsRequest(BaseModel):
     university_name: str
     top_n: Optional[int] = 20
 
+class TopSkillsCountryRequest(BaseModel):
+    country: str
+    top_n: Optional[int] = 20
+
 @app.get("/health")
 def health_check():
     return {"status": "running"}
 
+@app.get("/db_pool_metrics")
+def db_pool_metrics():
+    """Checkouts, waits, reconnects and connections in use for the shared MySQL pool."""
+    return pool_metrics()
+
+
 @app.get("/list_pdfs")
 def list_pdfs():
-
-    university_cache = load_university_cache()
+    """Lists the curriculum PDFs with their university and country, resolved offline."""
     curriculum_folder = "curriculum"
     if not os.path.exists(curriculum_folder):
         os.makedirs(curriculum_folder) 
     
     pdf_files = []
+    university_entries = {}
     
-    for f in os.listdir(curriculum_folder):
+    for f in sorted(os.listdir(curriculum_folder)):
         if f.endswith(".pdf"):
             cached_data = load_from_cache(f) or {}
 
@@ -85,8 +127,7 @@ def list_pdfs():
             university_country = cached_data.get("university_country", "").strip()
 
             if not university_name or "unknown" in university_name.lower():
-                filename = f.replace(".pdf", "")
-                university_name = re.sub(r"[_\W]+", " ", filename).strip()
+                university_name = university_name_from_path(f)
                 print(f"Extracted university name from filename in /list_pdfs: {university_name}") 
 
             university_country = get_university_country(university_name) if university_name else "Unknown"
@@ -97,19 +138,19 @@ def list_pdfs():
                 "university_country": university_country
             })
 
-            university_cache[university_name] = {
+            university_entries[university_name] = {
                 "name": university_name,
                 "country": university_country,
                 "pdf_file": f
             }
-            save_cache()
+
+    update_university_cache(university_entries)
     
     return {"pdf_files": pdf_files}
 
 @app.post("/process_pdf")
 def process_pdf(request: PDFProcessingRequest):
 
-    university_cache = load_university_cache()
     print(f"Received request to process PDF: {request.pdf_name}")
     
     if os.path.isabs(request.pdf_name) and os.path.exists(request.pdf_name):
@@ -122,51 +163,93 @@ def process_pdf(request: PDFProcessingRequest):
             print(f"No PDF matching '{request.pdf_name}' found in 'curriculum/'. Possibly running a test case?")
         pdf_path = os.path.join(curriculum_folder, matching_files[0])
 
-    pages = extract_text_from_pdf(pdf_path)
-
     cached_data = load_from_cache(pdf_path) or {}
     university_name = cached_data.get("university_name", "").strip()
     university_country = cached_data.get("university_country", "").strip()
 
     if not university_name or "unknown" in university_name.lower():
-        university_name = re.sub(r"[_\W]+", " ", os.path.basename(pdf_path).replace(".pdf", "")).strip()
+        university_name = university_name_from_path(pdf_path)
         print(f"✅ Extracted university name: {university_name}")
-        save_cache()
 
+    university_country = get_university_country(university_name) if university_name else "Unknown"
 
-    university_cache = load_university_cache()
-    if university_name not in university_cache or university_country not in university_cache:
-        university_country = get_university_country(university_name) if university_name else "Unknown"
-        university_cache[university_name] = {"name": university_name, "country": university_country}
+    if request.background:
+        job_id = submit_job(ingest_pdf_job, pdf_path, university_name, university_country, force=request.force)
+        return {"message": "PDF queued for processing.", "job_id": job_id, "status_url": f"/jobs/{job_id}"}
 
+    try:
+        all_data = ingest_pdf(pdf_path, university_name, university_country, force=request.force)
+    except PDFReadError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
+    return {"message": "PDF processed successfully.", "data": all_data}
 
-    marker = ['Course Outlines', 'Course Content']
-    text_after_marker = extract_text_after_marker(pages, marker)
-    semesters = split_by_semester(text_after_marker)
-    all_data = {}
 
-    if semesters:
-        for i, semester_text in enumerate(semesters, 1):
-            lessons = process_pages_by_lesson([page for page in pages if page in semester_text])
-            all_data[f"Semester {i} ({len(lessons)} lessons)"] = {
-                lesson: {"description": desc, "skills": list({s for skill_set in skill_extractor.get_skills([desc]) for s in skill_set})}
-                for lesson, desc in lessons.items()
-            }
-    else:
-        lessons = process_pages_by_lesson(pages)
-        all_data["Lessons Only"] = {
-            lesson: {"description": desc, "skills": list({s for skill_set in skill_extractor.get_skills([desc]) for s in skill_set})}
-            for lesson, desc in lessons.items()
-        }
+@app.post("/upload_pdf")
+def upload_pdf(file: UploadFile, force: bool = False):
+    """
+    Uploads a curriculum PDF and queues it for processing in the background.
+    - The upload is copied to curriculum/ in UPLOAD_CHUNK_SIZE chunks, never held in memory whole
+    - A PDF with the same name already in curriculum/ is a 409 unless force is set
+    - force: replace an existing PDF of that name and re-extract even if an identical PDF was processed before
+    Returns a job id; poll /jobs/{job_id} for progress (pages parsed, lessons found, skills extracted).
+    """
+    filename = os.path.basename(file.filename or "")
+    if not filename.lower().endswith(".pdf"):
+        raise HTTPException(status_code=400, detail="Only .pdf files can be uploaded.")
 
-    university_country = get_university_country(university_name) if university_name else "Unknown"
+    os.makedirs(CURRICULUM_DIR, exist_ok=True)
+    pdf_path = os.path.join(CURRICULUM_DIR, filename)
+    conflict = HTTPException(status_code=409, detail=f"'{filename}' already exists in curriculum/; upload with force=true to replace it.")
+    if os.path.exists(pdf_path) and not force:
+        raise conflict
 
-    all_data.update({"university_name": university_name, "university_country": university_country})
-    save_cache()
-    save_to_cache(university_name, all_data)
+    fd, tmp_path = tempfile.mkstemp(dir=CURRICULUM_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            shutil.copyfileobj(file.file, out, UPLOAD_CHUNK_SIZE)
+        if force:
+            os.replace(tmp_path, pdf_path)
+        else:
+            try:
+                os.link(tmp_path, pdf_path)  # unlike os.replace, fails if another upload took the name meanwhile
+            except FileExistsError:
+                raise conflict
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    print(f"[INFO] Uploaded {filename} ({os.path.getsize(pdf_path)} bytes)")
 
-    return {"message": "PDF processed successfully.", "data": all_data}
+    university_name = university_name_from_path(pdf_path)
+    university_country = get_university_country(university_name)
+    job_id = submit_job(ingest_pdf_job, pdf_path, university_name, university_country, force=force)
+
+    return {"message": "PDF uploaded and queued for processing.", "filename": filename,
+            "job_id": job_id, "status_url": f"/jobs/{job_id}"}
+
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    """Returns the status ("queued", "running", "done", "error"), progress counters and result of a background job."""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"No job with id '{job_id}'.")
+    return job
+
+
+@app.post("/process_all_pdfs")
+def process_all_pdfs(workers: Optional[int] = None, force: bool = False):
+    """
+    Processes every PDF in the curriculum folder in parallel, one worker process per file.
+    - workers: size of the process pool (defaults to INGEST_WORKERS)
+    - force: re-extract PDFs and lessons even if they are unchanged since the last run
+    Returns per-file status ("ok", "unchanged" or "error"), lesson counts and timings.
+    """
+    if not os.path.exists(CURRICULUM_DIR) or not any(f.endswith(".pdf") for f in os.listdir(CURRICULUM_DIR)):
+        raise HTTPException(status_code=404, detail=f"No PDF files found in '{CURRICULUM_DIR}/'.")
+
+    report = ingest_all_pdfs(workers=workers, force=force)
+    return {"message": "All PDFs processed.", **report}
 
 CACHE_DIR = "cache"  
 
@@ -235,12 +318,8 @@ def calculate_skillnames(university_name: str, lesson_name: Optional[str] = None
 
     university_name = university_key.replace("_cache", "").strip()
 
-    # Skillab Tracker API endpoint
-    skillab_tracker_url = "https://skillab-tracker.csd.auth.gr/api/track_skills"
-
-
-    def process_lesson(semester, lesson, lesson_data):
-        """ Extracts skills for a lesson using Skillab Tracker API """
+    def process_lesson(semester, lesson, lesson_data, skill_urls, tracked_labels):
+        """ Stores the labels of a lesson's extracted skills, resolved through the Skillab Tracker API """
         try:
             print(f"[INFO] Processing skills for: {lesson} in {semester}")
 
@@ -255,44 +334,19 @@ def calculate_skillnames(university_name: str, lesson_name: Optional[str] = None
                 print(f"[WARNING] No valid description for {lesson}. Skipping skill extraction.")
                 return lesson, cached_skill_names
 
-            # 🔵 Extract skills using skill extractor
-            skills_list = skill_extractor.get_skills([lesson_description])
-            skill_urls = set()
-
-            for skill_set in skills_list:
-                for skill_url in skill_set:
-                    skill_urls.add(skill_url)
-
+            # 🔵 Skills were extracted for all selected lessons in one batched pass
             if not skill_urls:
                 print(f"[WARNING] No skills found for {lesson}. Skipping API call.")
                 return lesson, cached_skill_names
 
-            # 🔵 Convert skill URLs into URL-encoded format for API call
-            skill_params = "&".join([f"ids={requests.utils.quote(skill_url)}" for skill_url in skill_urls])
-
-            # 🔵 Make the POST request in the required format
-            skillab_tracker_url = "https://skillab-tracker.csd.auth.gr/api/skills?page=1"
-            headers = {
-                "accept": "application/json",
-                "Content-Type": "application/x-www-form-urlencoded"
-            }
-            response = requests.post(skillab_tracker_url, headers=headers, data=skill_params, verify=False)
-
-            if response.status_code != 200:
-                print(f"[ERROR] Skillab API failed for {lesson}. Response: {response.status_code} - {response.text}")
+            # 🔵 Labels were looked up for all selected lessons in a few bulk tracker requests
+            if tracked_labels is None:
+                print(f"[ERROR] Skillab API failed for {lesson}.")
                 return lesson, cached_skill_names
-
-            # 🔵 Extract skill names from API response
-            skill_data = response.json()
-            new_skills = OrderedDict()
-
-            for skill in skill_data.get("items", []):
-                skill_url = skill.get("id")
-                skill_name = skill.get("label") or (skill.get("alternative_labels")[0] if skill.get("alternative_labels") else "Unknown Skill")
-
-                new_skills[skill_url] = skill_name
-
-            sorted_skills = OrderedDict(sorted(new_skills.items(), key=lambda x: x[1]))
+            sorted_skills = OrderedDict(sorted(
+                ((skill_url, tracked_labels[skill_url]) for skill_url in skill_urls if skill_url in tracked_labels),
+                key=lambda x: x[1]
+            ))
 
             for skill_url, skill_name in sorted_skills.items():
                 if skill_name not in cached_skill_names:
@@ -312,31 +366,42 @@ def calculate_skillnames(university_name: str, lesson_name: Optional[str] = None
             return lesson, []
 
 
-    lesson_tasks = []
+    selected_by_semester = {}
 
-    with ThreadPoolExecutor() as executor:
-        for semester, lessons in cached_data.items():
-            if semester in ["university_name", "university_country"]:
-                continue
+    for semester, lessons in cached_data.items():
+        if semester in ["university_name", "university_country"]:
+            continue
 
-            if lesson_name:
-                best_lesson_match, lesson_score = process.extractOne(lesson_name, list(lessons.keys()))
+        if lesson_name:
+            best_lesson_match, lesson_score = process.extractOne(lesson_name, list(lessons.keys()))
 
-                if lesson_score < 80:
-                    raise HTTPException(status_code=404, detail=f"No close match found for lesson '{lesson_name}'.")
+            if lesson_score < 80:
+                raise HTTPException(status_code=404, detail=f"No close match found for lesson '{lesson_name}'.")
 
-                print(f"[INFO] Matched lesson '{lesson_name}' -> '{best_lesson_match}' with score {lesson_score}")
+            print(f"[INFO] Matched lesson '{lesson_name}' -> '{best_lesson_match}' with score {lesson_score}")
 
-                selected_lessons = {best_lesson_match: lessons[best_lesson_match]}
-            else:
-                selected_lessons = lessons  # Preserve all lessons if no specific one is given
+            selected_by_semester[semester] = {best_lesson_match: lessons[best_lesson_match]}
+        else:
+            selected_by_semester[semester] = lessons  # Preserve all lessons if no specific one is given
 
-            for lesson, lesson_data in selected_lessons.items():
-                lesson_tasks.append(executor.submit(process_lesson, semester, lesson, lesson_data))
+    lesson_skill_urls = extract_skills_by_key({
+        (semester, lesson): lesson_description_text(lesson_data)
+        for semester, selected_lessons in selected_by_semester.items()
+        for lesson, lesson_data in selected_lessons.items()
+    })
 
-    for future in lesson_tasks:
-        lesson, skills = future.result()
-        extracted_skills[lesson] = skills
+    # 🔵 One set of paged bulk requests for the unique skills of every selected lesson
+    try:
+        tracked_labels = track_skills(skill_url for skill_urls in lesson_skill_urls.values() for skill_url in skill_urls)
+    except requests.RequestException as e:
+        print(f"[ERROR] Skillab API failed: {e}")
+        tracked_labels = None
+
+    for semester, selected_lessons in selected_by_semester.items():
+        for lesson, lesson_data in selected_lessons.items():
+            skill_urls = lesson_skill_urls.get((semester, lesson), [])
+            lesson, skills = process_lesson(semester, lesson, lesson_data, skill_urls, tracked_labels)
+            extracted_skills[lesson] = skills
 
     save_to_cache(university_name, cached_data)
 
@@ -353,10 +418,8 @@ def search_skill(request: SkillSearchRequest):
     - Lesson(s) the skill is in
     - And frequency of appearance
     """
-    if not is_database_connected(DB_CONFIG):
-        raise HTTPException(status_code=500, detail="Database connection failed.")
-    
-    results = search_courses_by_skill_database(request.skill, DB_CONFIG, request.university)
+    with get_db_connection() as conn:
+        results = search_courses_by_skill_database(request.skill, DB_CONFIG, request.university, conn=conn)
     return {"results": results}
 
 
@@ -369,32 +432,19 @@ def search_skill_url(request: SkillSearchURLRequest):
     - Lesson(s) the skill is in
     - And frequency of appearance
     """
-    if not is_database_connected(DB_CONFIG):
-        raise HTTPException(status_code=500, detail="Database connection failed.")
-    
-    results = search_courses_by_skill_url(request.skill_url, DB_CONFIG, request.university)
+    with get_db_connection() as conn:
+        results = search_courses_by_skill_url(request.skill_url, DB_CONFIG, request.university, conn=conn)
     return {"results": results}
 
 
 @app.post("/get_universities_by_skills")
 def get_universities_by_skills(request: SkillListRequest):
-    if not is_database_connected(DB_CONFIG):
-        raise HTTPException(status_code=500, detail="Database connection failed.")
-    
-    query = """
-        SELECT u.university_name, l.lesson_name, s.skill_name 
-        FROM Skills s
-        JOIN Lessons l ON s.lesson_id = l.lesson_id
-        JOIN University u ON l.university_id = u.university_id
-        WHERE s.skill_name IN (%s)
-    """
-    
     skill_placeholders = ', '.join(['%s'] * len(request.skills))
-    formatted_query = query.replace("%s", skill_placeholders)
+    formatted_query = UNIVERSITIES_BY_SKILLS_QUERY.format(placeholders=skill_placeholders)
     
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor(dictionary=True)
         cursor.execute(formatted_query, tuple(request.skills))
         results = cursor.fetchall()
     
@@ -433,29 +483,11 @@ def get_universities_by_skills(request: SkillListRequest):
 
 @app.post("/get_top_skills")
 def get_top_skills(request: TopSkillsRequest):
-    if not is_database_connected(DB_CONFIG):
-        raise HTTPException(status_code=500, detail="Database connection failed.")
-    
-    query = """
-    SELECT s.skill_name
-    FROM Skills s
-    JOIN Lessons l ON s.lesson_id = l.lesson_id
-    JOIN University u ON l.university_id = u.university_id
-    WHERE u.university_name = %s
-      AND s.skill_name IS NOT NULL
-      AND s.skill_name != ''
-      AND s.skill_name NOT LIKE 'Unknown%'
-    """
-
-    
+    """Most taught skills of a university, read from the maintained UniversitySkillCount aggregate."""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query, (request.university_name,))
-        results = cursor.fetchall()
-        
-        skill_counter = Counter(row["skill_name"] for row in results)
-        top_skills = [{"skill": skill, "frequency": count} for skill, count in skill_counter.most_common(request.top_n)]
+        top_skills = skill_counts.top_skills_for_university(cursor, request.university_name, request.top_n)
         
     except mysql.connector.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
@@ -467,32 +499,31 @@ def get_top_skills(request: TopSkillsRequest):
     return {"university_name": request.university_name, "top_skills": top_skills}
 
 
+@app.post("/get_top_skills_country")
+def get_top_skills_country(request: TopSkillsCountryRequest):
+    """Most taught skills across a country's universities, read from the CountrySkillCount aggregate."""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
+    try:
+        top_skills = skill_counts.top_skills_for_country(cursor, request.country, request.top_n)
+
+    except mysql.connector.Error as e:
+        raise HTTPException(status_code=500, detail=f"Database error: {e}")
+
+    finally:
+        cursor.close()
+        conn.close()
+
+    return {"country": request.country, "top_skills": top_skills}
+
+
 @app.post("/get_top_skills_all")
 def get_top_skills_all(request: TopSkillsAllRequest):
-    if not is_database_connected(DB_CONFIG):
-        raise HTTPException(status_code=500, detail="Database connection failed.")
-    
-    query = """
-        SELECT s.skill_name, u.university_name
-        FROM Skills s
-        JOIN Lessons l ON s.lesson_id = l.lesson_id
-        JOIN University u ON l.university_id = u.university_id
-    """
-    
+    """Most taught skills overall, read from the SkillCount aggregate, with the universities teaching each."""
+    conn = get_db_connection()
+    cursor = conn.cursor(dictionary=True)
     try:
-        conn = mysql.connector.connect(**DB_CONFIG)
-        cursor = conn.cursor(dictionary=True)
-        cursor.execute(query)
-        results = cursor.fetchall()
-        
-        skill_counter = Counter(row["skill_name"] for row in results)
-        university_skill_map = defaultdict(set)
-        
-        for row in results:
-            university_skill_map[row["skill_name"].lower()].add(row["university_name"])
-        
-        top_skills = [{"skill": skill, "frequency": count, "universities": list(university_skill_map[skill.lower()])} 
-                      for skill, count in skill_counter.most_common(request.top_n)]
+        top_skills = skill_counts.top_skills_global(cursor, request.top_n)
         
     except mysql.connector.Error as e:
         raise HTTPException(status_code=500, detail=f"Database error: {e}")
@@ -504,6 +535,34 @@ def get_top_skills_all(request: TopSkillsAllRequest):
     return {"top_skills": top_skills}
 
 
+@app.post("/reextract_skills")
+def reextract_skills_at_threshold(university_name: str, threshold: float):
+    """
+    Re-matches a university's lessons against the ESCO skills at another threshold.
+    Uses the stored sentence embeddings of each description, so no text is re-encoded
+    (lessons added since the last ingestion are embedded first).
+    """
+    if load_from_cache(university_name) is None:
+        raise HTTPException(status_code=404, detail=f"No cached data for university: {university_name}")
+
+    build_embeddings(university_name)
+    skills = reextract_skills(university_name, threshold)
+
+    by_semester = defaultdict(dict)
+    for (semester, lesson), skill_urls in skills.items():
+        by_semester[semester][lesson] = skill_urls
+    return {"university_name": university_name, "threshold": threshold, "skills": by_semester}
+
+
+@app.get("/similar_lessons")
+def get_similar_lessons(university_name: str, semester: str, lesson_name: str, top_n: int = 10):
+    """Finds the lessons (of any university) whose descriptions are closest to the given lesson's."""
+    results = similar_lessons(university_name, semester, lesson_name, top_n)
+    if not results:
+        raise HTTPException(status_code=404, detail=f"No stored embeddings for '{lesson_name}' in {university_name} ({semester}).")
+    return {"university_name": university_name, "lesson": lesson_name, "similar": results}
+
+
 @app.get("/search_json_in_cache")
 def search_json_in_cache(university_name: str):
     """
@@ -541,9 +600,6 @@ def save_to_db(university_name: str):
     Searches for a cached JSON file using fuzzy matching and saves its data to the database.
     """
 
-    if not is_database_connected(DB_CONFIG):
-        raise HTTPException(status_code=500, detail="Database connection failed.")
-
     cache_folder = "cache"
     
     if not os.path.exists(cache_folder):
@@ -572,13 +628,15 @@ def save_to_db(university_name: str):
         raise HTTPException(status_code=400, detail=f"Corrupted or invalid JSON file: {best_match}")
 
     university_name = data.get("university_name", "").strip()
-    university_country = data.get("university_country", "").strip()
+    university_country = resolve_university_country(university_name, data.get("university_country", "")) if university_name else ""
     number_of_semesters = len(data) - 2 
 
-    if not university_name or not university_country:
+    if not university_name or not is_known_country(university_country):
         raise HTTPException(status_code=400, detail="Missing university name or country in the cached data.")
     
-    write_to_database(data, DB_CONFIG, university_name, university_country, number_of_semesters)
+    # One pooled checkout inside write_to_database; None means it could not connect or the write failed.
+    if write_to_database(data, DB_CONFIG, university_name, university_country, number_of_semesters) is None:
+        raise HTTPException(status_code=500, detail="Database write failed.")
 
     return {
         "message": "Data saved to database successfully.",
@@ -594,9 +652,6 @@ def get_all_data(university_name: str):
     Fetch all university-related data, including lessons and skills, from the MySQL database.
     If the database is offline, raise an error immediately.
     """
-    if not is_database_connected(DB_CONFIG):  # Check connection before proceeding
-        raise HTTPException(status_code=500, detail="Database connection failed.")
-
     query = """
     SELECT 
         u.university_name,
@@ -605,15 +660,16 @@ def get_all_data(university_name: str):
         l.lesson_name,
         l.semester,
         l.description,
-        s.skill_name,
-        s.skill_url
+        c.name AS skill_name,
+        c.url AS skill_url
     FROM University u
     LEFT JOIN Lessons l ON u.university_id = l.university_id
-    LEFT JOIN Skills s ON l.lesson_id = s.lesson_id
+    LEFT JOIN LessonSkill ls ON l.lesson_id = ls.lesson_id
+    LEFT JOIN SkillCatalog c ON ls.skill_id = c.skill_id
     WHERE u.university_name LIKE %s
     """
 
-    conn = mysql.connector.connect(**DB_CONFIG)
+    conn = get_db_connection()  # Pinged on checkout, so an offline database fails here
     cursor = conn.cursor(dictionary=True)  
 
     try:
@@ -665,39 +721,33 @@ def get_all_data(university_name: str):
 def save_all_to_db():
     """
     Dynamically finds JSON files in the cache folder and saves their contents to the database.
-    Process is sped up with Cache files.
+    Files are parsed and prepared concurrently (DB_LOAD_WORKERS) and written over at most
+    DB_WRITE_CONNECTIONS pooled connections, one transaction per university.
+    Returns a per-university report with timings and row counts.
     """
-    if not is_database_connected(DB_CONFIG):
-        raise HTTPException(status_code=500, detail="Database connection failed.")
-
-    json_files = [f for f in os.listdir(CACHE_FOLDER) if f.endswith(".json") and f != "pdf_cache.json"]
+    json_files = sorted(f for f in os.listdir(CACHE_FOLDER) if f.endswith(".json") and f != "pdf_cache.json")
 
     if not json_files:
         raise HTTPException(status_code=404, detail="No valid university data found in cache.")
 
-    for json_file in json_files:
-        json_path = os.path.join(CACHE_FOLDER, json_file)
-
-        try:
-            with open(json_path, "r", encoding="utf-8") as file:
-                data = json.load(file)
+    started = time.perf_counter()
+    report = load_cache_files([os.path.join(CACHE_FOLDER, json_file) for json_file in json_files], DB_CONFIG)
 
-            university_name = data.get("university_name", "").replace("_cache", "").strip()
-            university_country = data.get("university_country", "")
-            number_of_semesters = len([key for key in data.keys() if key not in ["university_name", "university_country"]])
+    for entry in report:
+        if entry["status"] == "saved":
+            print(f"[INFO] Saved {entry['university_name']} to database ({entry['prepare_seconds']}s prepare, {entry['write_seconds']}s write).")
+        else:
+            print(f"[WARNING] Skipping {entry['file']}: {entry['error']}")
 
-            if not university_name or not university_country:
-                print(f"[WARNING] Skipping {json_file}: Missing university name or country.")
-                continue  
-
-            write_to_database(data, DB_CONFIG, university_name, university_country, number_of_semesters)
-            print(f"[INFO] Saved {university_name} to database.")
-
-        except json.JSONDecodeError:
-            print(f"[ERROR] Failed to parse {json_file}. Skipping.")
-            continue
-
-    return {"message": "All valid university data saved to the database successfully."}
+    saved = sum(1 for entry in report if entry["status"] == "saved")
+    database_errors = [entry["error"] for entry in report if entry.get("error", "").startswith("Database error")]
+    if not saved and database_errors:
+        raise HTTPException(status_code=500, detail=f"Database connection failed. {database_errors[0]}")
+    return {
+        "message": f"{saved} of {len(report)} university files saved to the database.",
+        "total_seconds": round(time.perf_counter() - started, 3),
+        "universities": report,
+    }
 
 @app.post("/crawl", summary="Start a web crawl")
 def crawl_university(request: CrawlRequest):
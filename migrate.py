@@ -0,0 +1,169 @@
+import os
+import re
+import sys
+import hashlib
+
+import mysql.connector
+
+import db_pool
+import skills
+import database
+import skill_counts
+from config import DB_CONFIG, MIGRATIONS_DIR
+
+# Versioned schema migrations: migrations/NNNN_description.sql files, applied in order and recorded
+# in schema_migrations. Run `python migrate.py` to apply, `python migrate.py status` to list them and
+# `python migrate.py check` to EXPLAIN the hot queries.
+
+migration_file_regex = re.compile(r'^(\d{4})_(\w+)\.sql$')
+# Directives in a migration's comments: '-- destructive' keeps it out of startup runs, and each
+# '-- check-zero: <query>' must return 0 before any of its statements run.
+destructive_regex = re.compile(r'^\s*--\s*destructive\b', re.MULTILINE)
+check_zero_regex = re.compile(r'^\s*--\s*check-zero:\s*(.+)$', re.MULTILINE)
+
+SCHEMA_MIGRATIONS_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        version VARCHAR(16) PRIMARY KEY,
+        name VARCHAR(255) NOT NULL,
+        checksum CHAR(64) NOT NULL,
+        applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+# Queries on the request path, imported from the code that runs them, with sample parameters.
+# Each must be served through an index. Templates with {placeholders} get one %s per sample value.
+SAMPLE_SKILL_URL = "http://data.europa.eu/esco/skill/00000000-0000-0000-0000-000000000000"
+HOT_QUERIES = {
+    "search_courses_by_skill_url": (skills.SKILL_URL_QUERY, (SAMPLE_SKILL_URL,)),
+    "match_skill_names": (skills.SKILL_FULLTEXT_QUERY, ('"databases"', "%databases%", 30)),
+    "match_skill_names_exact": (skills.SKILL_EXACT_QUERY, ("use databases",)),
+    "search_courses_by_skill_database": (skills.SKILL_LESSONS_QUERY.format(placeholders="%s, %s"), (1, 2)),
+    "get_universities_by_skills": (skills.UNIVERSITIES_BY_SKILLS_QUERY.format(placeholders="%s, %s"), ("use databases", "think critically")),
+    "get_top_skills": (skill_counts.TOP_SKILLS_UNIVERSITY_QUERY, ("University of Groningen", 20)),
+    "get_top_skills_country": (skill_counts.TOP_SKILLS_COUNTRY_QUERY, ("Netherlands", 20)),
+    "get_top_skills_all": (skill_counts.TOP_SKILLS_GLOBAL_QUERY, (20,)),
+    "get_top_skills_all_universities": (skill_counts.SKILL_UNIVERSITIES_QUERY.format(placeholders="%s, %s"), (1, 2)),
+    "get_university_id": (database.UNIVERSITY_ID_QUERY, ("University of Groningen", "Netherlands")),
+}
+
+
+def list_migrations(migrations_dir: str = None) -> list:
+    """Returns [(version, name, path)] for every migration file, in version order."""
+    migrations_dir = migrations_dir or MIGRATIONS_DIR
+    migrations = []
+    for filename in sorted(os.listdir(migrations_dir)):
+        match = migration_file_regex.match(filename)
+        if match:
+            migrations.append((match.group(1), match.group(2), os.path.join(migrations_dir, filename)))
+    return migrations
+
+
+def split_statements(sql: str) -> list:
+    """Splits a migration into statements, dropping '--' comment lines."""
+    lines = [line for line in sql.splitlines() if not line.strip().startswith('--')]
+    return [statement.strip() for statement in '\n'.join(lines).split(';') if statement.strip()]
+
+
+class MigrationCheckError(Exception):
+    """A migration's check-zero query found rows, so the migration was not applied."""
+
+
+def run_checks(cursor, sql: str, version: str):
+    for query in check_zero_regex.findall(sql):
+        cursor.execute(query.strip())
+        found = cursor.fetchone()[0]
+        if found:
+            raise MigrationCheckError(f"Migration {version} not applied: check found {found} rows: {query.strip()}")
+
+
+def applied_versions(cursor) -> set:
+    cursor.execute(SCHEMA_MIGRATIONS_TABLE)
+    cursor.execute("SELECT version FROM schema_migrations")
+    return {row[0] for row in cursor.fetchall()}
+
+
+def apply_migrations(db_config: dict = None, migrations_dir: str = None, destructive: bool = True) -> list:
+    """
+    Applies every migration not yet recorded in schema_migrations, in order, and returns their versions.
+    MySQL commits DDL implicitly, so each migration is recorded as soon as its statements have run.
+    With destructive=False, stops before the first migration marked '-- destructive'.
+    Raises MigrationCheckError (and stops) if a migration's check-zero query finds rows.
+    """
+    applied = []
+    with db_pool.connect(db_config or DB_CONFIG) as conn:
+        cursor = conn.cursor()
+        try:
+            done = applied_versions(cursor)
+            for version, name, path in list_migrations(migrations_dir):
+                if version in done:
+                    continue
+                with open(path, 'r', encoding='utf-8') as f:
+                    sql = f.read()
+                if not destructive and destructive_regex.search(sql):
+                    print(f"[WARNING] Migration {version}_{name} is destructive and was not applied; run `python migrate.py`")
+                    break
+                run_checks(cursor, sql, version)
+                print(f"[INFO] Applying migration {version}_{name}...")
+                for statement in split_statements(sql):
+                    cursor.execute(statement)
+                cursor.execute(
+                    "INSERT INTO schema_migrations (version, name, checksum) VALUES (%s, %s, %s)",
+                    (version, name, hashlib.sha256(sql.encode('utf-8')).hexdigest()),
+                )
+                conn.commit()
+                applied.append(version)
+        finally:
+            cursor.close()
+    if applied:
+        print(f"[INFO] Applied {len(applied)} migrations, schema is at version {applied[-1]}")
+    return applied
+
+
+def full_scans(cursor) -> dict:
+    """
+    EXPLAINs every hot query and returns {query name: tables} for tables read by a full scan,
+    whether or not the optimizer had a candidate index (possible_keys) it chose not to use.
+    """
+    regressions = {}
+    for query_name, (query, params) in HOT_QUERIES.items():
+        cursor.execute("EXPLAIN " + query, params)
+        columns = [column[0] for column in cursor.description]
+        for row in cursor.fetchall():
+            plan = dict(zip(columns, row))
+            if plan.get("type") == "ALL":
+                regressions.setdefault(query_name, []).append(plan.get("table"))
+    return regressions
+
+
+def migration_status(db_config: dict = None) -> list:
+    with db_pool.connect(db_config or DB_CONFIG) as conn:
+        cursor = conn.cursor()
+        try:
+            done = applied_versions(cursor)
+        finally:
+            cursor.close()
+    return [{"version": version, "name": name, "applied": version in done} for version, name, _ in list_migrations()]
+
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "apply"
+    try:
+        if command == "status":
+            for migration in migration_status():
+                print(f"{migration['version']} {migration['name']}: {'applied' if migration['applied'] else 'pending'}")
+        elif command == "check":
+            with db_pool.connect(DB_CONFIG) as conn:
+                cursor = conn.cursor()
+                regressions = full_scans(cursor)
+                cursor.close()
+            for query_name, tables in regressions.items():
+                print(f"[ERROR] {query_name} scans {', '.join(tables)} without an index")
+            sys.exit(1 if regressions else 0)
+        else:
+            apply_migrations()
+    except mysql.connector.Error as e:
+        print(f"❌ Database Error: {e}")
+        sys.exit(1)
+    except MigrationCheckError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
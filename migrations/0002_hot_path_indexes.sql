@@ -0,0 +1,14 @@
+-- Indexes for the search and aggregation queries in skills.py, main.py and database.py.
+
+-- get_university_id and every "WHERE u.university_name = ..." lookup
+CREATE INDEX idx_university_name_country ON University (university_name, country);
+
+-- University -> lessons joins, and (semester, lesson) resolution in database.sync_university
+CREATE INDEX idx_lessons_university_semester ON Lessons (university_id, semester, lesson_name);
+
+-- search_courses_by_skill_url: skill_url is TEXT, so it gets a prefix index (ESCO URLs are far shorter)
+CREATE INDEX idx_skills_skill_url ON Skills (skill_url(255));
+
+-- get_universities_by_skills (skill_name IN ...) and the per-lesson skill joins
+CREATE INDEX idx_skills_skill_name ON Skills (skill_name);
+CREATE INDEX idx_skills_lesson_skill_name ON Skills (lesson_id, skill_name);
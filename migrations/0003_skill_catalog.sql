@@ -0,0 +1,33 @@
+-- Normalised skills: one SkillCatalog row per ESCO skill URL and a narrow LessonSkill join table,
+-- replacing Skills, which repeated the name and TEXT url for every lesson with the skill.
+-- Skills itself is only dropped by 0007, once its rows are verified to have been copied.
+
+CREATE TABLE IF NOT EXISTS SkillCatalog (
+    skill_id INT AUTO_INCREMENT PRIMARY KEY,
+    url_hash BINARY(32) NOT NULL,
+    url VARCHAR(512) NOT NULL,
+    name VARCHAR(255),
+    UNIQUE KEY uq_skillcatalog_url_hash (url_hash),
+    KEY idx_skillcatalog_name (name)
+);
+
+CREATE TABLE IF NOT EXISTS LessonSkill (
+    lesson_id INT NOT NULL,
+    skill_id INT NOT NULL,
+    PRIMARY KEY (lesson_id, skill_id),
+    KEY idx_lessonskill_skill_lesson (skill_id, lesson_id),
+    FOREIGN KEY (lesson_id) REFERENCES Lessons(lesson_id) ON DELETE CASCADE,
+    FOREIGN KEY (skill_id) REFERENCES SkillCatalog(skill_id) ON DELETE CASCADE
+);
+
+-- One-shot copy of the existing rows; a known name wins over 'Unknown Skill'.
+INSERT INTO SkillCatalog (url_hash, url, name)
+SELECT UNHEX(SHA2(skill_url, 256)), skill_url, COALESCE(MAX(NULLIF(skill_name, 'Unknown Skill')), 'Unknown Skill')
+FROM Skills
+GROUP BY skill_url;
+
+INSERT IGNORE INTO LessonSkill (lesson_id, skill_id)
+SELECT s.lesson_id, c.skill_id
+FROM Skills s
+JOIN SkillCatalog c ON c.url_hash = UNHEX(SHA2(s.skill_url, 256))
+WHERE s.lesson_id IS NOT NULL;
@@ -0,0 +1,4 @@
+-- Content hash of each lesson (description plus its skill set), so a sync from the JSON cache
+-- can tell unchanged lessons apart without rewriting them. NULL for rows written before this.
+
+ALTER TABLE Lessons ADD COLUMN content_hash CHAR(64) NULL;
@@ -0,0 +1,50 @@
+-- Skill frequency aggregates for the top-skills endpoints, kept up to date by database.write_to_database
+-- (skill_counts.refresh_university). lesson_count is the number of lessons teaching the skill.
+
+CREATE TABLE IF NOT EXISTS UniversitySkillCount (
+    university_id INT NOT NULL,
+    skill_id INT NOT NULL,
+    lesson_count INT NOT NULL,
+    PRIMARY KEY (university_id, skill_id),
+    KEY idx_universityskillcount_top (university_id, lesson_count),
+    KEY idx_universityskillcount_skill (skill_id, university_id),
+    FOREIGN KEY (university_id) REFERENCES University(university_id) ON DELETE CASCADE,
+    FOREIGN KEY (skill_id) REFERENCES SkillCatalog(skill_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS SkillCount (
+    skill_id INT NOT NULL PRIMARY KEY,
+    lesson_count INT NOT NULL,
+    university_count INT NOT NULL,
+    KEY idx_skillcount_top (lesson_count),
+    FOREIGN KEY (skill_id) REFERENCES SkillCatalog(skill_id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS CountrySkillCount (
+    country VARCHAR(100) NOT NULL,
+    skill_id INT NOT NULL,
+    lesson_count INT NOT NULL,
+    university_count INT NOT NULL,
+    PRIMARY KEY (country, skill_id),
+    KEY idx_countryskillcount_top (country, lesson_count),
+    FOREIGN KEY (skill_id) REFERENCES SkillCatalog(skill_id) ON DELETE CASCADE
+);
+
+-- Backfill from the lessons already stored.
+INSERT INTO UniversitySkillCount (university_id, skill_id, lesson_count)
+SELECT l.university_id, ls.skill_id, COUNT(*)
+FROM LessonSkill ls
+JOIN Lessons l ON ls.lesson_id = l.lesson_id
+WHERE l.university_id IS NOT NULL
+GROUP BY l.university_id, ls.skill_id;
+
+INSERT INTO SkillCount (skill_id, lesson_count, university_count)
+SELECT skill_id, SUM(lesson_count), COUNT(*)
+FROM UniversitySkillCount
+GROUP BY skill_id;
+
+INSERT INTO CountrySkillCount (country, skill_id, lesson_count, university_count)
+SELECT u.country, usc.skill_id, SUM(usc.lesson_count), COUNT(*)
+FROM UniversitySkillCount usc
+JOIN University u ON usc.university_id = u.university_id
+GROUP BY u.country, usc.skill_id;
@@ -0,0 +1,4 @@
+-- ngram FULLTEXT index for skill name search (skills.match_skill_names), replacing
+-- LOWER(name) LIKE '%...%' scans. Tokens are ngram_token_size characters long (2 by default).
+
+ALTER TABLE SkillCatalog ADD FULLTEXT INDEX ft_skillcatalog_name (name) WITH PARSER ngram;
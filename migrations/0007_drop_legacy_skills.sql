@@ -0,0 +1,6 @@
+-- Drops the legacy Skills table that 0003 copied into SkillCatalog/LessonSkill.
+-- destructive: not applied on API startup; run `python migrate.py` to apply it.
+-- check: every legacy row must have its LessonSkill link, otherwise nothing is dropped.
+-- check-zero: SELECT COUNT(*) FROM Skills s LEFT JOIN SkillCatalog c ON c.url_hash = UNHEX(SHA2(s.skill_url, 256)) LEFT JOIN LessonSkill ls ON ls.lesson_id = s.lesson_id AND ls.skill_id = c.skill_id WHERE s.lesson_id IS NOT NULL AND ls.lesson_id IS NULL
+
+DROP TABLE Skills;
@@ -4,25 +4,21 @@ import requests
 import re
 import glob
 import json
+import hashlib
 from thefuzz import fuzz, process
 from output import print_loading_line
-from helpers import is_cached, load_cache, save_cache, contains_no_lowercase_letters, clean_lesson_name, contains_greek_characters
+from helpers import load_cache, save_cache_entry, open_cache_stream, save_cache_stream, cache_key, file_hash, contains_no_lowercase_letters, clean_lesson_name, contains_greek_characters
 from output import print_colored_text, print_green_line
-import nltk
-from nltk.corpus import words
+from segmentation import segment_pages, merge_page_lessons, scan_markers
+from resources import get_valid_words
+from config import MARKER_SCAN_PAGES
 
 from concurrent.futures import ThreadPoolExecutor
 
-try:
-    nltk.data.find('corpora/words.zip')
-except LookupError:
-    nltk.download('words')
-
-valid_words = set(words.words())
-
 def contains_real_words(text):
     """Check if the text contains at least one valid English word."""
     word_list = text.split()
+    valid_words = get_valid_words()
     return any(word.lower() in valid_words for word in word_list)
 
 
@@ -44,101 +40,250 @@ def download_pdf(url: str, save_path: str) -> str:
 import fitz 
 from concurrent.futures import ThreadPoolExecutor
 
-def extract_text_from_pdf(pdf_file_path: str) -> list:
-    """Extracts text from a PDF file using PyMuPDF, with caching."""
-    cache_key = f"text_{pdf_file_path}"
-    if is_cached(cache_key):
-        print(f"[CACHE] Loading text from cache for {pdf_file_path}")
-        print_loading_line(25)
-        return load_cache()[cache_key]
+class PDFReadError(Exception):
+    """A PDF could not be opened or one of its pages could not be decoded."""
 
-    print(f"[INFO] Extracting text from PDF: {pdf_file_path}")
-    print_loading_line(25)
 
-    page_texts = []
-    
+def _read_pdf_pages(pdf_file_path: str):
+    """Decodes pages from PyMuPDF one at a time; raises PDFReadError if the file cannot be read."""
     try:
-        doc = fitz.open(pdf_file_path) 
-
-        def extract_page_text(page_num):
-            """Extract text from a single page."""
-            text = doc[page_num].get_text("text") or ""
+        doc = fitz.open(pdf_file_path)
+    except Exception as e:
+        print(f"[ERROR] ❌ Failed to extract text from PDF: {e}")
+        raise PDFReadError(f"Failed to open {pdf_file_path}: {e}") from e
+
+    page_count = 0
+    with doc:
+        for page_num, page in enumerate(doc):
+            try:
+                text = page.get_text("text") or ""
+            except Exception as e:
+                print(f"[ERROR] ❌ Failed to extract text from page {page_num + 1}: {e}")
+                raise PDFReadError(f"Failed to read page {page_num + 1} of {pdf_file_path}: {e}") from e
             print(f"[DEBUG] Extracted {len(text)} chars from page {page_num + 1}")
             if len(text.strip()) < 50:
                 print(f"[WARNING] Page {page_num + 1} might be empty or improperly read!")
-            return text
-
-        with ThreadPoolExecutor() as executor:
-            page_texts = list(executor.map(extract_page_text, range(len(doc))))
-
+            page_count += 1
+            yield text
+
+    print(f"[INFO] Successfully extracted text from {page_count} pages.")
+
+
+def iter_pdf_pages(pdf_file_path: str):
+    """
+    Lazily yields the text of each page of a PDF.
+    Pages come from the cache shard of this PDF's content if present, otherwise they are
+    decoded with PyMuPDF as they are requested and written to the cache as they go.
+    Raises PDFReadError for an unreadable PDF, which is never cached.
+    """
+    key = cache_key('text', file_hash(pdf_file_path))
+    cached_pages = open_cache_stream(key)
+    if cached_pages is not None:
+        print(f"[CACHE] Loading text from cache for {pdf_file_path}")
+        print_loading_line(25)
+        yield from cached_pages
+        return
 
-        cache = load_cache()
-        cache[cache_key] = page_texts
-        from skills import save_cache
-        save_cache(cache)
+    print(f"[INFO] Extracting text from PDF: {pdf_file_path}")
+    print_loading_line(25)
+    yield from save_cache_stream(key, _read_pdf_pages(pdf_file_path))
 
-        print(f"[INFO] Successfully extracted text from {len(page_texts)} pages.")
-        return page_texts
 
-    except Exception as e:
-        print(f"[ERROR] ❌ Failed to extract text from PDF: {e}")
-        return []
+def extract_text_from_pdf(pdf_file_path: str) -> list:
+    """Extracts text from a PDF file using PyMuPDF, with caching keyed by the PDF's content hash."""
+    return list(iter_pdf_pages(pdf_file_path))
 
 
 
 def extract_text_after_marker(text: list, markers: list) -> str:
-    cache_key = f"text_after_marker_{hash(''.join(markers))}"
-
-    if is_cached(cache_key):
-        print(f"Loading text after markers from cache.")
-        print_loading_line(25)
-        return load_cache()[cache_key]
-
     print_colored_text(f" >>> Extracting text after markers: {', '.join(markers)}", 34)
     full_text = '\n'.join(text)
-    for marker in markers:
-        marker_index = full_text.lower().find(marker.lower())
-        if marker_index != -1:
-            print_colored_text(f"Found marker: {marker}", 32)
-            extracted_text = full_text[marker_index + len(marker):]
-            return extracted_text.lstrip()
-    
+    scan = scan_markers(full_text, markers)
+    if scan.outline_markers:
+        rank = min(scan.outline_markers)
+        print_colored_text(f"Found marker: {markers[rank]}", 32)
+        return full_text[scan.outline_markers[rank][1]:].lstrip()
+
     print("No marker found in the text.")
     return full_text 
 
-def split_by_semester(text: str) -> list:
-    from skills import save_cache
-    cache_key = f"semesters_{hash(text)}"
-    if is_cached(cache_key):
+def split_by_semester(text: str, scan=None) -> list:
+    """
+    Splits text into semester/year sections and returns their (start, end) character offsets.
+    Each section runs from its header to the next header; repeated sections are dropped.
+    A MarkerScan already taken of this text can be passed in to skip scanning it again.
+    """
+    key = cache_key('semester_spans', text)
+    cached_spans = load_cache(key)
+    if cached_spans is not None:
         print(f"[CACHE] Loading semesters from cache")
-        return load_cache()[cache_key]
+        return [tuple(span) for span in cached_spans]
     
     print("[INFO] Splitting text by semester or year...")
     
     print(f"[DEBUG] First 500 chars of text:\n{text[:500]}\n---")
 
-    semesters = re.split(r'(?i)(\b(?:Year\s+(?:One|Two|Three|Four|1|2|3|4)|\d+\s*(?:st|nd|rd|th)?\s*Semester)\b)', text)
-    
-    combined_semesters = []
+    header_starts = (scan or scan_markers(text)).semester_headers
+    boundaries = header_starts + [len(text)]
+
+    semester_spans = []
     seen_semesters = set()
 
-    for i in range(1, len(semesters), 2):
-        semester = ''.join(semesters[i:i+2])
-        if semester.lower() not in seen_semesters:
-            combined_semesters.append(semester)
-            seen_semesters.add(semester.lower())
+    for start, end in zip(boundaries, boundaries[1:]):
+        semester = text[start:end].lower()
+        if semester not in seen_semesters:
+            semester_spans.append((start, end))
+            seen_semesters.add(semester)
 
-    print(f"[INFO] Found {len(combined_semesters)} semesters")
+    print(f"[INFO] Found {len(semester_spans)} semesters")
     
-    for i, sem in enumerate(combined_semesters, 1):
-        print(f"[DEBUG] Semester/Year {i}: {sem[:100]}...")
+    for i, (start, end) in enumerate(semester_spans, 1):
+        print(f"[DEBUG] Semester/Year {i}: {text[start:start + 100]}...")
 
-    cache = load_cache()
-    cache[cache_key] = combined_semesters
-    from skills import save_cache
-    save_cache(cache)
+    save_cache_entry(key, semester_spans)
     
-    return combined_semesters
+    return semester_spans
+
+
+def _scan_pages(pages, markers=()):
+    for page in pages:
+        yield page, scan_markers(page, markers)
+
+
+def iter_text_after_marker(pages, markers: list):
+    """
+    Streaming counterpart of extract_text_after_marker: yields the pages that follow the first
+    marker found (the page holding the marker is trimmed to the text after it).
+    Markers keep their priority order, so pages are only held back while a lower-priority
+    marker (or none) has been seen and a better one may still follow. At most MARKER_SCAN_PAGES
+    pages are held: past that the best marker seen so far (or the document start) is used.
+    """
+    for page, _ in _after_marker(_scan_pages(pages, markers), markers):
+        yield page
+
+
+def _after_marker(scanned_pages, markers: list):
+    best_rank = len(markers)
+    held_pages = []
+    streaming = False
+
+    for page, scan in scanned_pages:
+        if streaming:
+            yield page, scan
+            continue
+
+        found = [(rank, span) for rank, span in scan.outline_markers.items() if rank < best_rank]
+        if not found:
+            held_pages.append((page, scan))
+            if len(held_pages) > MARKER_SCAN_PAGES:
+                # Bounded look-ahead: stop waiting for a better marker and stream from here on.
+                streaming = True
+                yield from _committed_pages(held_pages, best_rank == len(markers))
+                held_pages = []
+            continue
+
+        best_rank, (_, marker_end) = min(found)
+        print_colored_text(f"Found marker: {markers[best_rank]}", 32)
+        held_pages = [(page[marker_end:], scan.shifted(marker_end))]
+        if best_rank == 0:
+            streaming = True
+            yield from _lstrip_pages(held_pages)
+            held_pages = []
+
+    if not streaming:
+        yield from _committed_pages(held_pages, best_rank == len(markers))
+
+
+def _committed_pages(held_pages, no_marker: bool):
+    if no_marker:
+        print("No marker found in the text.")
+        return held_pages
+    return _lstrip_pages(held_pages)
+
+
+def _lstrip_pages(scanned_pages):
+    stripping = True
+    for page, scan in scanned_pages:
+        if stripping:
+            stripped = page.lstrip()
+            if not stripped:
+                continue
+            scan = scan.shifted(len(page) - len(stripped))
+            page = stripped
+            stripping = False
+        yield page, scan
+
+
+def iter_semesters(pages):
+    """
+    Streaming counterpart of split_by_semester: yields, for each distinct semester/year section,
+    the list of pages that lie entirely inside it. A section is emitted as soon as the next
+    header is seen, so only one section's pages are held in memory at a time.
+    """
+    yield from _semesters(_scan_pages(pages))
+
+
+def _semesters(scanned_pages):
+    current_pages = None
+    current_digest = None
+    seen_semesters = set()
+    semester_count = 0
+
+    def close_section():
+        nonlocal semester_count
+        if current_pages is None:
+            return None
+        digest = current_digest.hexdigest()
+        if digest in seen_semesters:
+            return None
+        seen_semesters.add(digest)
+        semester_count += 1
+        print(f"[DEBUG] Semester/Year {semester_count}: {len(current_pages)} pages")
+        return current_pages
+
+    for page_num, (page, scan) in enumerate(scanned_pages):
+        if page_num and current_digest is not None:
+            current_digest.update(b'\n')
+
+        header_starts = scan.semester_headers
+        if not header_starts:
+            if current_pages is not None:
+                current_pages.append(page)
+                current_digest.update(page.lower().encode('utf-8'))
+            continue
+
+        if current_digest is not None:
+            current_digest.update(page[:header_starts[0]].lower().encode('utf-8'))
+
+        boundaries = header_starts + [len(page)]
+        for section_start, section_end in zip(boundaries, boundaries[1:]):
+            finished = close_section()
+            if finished is not None:
+                yield finished
+            current_pages = []
+            current_digest = hashlib.sha256(page[section_start:section_end].lower().encode('utf-8'))
+
+        if header_starts == [0]:
+            current_pages.append(page)
+
+    finished = close_section()
+    if finished is not None:
+        yield finished
+
+    print(f"[INFO] Found {semester_count} semesters")
+
+
+def iter_semester_lessons(pdf_file_path: str, markers: list, pages=None):
+    """
+    Runs the streaming pipeline PDF pages -> marker -> semesters -> lessons, yielding
+    (semester_number, lessons) as soon as each semester is complete.
+    Each page is scanned for outline markers and semester headers once, in a single pass.
+    pages overrides the page source (defaults to iter_pdf_pages of the file).
+    """
+    pages = iter_pdf_pages(pdf_file_path) if pages is None else pages
+    scanned_pages = _scan_pages(pages, markers)
+    for semester_number, semester_pages in enumerate(_semesters(_after_marker(scanned_pages, markers)), 1):
+        yield semester_number, process_pages_by_lesson(semester_pages)
 
 
 def extract_description(text: str) -> str:
@@ -163,69 +308,13 @@ def extract_description(text: str) -> str:
     description = re.sub(r'(?i)course content', '', description).strip()
     return description if description else "This lesson has no data!"
 
-from concurrent.futures import ThreadPoolExecutor
-def process_pages_by_lesson(pages: list) -> dict:
+def process_pages_by_lesson(pages) -> dict:
+    """
+    Detects lessons page by page and merges them in page order, so the result never
+    depends on scheduling: when a title repeats, the later page wins.
+    """
     print("[INFO] Processing pages to extract lessons...")
-    lesson_dict = {}
-
-    def process_page(page_data):
-        page_num, page = page_data
-        print(f"[DEBUG] Processing page {page_num + 1}...")
-
-        lines = page.split('\n')
-        if not lines:
-            print(f"[WARNING] Page {page_num + 1} is empty, skipping...")
-            return None
-
-        potential_lesson_name = None
-        lesson_text = []
-        capture_text = False
-
-        for line in lines:
-            line = line.strip()
-
-            if line.isupper() and len(line.split()) > 0:
-                if potential_lesson_name:
-                    lesson_dict[potential_lesson_name] = '\n'.join(lesson_text).strip()
-                    print(f"[INFO] ✅ Stored lesson: {potential_lesson_name}")
-
-                potential_lesson_name = clean_lesson_name(line).strip()
-                print(f"[DEBUG] Detected lesson title: {potential_lesson_name}")
-
-                if re.search(r'[*_=!?\.]', potential_lesson_name) or (',' in potential_lesson_name and 'AND' not in potential_lesson_name.upper()):
-                    print(f"[DEBUG] Skipping '{potential_lesson_name}' (contains special characters or comma without AND)")
-                    potential_lesson_name = None
-                    continue
-                if re.match(r'^[a-zA-Z]+\d+$', potential_lesson_name):
-                    print(f"[DEBUG] Skipping '{potential_lesson_name}' (matches letter-number pattern)")
-                    potential_lesson_name = None
-                    continue
-                if len(potential_lesson_name) <= 3:
-                    print(f"[DEBUG] Skipping '{potential_lesson_name}' (too short)")
-                    potential_lesson_name = None
-                    continue
-                if re.match(r'^[^A-Za-z]', potential_lesson_name):
-                    print(f"[DEBUG] Skipping '{potential_lesson_name}' (starts with a symbol or number)")
-                    potential_lesson_name = None
-                    continue
-                if re.search(r'\bISBN\b|\bPUBLISHER\b|\d{4}', potential_lesson_name):
-                    print(f"[DEBUG] Skipping '{potential_lesson_name}' (likely a book or ISBN reference)")
-                    potential_lesson_name = None
-                    continue
-
-                capture_text = True
-                lesson_text = []
-
-            elif capture_text and potential_lesson_name:
-                lesson_text.append(line) 
-
-        if potential_lesson_name:
-            lesson_dict[potential_lesson_name] = '\n'.join(lesson_text).strip()
-            print(f"[INFO] ✅ Stored last lesson: {potential_lesson_name}")
-
-    with ThreadPoolExecutor() as executor:
-        results = executor.map(process_page, enumerate(pages))
-
+    lesson_dict = merge_page_lessons(segment_pages(pages))
     print(f"[INFO] Extracted {len(lesson_dict)} lessons")
     return lesson_dict
 
@@ -0,0 +1,49 @@
+import threading
+
+from config import SKILL_THRESHOLD
+
+# Heavy shared resources, built once per process on first use (or by warm_up).
+# Nothing here is loaded at import time, so importing the API or CLI stays cheap.
+
+_lock = threading.Lock()
+_skill_extractor = None
+_valid_words = None
+
+
+def get_skill_extractor():
+    """Returns the shared SkillExtractor, loading the ESCO model and embeddings on first use."""
+    global _skill_extractor
+    if _skill_extractor is None:
+        with _lock:
+            if _skill_extractor is None:
+                from esco_skill_extractor import SkillExtractor
+                print("[INFO] Loading ESCO skill extractor...")
+                _skill_extractor = SkillExtractor(skills_threshold=SKILL_THRESHOLD)
+    return _skill_extractor
+
+
+def skill_threshold() -> float:
+    """Threshold the shared extractor runs (or will run) with, without loading it."""
+    return _skill_extractor.skills_threshold if _skill_extractor is not None else SKILL_THRESHOLD
+
+
+def get_valid_words() -> set:
+    """Returns the NLTK English word list as a set, downloading the corpus on first use if needed."""
+    global _valid_words
+    if _valid_words is None:
+        with _lock:
+            if _valid_words is None:
+                import nltk
+                from nltk.corpus import words
+                try:
+                    nltk.data.find('corpora/words.zip')
+                except LookupError:
+                    nltk.download('words')
+                _valid_words = set(words.words())
+    return _valid_words
+
+
+def warm_up():
+    """Loads every shared resource up front, e.g. at API startup."""
+    get_skill_extractor()
+    get_valid_words()
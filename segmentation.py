@@ -0,0 +1,139 @@
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+# Kept free of heavy imports: spawned ingestion workers import this module on start-up.
+
+special_characters_regex = re.compile(r'[*_=!?\.]')
+letter_number_regex = re.compile(r'^[a-zA-Z]+\d+$')
+leading_symbol_regex = re.compile(r'^[^A-Za-z]')
+book_reference_regex = re.compile(r'\bISBN\b|\bPUBLISHER\b|\d{4}')
+parenthesised_regex = re.compile(r'\s*\(.*?\)\s*')
+zero_width_regex = re.compile('[\u200b-\u200d\u2060\ufeff]')
+
+SEMESTER_HEADER_PATTERN = r'(?i:\b(?:Year\s+(?:One|Two|Three|Four|1|2|3|4)|\d+\s*(?:st|nd|rd|th)?\s*Semester)\b)'
+SECTION_MARKERS = ('General competences', 'Assessment')
+
+
+@dataclass
+class MarkerScan:
+    outline_markers: dict = field(default_factory=dict)   # marker rank -> (start, end) of its first occurrence
+    semester_headers: list = field(default_factory=list)  # start offsets of semester/year headers
+    sections: dict = field(default_factory=dict)          # section marker -> start offsets
+
+    def shifted(self, offset: int) -> 'MarkerScan':
+        """Re-bases the offsets onto text[offset:], dropping anything that fell before it."""
+        return MarkerScan(
+            {rank: (start - offset, end - offset) for rank, (start, end) in self.outline_markers.items() if start >= offset},
+            [start - offset for start in self.semester_headers if start >= offset],
+            {marker: [start - offset for start in starts if start >= offset] for marker, starts in self.sections.items()},
+        )
+
+
+@lru_cache(maxsize=None)
+def _marker_regex(outline_markers: tuple):
+    alternatives = [f"(?P<outline{rank}>(?i:{re.escape(marker)}))" for rank, marker in enumerate(outline_markers)]
+    alternatives.append(f"(?P<semester>{SEMESTER_HEADER_PATTERN})")
+    alternatives += [f"(?P<section{index}>{re.escape(marker)})" for index, marker in enumerate(SECTION_MARKERS)]
+    return re.compile('|'.join(alternatives))
+
+
+def scan_markers(text: str, outline_markers=()) -> MarkerScan:
+    """
+    Finds course-outline markers (case-insensitive), semester/year headers and the
+    case-sensitive section markers in a single pass over the text.
+    """
+    scan = MarkerScan(sections={marker: [] for marker in SECTION_MARKERS})
+    for match in _marker_regex(tuple(outline_markers)).finditer(text):
+        kind = match.lastgroup
+        if kind == 'semester':
+            scan.semester_headers.append(match.start())
+        elif kind.startswith('outline'):
+            scan.outline_markers.setdefault(int(kind[len('outline'):]), match.span())
+        else:
+            scan.sections[SECTION_MARKERS[int(kind[len('section'):])]].append(match.start())
+    return scan
+
+
+def clean_lesson_name(name: str) -> str:
+    return parenthesised_regex.sub('', zero_width_regex.sub('', name)).strip()
+
+
+def rejection_reason(title: str):
+    """Returns why an uppercase line cannot be a lesson title, or None if it can."""
+    if special_characters_regex.search(title) or (',' in title and 'AND' not in title.upper()):
+        return "contains special characters or comma without AND"
+    if letter_number_regex.match(title):
+        return "matches letter-number pattern"
+    if len(title) <= 3:
+        return "too short"
+    if leading_symbol_regex.match(title):
+        return "starts with a symbol or number"
+    if book_reference_regex.search(title):
+        return "likely a book or ISBN reference"
+    return None
+
+
+def segment_page(page_data) -> list:
+    """
+    Splits one page into (lesson title, lesson text) pairs, in the order they appear.
+    Pure function of the page text, so it can run in any worker process.
+    """
+    page_num, page = page_data
+    print(f"[DEBUG] Processing page {page_num + 1}...")
+
+    lines = page.split('\n')
+    if not lines:
+        print(f"[WARNING] Page {page_num + 1} is empty, skipping...")
+        return []
+
+    lessons = []
+    potential_lesson_name = None
+    lesson_text = []
+    capture_text = False
+
+    for line in lines:
+        line = line.strip()
+
+        if line.isupper() and len(line.split()) > 0:
+            if potential_lesson_name:
+                lessons.append((potential_lesson_name, '\n'.join(lesson_text).strip()))
+
+            potential_lesson_name = clean_lesson_name(line).strip()
+            print(f"[DEBUG] Detected lesson title: {potential_lesson_name}")
+
+            reason = rejection_reason(potential_lesson_name)
+            if reason:
+                print(f"[DEBUG] Skipping '{potential_lesson_name}' ({reason})")
+                potential_lesson_name = None
+                continue
+
+            capture_text = True
+            lesson_text = []
+
+        elif capture_text and potential_lesson_name:
+            lesson_text.append(line)
+
+    if potential_lesson_name:
+        lessons.append((potential_lesson_name, '\n'.join(lesson_text).strip()))
+
+    return lessons
+
+
+def segment_pages(pages) -> list:
+    """
+    Segments pages and returns the per-page results in page order.
+    Runs inline: the regex work per page is a few microseconds, less than pickling a page to another
+    process would cost. Ingestion scales with cores one PDF per process instead (ingest_all_pdfs).
+    """
+    return [segment_page(page_data) for page_data in enumerate(pages)]
+
+
+def merge_page_lessons(page_results: list) -> dict:
+    """Merges per-page lessons in page order; a title seen again later replaces the earlier text."""
+    lesson_dict = {}
+    for page_lessons in page_results:
+        for lesson_name, lesson_text in page_lessons:
+            lesson_dict[lesson_name] = lesson_text
+            print(f"[INFO] ✅ Stored lesson: {lesson_name}")
+    return lesson_dict
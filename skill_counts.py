@@ -0,0 +1,133 @@
+from config import DB_BATCH_SIZE
+
+# Maintained skill frequency aggregates (migration 0005): lessons teaching each skill per university,
+# per country and globally. refresh_university runs in the same transaction as a university's sync and
+# applies only the difference to its previous counts, so the top-N reads below never touch LessonSkill.
+
+# Names stored for skills whose ESCO label could not be resolved; never reported as a top skill.
+KNOWN_NAME_FILTER = "c.name IS NOT NULL AND c.name != '' AND c.name NOT LIKE 'Unknown%'"
+
+
+def _batches(rows: list, batch_size: int):
+    for start in range(0, len(rows), batch_size):
+        yield rows[start:start + batch_size]
+
+
+def count_deltas(old_counts: dict, new_counts: dict) -> list:
+    """
+    Returns [(skill_id, lesson_delta, university_delta)] for every skill whose count changed, sorted by
+    skill_id so concurrent refreshes lock the shared aggregate rows in the same order.
+    """
+    deltas = []
+    for skill_id in sorted(set(old_counts) | set(new_counts)):
+        old, new = old_counts.get(skill_id, 0), new_counts.get(skill_id, 0)
+        if old != new:
+            deltas.append((skill_id, new - old, (new > 0) - (old > 0)))
+    return deltas
+
+
+def refresh_university(cursor, university_id, country, batch_size=None) -> int:
+    """Recounts one university's skills and applies the changes to all three aggregates. Returns the number of skills changed."""
+    batch_size = batch_size or DB_BATCH_SIZE
+
+    cursor.execute("SELECT skill_id, lesson_count FROM UniversitySkillCount WHERE university_id = %s", (university_id,))
+    old_counts = dict(cursor.fetchall())
+    cursor.execute(
+        """SELECT ls.skill_id, COUNT(*)
+           FROM Lessons l
+           JOIN LessonSkill ls ON ls.lesson_id = l.lesson_id
+           WHERE l.university_id = %s
+           GROUP BY ls.skill_id""",
+        (university_id,),
+    )
+    new_counts = dict(cursor.fetchall())
+
+    deltas = count_deltas(old_counts, new_counts)
+    if not deltas:
+        return 0
+
+    removed = [skill_id for skill_id, _, _ in deltas if not new_counts.get(skill_id)]
+    for batch in _batches(removed, batch_size):
+        placeholders = ", ".join(["%s"] * len(batch))
+        cursor.execute(f"DELETE FROM UniversitySkillCount WHERE university_id = %s AND skill_id IN ({placeholders})", [university_id] + batch)
+
+    changed = [(university_id, skill_id, new_counts[skill_id]) for skill_id, _, _ in deltas if new_counts.get(skill_id)]
+    for batch in _batches(changed, batch_size):
+        cursor.executemany(
+            "INSERT INTO UniversitySkillCount (university_id, skill_id, lesson_count) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE lesson_count = VALUES(lesson_count)",
+            batch,
+        )
+
+    for batch in _batches(deltas, batch_size):
+        cursor.executemany(
+            "INSERT INTO SkillCount (skill_id, lesson_count, university_count) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE lesson_count = lesson_count + VALUES(lesson_count), "
+            "university_count = university_count + VALUES(university_count)",
+            batch,
+        )
+        cursor.executemany(
+            "INSERT INTO CountrySkillCount (country, skill_id, lesson_count, university_count) VALUES (%s, %s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE lesson_count = lesson_count + VALUES(lesson_count), "
+            "university_count = university_count + VALUES(university_count)",
+            [(country, skill_id, lesson_delta, university_delta) for skill_id, lesson_delta, university_delta in batch],
+        )
+
+    for batch in _batches([skill_id for skill_id, _, _ in deltas], batch_size):
+        placeholders = ", ".join(["%s"] * len(batch))
+        cursor.execute(f"DELETE FROM SkillCount WHERE lesson_count <= 0 AND skill_id IN ({placeholders})", batch)
+        cursor.execute(f"DELETE FROM CountrySkillCount WHERE country = %s AND lesson_count <= 0 AND skill_id IN ({placeholders})", [country] + batch)
+    return len(deltas)
+
+
+TOP_SKILLS_UNIVERSITY_QUERY = f"""SELECT c.name AS skill, usc.lesson_count AS frequency
+           FROM University u
+           JOIN UniversitySkillCount usc ON usc.university_id = u.university_id
+           JOIN SkillCatalog c ON c.skill_id = usc.skill_id
+           WHERE u.university_name = %s AND {KNOWN_NAME_FILTER}
+           ORDER BY usc.lesson_count DESC
+           LIMIT %s"""
+TOP_SKILLS_COUNTRY_QUERY = f"""SELECT c.name AS skill, csc.lesson_count AS frequency, csc.university_count AS universities
+           FROM CountrySkillCount csc
+           JOIN SkillCatalog c ON c.skill_id = csc.skill_id
+           WHERE csc.country = %s AND {KNOWN_NAME_FILTER}
+           ORDER BY csc.lesson_count DESC
+           LIMIT %s"""
+TOP_SKILLS_GLOBAL_QUERY = f"""SELECT sc.skill_id, c.name AS skill, sc.lesson_count AS frequency
+           FROM SkillCount sc
+           JOIN SkillCatalog c ON c.skill_id = sc.skill_id
+           WHERE {KNOWN_NAME_FILTER}
+           ORDER BY sc.lesson_count DESC
+           LIMIT %s"""
+# {placeholders} is filled with one %s per skill id.
+SKILL_UNIVERSITIES_QUERY = """SELECT usc.skill_id, u.university_name
+           FROM UniversitySkillCount usc
+           JOIN University u ON u.university_id = usc.university_id
+           WHERE usc.skill_id IN ({placeholders})"""
+
+
+def top_skills_for_university(cursor, university_name: str, top_n: int) -> list:
+    cursor.execute(TOP_SKILLS_UNIVERSITY_QUERY, (university_name, top_n))
+    return cursor.fetchall()
+
+
+def top_skills_for_country(cursor, country: str, top_n: int) -> list:
+    cursor.execute(TOP_SKILLS_COUNTRY_QUERY, (country, top_n))
+    return cursor.fetchall()
+
+
+def top_skills_global(cursor, top_n: int) -> list:
+    """Top skills across every university, each with the names of the universities teaching it."""
+    cursor.execute(TOP_SKILLS_GLOBAL_QUERY, (top_n,))
+    top_skills = cursor.fetchall()
+    if not top_skills:
+        return []
+
+    placeholders = ", ".join(["%s"] * len(top_skills))
+    cursor.execute(SKILL_UNIVERSITIES_QUERY.format(placeholders=placeholders), [row["skill_id"] for row in top_skills])
+    universities = {}
+    for row in cursor.fetchall():
+        universities.setdefault(row["skill_id"], []).append(row["university_name"])
+
+    return [{"skill": row["skill"], "frequency": row["frequency"], "universities": universities.get(row["skill_id"], [])}
+            for row in top_skills]
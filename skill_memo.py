@@ -0,0 +1,84 @@
+import os
+import re
+import json
+import threading
+from collections import OrderedDict
+from importlib import metadata
+
+from config import SKILL_MEMO_MEMORY_ITEMS, SKILL_MEMO_MAX_MB
+from helpers import cache_key, load_cache, save_cache_entry, touch_cache_entry, trim_cache_namespace, cache_namespace_size
+
+# Memo of extraction results: an in-memory LRU in front of 'skills' shards on disk.
+# Keys cover the normalised description, the extractor version and its threshold,
+# so upgrading the extractor or changing the threshold never serves stale skills.
+
+NAMESPACE = 'skills'
+
+_memory = OrderedDict()
+_memory_lock = threading.Lock()
+_disk_bytes = None
+_disk_lock = threading.Lock()
+
+try:
+    EXTRACTOR_VERSION = metadata.version('esco-skill-extractor')
+except metadata.PackageNotFoundError:
+    EXTRACTOR_VERSION = 'unknown'
+
+_spaces_regex = re.compile(r'[ \u00a0]+')
+
+
+def normalise_description(description: str) -> str:
+    """
+    Drops whitespace differences the extractor cannot see: it splits sentences on newlines/tabs
+    and tokenizes the rest, so only runs of spaces, line-edge spaces and CRLF are folded.
+    """
+    lines = description.replace('\r\n', '\n').split('\n')
+    return '\n'.join(_spaces_regex.sub(' ', line).strip() for line in lines).strip()
+
+
+def memo_key(description: str, threshold) -> str:
+    return cache_key(NAMESPACE, f"{EXTRACTOR_VERSION}\0{threshold}\0{normalise_description(description)}")
+
+
+def get_skills(key: str):
+    """Returns the memoized skill URLs for a key, or None on a miss."""
+    with _memory_lock:
+        if key in _memory:
+            _memory.move_to_end(key)
+            return list(_memory[key])
+
+    skill_urls = load_cache(key)
+    if skill_urls is None:
+        return None
+    touch_cache_entry(key)
+    _remember(key, skill_urls)
+    return list(skill_urls)
+
+
+def put_skills(key: str, skill_urls: list):
+    global _disk_bytes
+    _remember(key, skill_urls)
+    save_cache_entry(key, skill_urls)
+
+    # Extraction workers write concurrently; the running size and the trim are updated under one lock.
+    with _disk_lock:
+        if _disk_bytes is None:
+            _disk_bytes = cache_namespace_size(NAMESPACE)
+        else:
+            _disk_bytes += len(json.dumps(skill_urls))
+        if _disk_bytes > SKILL_MEMO_MAX_MB * 1024 * 1024:
+            # Trim to 90% so eviction does not run again on the very next write.
+            _disk_bytes = trim_cache_namespace(NAMESPACE, int(SKILL_MEMO_MAX_MB * 1024 * 1024 * 0.9))
+
+
+def _remember(key: str, skill_urls: list):
+    with _memory_lock:
+        _memory[key] = list(skill_urls)
+        _memory.move_to_end(key)
+        while len(_memory) > SKILL_MEMO_MEMORY_ITEMS:
+            _memory.popitem(last=False)
+
+
+def clear_memory():
+    with _memory_lock:
+        _memory.clear()
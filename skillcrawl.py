@@ -2,7 +2,6 @@ import pdfplumber
 import requests
 import re
 import sys
-from esco_skill_extractor import SkillExtractor
 from bs4 import BeautifulSoup
 import time
 from urllib.parse import quote_plus
@@ -15,14 +14,14 @@ import mysql.connector
 
 
 from database import write_to_database
-from pdf_utils import download_pdf, extract_text_from_pdf, extract_text_after_marker, process_pages_by_lesson, split_by_semester, get_pdf_path
+from pdf_utils import download_pdf, iter_semester_lessons, get_pdf_path
 from output import print_yellow_line, print_logo, print_horizontal_line, print_colored_text, print_horizontal_small_line, print_green_line, print_loading_line
 from menu import display_menu, parse_args 
-from skills import get_skills_for_lesson, extract_and_get_title, search_courses_by_skill
+from skills import get_skills_for_lesson, extract_and_get_title, get_skill_titles, search_courses_by_skill, extract_skills_by_key, lesson_description_text
+from universities import lookup_country
 from helpers import find_possible_university, load_from_cache, save_to_cache, load_university_cache, save_cache
 
 CACHE_DIR = 'cache'
-CACHE_FILE = 'pdf_cache.json'
 university_name = None
 university_country = None
 
@@ -30,11 +29,7 @@ os.makedirs(CACHE_DIR, exist_ok=True)
 
 import requests
 
-
-skill_extractor = SkillExtractor()
-
 UNI_FILE = "university_cache.json"
-UNIVERSITY_API = "http://universities.hipolabs.com/search?name="
 
 if os.path.exists(UNI_FILE):
     with open(UNI_FILE, "r") as f:
@@ -45,50 +40,22 @@ else:
 import requests
 import json
 def get_university_country(university_name):
+    """
+    Resolves a university's country from university_cache.json or the bundled university dataset.
+    Memoized and nothing is written here; nothing is fetched either unless UNIVERSITY_ONLINE_LOOKUP
+    is set, in which case names the dataset does not know are looked up on the Hipo API.
+    """
     # ✅ Ensure university_name is a string
     if not isinstance(university_name, str):
         print(f"⚠️ Invalid university_name type: {type(university_name)}. Expected str, got {university_name}")
         return "Unknown"
 
-    # ✅ Ensure university_cache is a dictionary
-    if not isinstance(university_cache, dict):
-        print("⚠️ university_cache is not a dictionary!")
-        return "Unknown"
-
     # ✅ Check if university exists in cache and has a country field
-    if university_name in university_cache and isinstance(university_cache[university_name], dict) and "country" in university_cache[university_name]:
-        return university_cache[university_name]["country"]
-
-    try:
-        response = requests.get(UNIVERSITY_API + university_name, timeout=5)  # Set a timeout
-        response.raise_for_status()  # Ensure the request was successful
-
-        # 🔥 Debugging: Print first 500 chars of response
-        print(f"🔍 API Response: {response.text[:500]}")  
+    cached = university_cache.get(university_name) if isinstance(university_cache, dict) else None
+    if isinstance(cached, dict) and cached.get("country", "Unknown") != "Unknown":
+        return cached["country"]
 
-        # ✅ Ensure the response is valid JSON
-        if not response.text.strip().startswith("{") and not response.text.strip().startswith("["):
-            print("⚠️ Invalid JSON format received from API")
-            return "Unknown"
-
-        # ✅ Attempt to parse JSON safely
-        try:
-            data = response.json()
-        except json.JSONDecodeError:
-            print("❌ Failed to parse JSON response")
-            return "Unknown"
-
-        # ✅ Check if response contains valid data
-        if data and isinstance(data, list) and len(data) > 0:
-            country = data[0].get("country", "Unknown")
-            university_cache[university_name] = {"name": university_name, "country": country}
-            save_cache()
-            return country
-
-    except requests.exceptions.RequestException as e:
-        print(f"❌ API Request failed: {e}")
-
-    return "Unknown"
+    return lookup_country(university_name)
 
 
 
@@ -128,30 +95,25 @@ def main(pdf_file_path: str, simplified: bool, skills: bool, show_descr: bool, s
         all_data = cached_data
     else:
         print(f"No cache found for {university_name}. Processing PDF...")
-        pages = extract_text_from_pdf(pdf_file_path)
         university_name = find_possible_university(pdf_file_path)
         marker = ['Course Outlines', 'Course Content']
-        text_after_marker = extract_text_after_marker(pages, marker)
-
-        semesters = split_by_semester(text_after_marker)
 
         all_data = {}
-        for i, semester_text in enumerate(semesters, 1):
-            lessons = process_pages_by_lesson([page for page in pages if page in semester_text])
+        for i, lessons in iter_semester_lessons(pdf_file_path, marker):
             lesson_count = len(lessons)
             all_data[f'Semester {i} ({lesson_count} lessons)'] = lessons
 
+        lesson_skill_urls = extract_skills_by_key({
+            (semester, lesson): description
+            for semester, lessons in all_data.items()
+            for lesson, description in lessons.items()
+        })
+
         for semester, lessons in all_data.items():
             for lesson, description in lessons.items():
-                skills_list = skill_extractor.get_skills([description])
-                filtered_skills = set()
-                for skill_set in skills_list:
-                    for skill_url in skill_set:
-                        filtered_skills.add(skill_url)
-
                 all_data[semester][lesson] = {
                     "description": description,
-                    "skills": list(filtered_skills),
+                    "skills": lesson_skill_urls[(semester, lesson)],
                 }
         save_to_cache(university_name, all_data)
                         
@@ -177,7 +139,7 @@ def main(pdf_file_path: str, simplified: bool, skills: bool, show_descr: bool, s
         elif skillname:
             get_skills_for_lesson(university_name, all_data, lesson_name, skills=False, skillname=True)
         elif skillsearch:
-            search_courses_by_skill(all_data, lesson_name, skill_extractor, db_config, university_name)
+            search_courses_by_skill(all_data, lesson_name, None, db_config, university_name)
         else:
             print(f"Invalid command format. Use 'skills' or 'skillname' followed by lesson name, or 'skillsearch' followed by skill.")
     else:
@@ -196,6 +158,14 @@ def main(pdf_file_path: str, simplified: bool, skills: bool, show_descr: bool, s
                         print_colored_text(f'    {description}', "32")
                     print_horizontal_small_line(25)
         elif skills:
+            lesson_skill_urls = extract_skills_by_key({
+                (semester, lesson_name): lesson_description_text(lesson_data)
+                for semester, lessons in all_data.items() if isinstance(lessons, dict)
+                for lesson_name, lesson_data in lessons.items()
+                if not ((cached_data or {}).get(semester, {}).get(lesson_name, {}).get("skills")
+                        and (cached_data or {}).get(semester, {}).get(lesson_name, {}).get("skill_names"))
+            })
+
             for semester, lessons in all_data.items():
                 print_horizontal_line(50)
                 print_colored_text(f'{semester}:', 33)
@@ -222,14 +192,16 @@ def main(pdf_file_path: str, simplified: bool, skills: bool, show_descr: bool, s
                         lesson_description = lesson_description.get("text", "")
 
                     if isinstance(lesson_description, str):
-                        skills_list = skill_extractor.get_skills([lesson_description])
+                        skills_list = [lesson_skill_urls.get((semester, lesson_name), [])]
                         filtered_skills = set()
                         filtered_skill_names = set()
 
+                        skill_titles = get_skill_titles(url for skill_set in skills_list for url in skill_set)
+
                         for skill_set in skills_list:
                             for skill_url in skill_set:
                                 filtered_skills.add(skill_url)
-                                skill_name = extract_and_get_title(skill_url)
+                                skill_name = skill_titles.get(skill_url)
                                 if skill_name:
                                     filtered_skill_names.add(skill_name)
 
@@ -254,6 +226,12 @@ def main(pdf_file_path: str, simplified: bool, skills: bool, show_descr: bool, s
             print_horizontal_small_line(25)
 
         elif skillname:
+            lesson_skill_urls = extract_skills_by_key({
+                (semester, lesson_name): lesson_description_text(lesson_data)
+                for semester, lessons in all_data.items() if isinstance(lessons, dict)
+                for lesson_name, lesson_data in lessons.items()
+            })
+
             for semester, lessons in all_data.items():
                 print_horizontal_line(50)
                 print_colored_text(f'{semester}:', 33)
@@ -273,17 +251,18 @@ def main(pdf_file_path: str, simplified: bool, skills: bool, show_descr: bool, s
                         lesson_description = lesson_description.get("text", "")
 
                     if isinstance(lesson_description, str):
-                        skills_list = skill_extractor.get_skills([lesson_description])
+                        skills_list = [lesson_skill_urls.get((semester, lesson_name), [])]
                         filtered_skills = set()
                         filtered_skill_names = set()
                         print_green_line(35)
+                        skill_titles = get_skill_titles(url for skill_set in skills_list for url in skill_set)
 
                         for skill_set in skills_list:
                             for skill_url in skill_set:
                                 filtered_skills.add(skill_url)
 
                         # Extract skill name and save immediately if not in cache
-                                skill_name = extract_and_get_title(skill_url)
+                                skill_name = skill_titles.get(skill_url)
                                 if skill_name and skill_name not in cached_skill_names:
                                     
                                     cached_skill_names.add(skill_name)
@@ -356,7 +335,32 @@ def main(pdf_file_path: str, simplified: bool, skills: bool, show_descr: bool, s
 
     
 
+def ingest_all(workers: int = None):
+    """Processes every PDF in the curriculum folder in parallel and prints per-file timings."""
+    from ingest import ingest_all_pdfs
+
+    report = ingest_all_pdfs(workers=workers)
+    print_horizontal_line(50)
+    for file_report in report["files"]:
+        if file_report["status"] == "ok":
+            print_colored_text(f"{file_report['filename']}: {file_report['lessons']} lessons in {file_report['semesters']} semesters ({file_report['seconds']}s)", 32)
+        elif file_report["status"] == "unchanged":
+            print_colored_text(f"{file_report['filename']}: unchanged, {file_report['lessons']} cached lessons ({file_report['seconds']}s)", 33)
+        else:
+            print_colored_text(f"{file_report['filename']}: failed ({file_report['error']}) after {file_report['seconds']}s", 31)
+    print_horizontal_line(50)
+    print(f"Processed {len(report['files'])} PDFs with {report['workers']} workers in {report['total_seconds']}s")
+
+
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "ingest":
+        ingest_all(int(sys.argv[2]) if len(sys.argv) > 2 else None)
+        sys.exit(0)
+    if len(sys.argv) > 1 and sys.argv[1] == "esco-index":
+        from esco_labels import build_label_index
+        build_label_index(*sys.argv[2:3])
+        sys.exit(0)
+
     pdf_file_path = get_pdf_path() # Get the PDF path from the user
     if pdf_file_path in university_cache:
         university_data = university_cache[pdf_file_path]
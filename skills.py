@@ -1,13 +1,67 @@
+import re
 import json
+import threading
 import requests
-from esco_skill_extractor import SkillExtractor
 import mysql.connector
 from fuzzywuzzy import fuzz, process
 from helpers import load_from_cache, save_to_cache, load_university_cache
+from config import SKILL_BATCH_SIZE, SKILL_SEARCH_NGRAM_SIZE
+from resources import get_skill_extractor, skill_threshold
+import skill_memo
+import esco_labels
+import label_resolver
+import db_pool
 from output import print_colored_text, print_horizontal_line, print_loading_line, print_horizontal_small_line, print_green_line
 import os
 
-skill_extractor = SkillExtractor()
+def lesson_description_text(lesson_data) -> str:
+    """Returns a lesson's description as plain text ('' if it has none)."""
+    description = lesson_data.get("description", "") if isinstance(lesson_data, dict) else lesson_data
+    if isinstance(description, dict):
+        description = description.get("text", "")
+    return description if isinstance(description, str) else ""
+
+
+_extract_lock = threading.Lock()
+
+
+def extract_skills_batch(descriptions: list, batch_size: int = None, extractor=None) -> list:
+    """
+    Runs descriptions through the ESCO extractor SKILL_BATCH_SIZE at a time and returns the
+    skill URLs found in each one, in input order. Identical descriptions are only embedded once,
+    and descriptions already in the skill memo are not embedded at all (nor is the model loaded).
+    """
+    batch_size = batch_size or SKILL_BATCH_SIZE
+    threshold = extractor.skills_threshold if extractor is not None else skill_threshold()
+    unique_descriptions = list(dict.fromkeys(d for d in descriptions if isinstance(d, str) and d.strip()))
+
+    skills_by_description = {}
+    memo_keys = {}
+    for description in unique_descriptions:
+        memo_keys[description] = skill_memo.memo_key(description, threshold)
+        memoized = skill_memo.get_skills(memo_keys[description])
+        if memoized is not None:
+            skills_by_description[description] = memoized
+
+    pending = [d for d in unique_descriptions if d not in skills_by_description]
+    if pending:
+        extractor = extractor or get_skill_extractor()
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        with _extract_lock:  # one model shared by every thread; batches already keep it busy
+            batch_skills = extractor.get_skills(batch)
+        for description, skill_urls in zip(batch, batch_skills):
+            skills_by_description[description] = list(dict.fromkeys(skill_urls))
+            skill_memo.put_skills(memo_keys[description], skills_by_description[description])
+    if unique_descriptions:
+        print(f"[INFO] Skills for {len(unique_descriptions)} descriptions: {len(unique_descriptions) - len(pending)} memoized, {len(pending)} extracted in batches of {batch_size}")
+
+    return [list(skills_by_description.get(description, [])) for description in descriptions]
+
+
+def extract_skills_by_key(descriptions: dict, batch_size: int = None, extractor=None) -> dict:
+    """Batched extraction over a {key: description} mapping, returning {key: skill URLs}."""
+    return dict(zip(descriptions, extract_skills_batch(list(descriptions.values()), batch_size, extractor)))
 
 def list_available_cached_universities():
     """
@@ -17,21 +71,13 @@ def list_available_cached_universities():
     return list(university_cache.keys())
 
 
-CACHE_DIR = 'cache'
-CACHE_FILE = 'pdf_cache.json'
-
-def save_cache(data):
-    cache_file_path = os.path.join(CACHE_DIR, CACHE_FILE)
-    with open(cache_file_path, 'w') as cache_file:
-        json.dump(data, cache_file, indent=4)
-
-
 from mysql.connector import Error
 
 def get_skills_for_lesson(university_name, all_data, lesson_name=None, skillname=True, db_config=None):
     results = {}
+    connection = cursor = None
     try:
-        connection = mysql.connector.connect(**db_config)
+        connection = db_pool.connect(db_config)
         cursor = connection.cursor(dictionary=True)
 
         cursor.execute("SELECT university_name FROM University")
@@ -47,8 +93,9 @@ def get_skills_for_lesson(university_name, all_data, lesson_name=None, skillname
         if university_name and lesson_name:
             # Case 1: Specific university and lesson
             query = """
-                SELECT u.university_name, l.lesson_name, s.skill_name FROM Skills s
-                JOIN Lessons l ON s.lesson_id = l.lesson_id
+                SELECT u.university_name, l.lesson_name, c.name AS skill_name FROM LessonSkill ls
+                JOIN SkillCatalog c ON ls.skill_id = c.skill_id
+                JOIN Lessons l ON ls.lesson_id = l.lesson_id
                 JOIN University u ON l.university_id = u.university_id
                 WHERE u.university_name LIKE %s AND l.lesson_name LIKE %s
             """
@@ -57,8 +104,9 @@ def get_skills_for_lesson(university_name, all_data, lesson_name=None, skillname
         elif lesson_name:
             # Case 2: Any university, specific lesson
             query = """
-                SELECT u.university_name, l.lesson_name, s.skill_name FROM Skills s
-                JOIN Lessons l ON s.lesson_id = l.lesson_id
+                SELECT u.university_name, l.lesson_name, c.name AS skill_name FROM LessonSkill ls
+                JOIN SkillCatalog c ON ls.skill_id = c.skill_id
+                JOIN Lessons l ON ls.lesson_id = l.lesson_id
                 JOIN University u ON l.university_id = u.university_id
                 WHERE l.lesson_name LIKE %s 
             """
@@ -67,8 +115,9 @@ def get_skills_for_lesson(university_name, all_data, lesson_name=None, skillname
         elif university_name:
             # Case 4: Specific university, all lessons
             query = """
-                SELECT u.university_name, l.lesson_name, s.skill_name FROM Skills s
-                JOIN Lessons l ON s.lesson_id = l.lesson_id
+                SELECT u.university_name, l.lesson_name, c.name AS skill_name FROM LessonSkill ls
+                JOIN SkillCatalog c ON ls.skill_id = c.skill_id
+                JOIN Lessons l ON ls.lesson_id = l.lesson_id
                 JOIN University u ON l.university_id = u.university_id
                 WHERE u.university_name LIKE %s
             """
@@ -77,8 +126,9 @@ def get_skills_for_lesson(university_name, all_data, lesson_name=None, skillname
         else:
             # Case 3: All universities, all lessons
             query = """
-                SELECT u.university_name, l.lesson_name, s.skill_name FROM Skills s
-                JOIN Lessons l ON s.lesson_id = l.lesson_id
+                SELECT u.university_name, l.lesson_name, c.name AS skill_name FROM LessonSkill ls
+                JOIN SkillCatalog c ON ls.skill_id = c.skill_id
+                JOIN Lessons l ON ls.lesson_id = l.lesson_id
                 JOIN University u ON l.university_id = u.university_id
             """
             cursor.execute(query)
@@ -109,30 +159,119 @@ def get_skills_for_lesson(university_name, all_data, lesson_name=None, skillname
     return results
 
 
+ESCO_SKILL_PREFIX = "http://data.europa.eu/esco/skill/"
+
+
+def get_skill_titles(skill_urls) -> dict:
+    """
+    Resolves many skill URLs to their ESCO preferred labels, {url: label or None}.
+    Everything in the offline label index comes from one local query; only URLs
+    missing from it go through the (cached, pooled) ESCO API resolver.
+    """
+    skill_urls = [url for url in dict.fromkeys(skill_urls) if isinstance(url, str) and url.startswith(ESCO_SKILL_PREFIX)]
+    titles = esco_labels.get_labels(skill_urls)
+    missing = [url for url in skill_urls if url not in titles]
+    if missing:
+        titles.update(label_resolver.resolve_labels(missing))
+    return titles
+
+
 def extract_and_get_title(skill_url):
     try:
-        if not skill_url.startswith("http://data.europa.eu/esco/skill/"):
+        if not skill_url.startswith(ESCO_SKILL_PREFIX):
             print("Invalid skill URL format.")
             return "Error: Invalid URL format"
-        skill_id = skill_url.split('/skill/')[1]
-
-        api_url = f"https://ec.europa.eu/esco/api/resource/skill?uri={skill_url}"
-        response = requests.get(api_url)
 
-        if response.status_code == 200:
-            data = response.json()
-            skill_title = data.get('preferredLabel', {}).get('en-us', None)
+        skill_title = esco_labels.get_label(skill_url)
+        if skill_title is not None:
             return skill_title
-        else:
-            return None
+        return label_resolver.resolve_label(skill_url)
 
     except Exception as e:
         print(f"Error: {e}")
         return "Error: Exception occurred"
 
 
+def try_db_connection(db_config):
+    """Checks a connection out of the shared pool, or returns None if the database is unreachable."""
+    try:
+        return db_pool.connect(db_config)
+    except mysql.connector.Error:
+        return None
+
+
+SKILL_EXACT_QUERY = "SELECT skill_id, name FROM SkillCatalog WHERE name = %s"
+# The FULLTEXT phrase narrows the rows through the index; LIKE keeps the exact substring semantics.
+SKILL_FULLTEXT_QUERY = """SELECT skill_id, name FROM SkillCatalog
+           WHERE MATCH(name) AGAINST (%s IN BOOLEAN MODE) AND name LIKE %s AND CHAR_LENGTH(name) <= %s"""
+SKILL_LIKE_QUERY = "SELECT skill_id, name FROM SkillCatalog WHERE name LIKE %s AND CHAR_LENGTH(name) <= %s"
+# {placeholders} is filled with one %s per skill id / name.
+SKILL_LESSONS_QUERY = """SELECT u.university_name, l.semester, l.lesson_name, ls.skill_id
+           FROM LessonSkill ls
+           JOIN Lessons l ON ls.lesson_id = l.lesson_id
+           JOIN University u ON l.university_id = u.university_id
+           WHERE ls.skill_id IN ({placeholders})"""
+SKILL_URL_QUERY = """SELECT u.university_name, l.semester, l.lesson_name, c.name AS skill_name, c.url AS skill_url
+           FROM SkillCatalog c
+           JOIN LessonSkill ls ON ls.skill_id = c.skill_id
+           JOIN Lessons l ON ls.lesson_id = l.lesson_id
+           JOIN University u ON l.university_id = u.university_id
+           WHERE c.url_hash = UNHEX(SHA2(%s, 256))"""
+UNIVERSITIES_BY_SKILLS_QUERY = """SELECT u.university_name, l.lesson_name, c.name AS skill_name
+           FROM SkillCatalog c
+           JOIN LessonSkill ls ON ls.skill_id = c.skill_id
+           JOIN Lessons l ON ls.lesson_id = l.lesson_id
+           JOIN University u ON l.university_id = u.university_id
+           WHERE c.name IN ({placeholders})"""
+
+
+def _escape_like(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def max_name_length(search_skill: str, threshold) -> int:
+    """
+    Longest name that can still score threshold: fuzz.ratio is at most 2*len(a)/(len(a)+len(b)),
+    rounded, so longer names containing search_skill are never fetched.
+    """
+    return max(len(search_skill), int(len(search_skill) * (200 / max(threshold - 0.5, 1) - 1)))
+
+
+def match_skill_names(cursor, search_skill, threshold) -> dict:
+    """
+    Finds catalog skills whose name contains search_skill (the old LIKE '%...%' semantics, without
+    a cap on the candidates) and scores each candidate once with fuzz.ratio.
+    The ngram FULLTEXT index on SkillCatalog.name serves the lookup as a phrase search. The ngram parser
+    has no tokens for queries shorter than ngram_token_size word characters ("C++", "R"), so those,
+    and FULLTEXT searches that find nothing, use LIKE alone. Exact-name matches are always included.
+    Returns {skill_id: (name, score)} for the candidates scoring at least threshold. Needs a dictionary cursor.
+    """
+    cursor.execute(SKILL_EXACT_QUERY, (search_skill,))
+    candidates = {row["skill_id"]: row["name"] for row in cursor.fetchall()}
+
+    substring = f"%{_escape_like(search_skill)}%"
+    max_length = max_name_length(search_skill, threshold)
+    rows = []
+    if len(re.findall(r'\w', search_skill)) >= SKILL_SEARCH_NGRAM_SIZE:
+        phrase = '"' + search_skill.replace('"', ' ') + '"'
+        cursor.execute(SKILL_FULLTEXT_QUERY, (phrase, substring, max_length))
+        rows = cursor.fetchall()
+    if not rows:
+        cursor.execute(SKILL_LIKE_QUERY, (substring, max_length))
+        rows = cursor.fetchall()
+    for row in rows:
+        candidates.setdefault(row["skill_id"], row["name"])
+
+    search_skill = search_skill.lower()
+    matches = {}
+    for skill_id, name in candidates.items():
+        score = fuzz.ratio(search_skill, name.lower())
+        if score >= threshold:
+            matches[skill_id] = (name, score)
+    return matches
+
+
 def search_courses_by_skill(all_data, search_skill, skill_extractor, db_config, university_name, threshold=52, use_cache=True):
-    from database import is_database_connected 
     if not search_skill:
         print_colored_text("No skill provided for search.", 31)
         return []
@@ -142,33 +281,32 @@ def search_courses_by_skill(all_data, search_skill, skill_extractor, db_config,
 
     found_courses = []
 
-    if is_database_connected(db_config):
+    conn = try_db_connection(db_config)
+    if conn is not None:
         print_colored_text("Database connected. Fetching skills from database...", 32)
 
         try:
-            conn = mysql.connector.connect(**db_config)
             cursor = conn.cursor(dictionary=True)
 
-            query = """
-                SELECT semester, lesson_name, skill_name 
-                FROM skills 
-                WHERE LOWER(skill_name) LIKE %s
-            """
-            cursor.execute(query, (f"%{search_skill.lower()}%",))
+            matches = match_skill_names(cursor, search_skill, threshold)
 
-            results = cursor.fetchall()
-            cursor.close()
-            conn.close()
+            if matches:
+                placeholders = ", ".join(["%s"] * len(matches))
+                cursor.execute(SKILL_LESSONS_QUERY.format(placeholders=placeholders), list(matches))
 
-            for row in results:
-                similarity_score = fuzz.ratio(search_skill.lower(), row["skill_name"].lower())
-                if similarity_score >= threshold:
-                    found_courses.append((row["semester"], row["lesson_name"], row["skill_name"], similarity_score))
+                for row in cursor.fetchall():
+                    skill_name, similarity_score = matches[row["skill_id"]]
+                    found_courses.append((row["semester"], row["lesson_name"], skill_name, similarity_score))
+
+            cursor.close()
 
         except mysql.connector.Error as e:
             print_colored_text(f"Database error: {e}", 31)
             return []
 
+        finally:
+            conn.close()
+
     else:  # Database not connected
         print_colored_text("Database not connected. Using cache instead.", 33)
         print_horizontal_line(50)
@@ -176,6 +314,16 @@ def search_courses_by_skill(all_data, search_skill, skill_extractor, db_config,
         if cache is None:
             cache = {}
 
+        def needs_extraction(semester, lesson_name, lesson_data):
+            lesson_cache = cache.get(semester, {}).get(lesson_name, {})
+            return (not lesson_cache.get("skill_names") or not lesson_cache.get("skills")) and use_cache and lesson_data.get("description", "") != "This lesson has no data!"
+
+        lesson_skill_urls = extract_skills_by_key({
+            (semester, lesson_name): lesson_description_text(lesson_data)
+            for semester, lessons in all_data.items() if isinstance(lessons, dict)
+            for lesson_name, lesson_data in lessons.items() if needs_extraction(semester, lesson_name, lesson_data)
+        }, extractor=skill_extractor)
+
         for semester, lessons in all_data.items():
             for lesson_name, lesson_data in lessons.items():
                 lesson_cache = cache.get(semester, {}).get(lesson_name, {})
@@ -192,16 +340,18 @@ def search_courses_by_skill(all_data, search_skill, skill_extractor, db_config,
                         lesson_description = lesson_description.get("text", "")
 
                     if isinstance(lesson_description, str):
-                        skills_list = skill_extractor.get_skills([lesson_description])
+                        skills_list = [lesson_skill_urls.get((semester, lesson_name), [])]
                         new_lesson_skills = []  # List to maintain order
                         new_lesson_urls = []  # Set for skill URLs
 
 
+                        skill_titles = get_skill_titles(url for skill_set in skills_list for url in skill_set)
+
                         for skill_set in skills_list:
                             for skill_url in skill_set:
                                 if skill_url not in new_lesson_urls:
                                     new_lesson_urls.append(skill_url)  # Append to maintain order
-                                    skill_name = extract_and_get_title(skill_url)
+                                    skill_name = skill_titles.get(skill_url)
                                     if skill_name:
                                         new_lesson_skills.append(skill_name)  # Append to maintain order
 
@@ -260,9 +410,9 @@ def search_courses_by_skill(all_data, search_skill, skill_extractor, db_config,
 
 
 
-def search_courses_by_skill_database(search_skill, db_config, university_name=None, threshold=52):
+def search_courses_by_skill_database(search_skill, db_config, university_name=None, threshold=52, conn=None):
+    """conn: an already checked-out connection to use (and close) instead of checking one out."""
     from collections import Counter
-    from database import is_database_connected
     if not search_skill:
         print("No skill provided for search.")
         return {}
@@ -273,26 +423,22 @@ def search_courses_by_skill_database(search_skill, db_config, university_name=No
     found_courses = {}
     skill_frequency = Counter()
 
-    if not is_database_connected(db_config):
+    conn = conn or try_db_connection(db_config)
+    if conn is None:
         print("Database not connected. Unable to fetch results.")
         return {}
 
     print("Database connected. Fetching skills from database...")
 
+    cursor = conn.cursor(dictionary=True)
+    results = []
     try:
-        conn = mysql.connector.connect(**db_config)
-        cursor = conn.cursor(dictionary=True)
+        matches = match_skill_names(cursor, search_skill, threshold)
 
-        query = """
-            SELECT u.university_name, l.semester, l.lesson_name, s.skill_name 
-            FROM Skills s
-            JOIN Lessons l ON s.lesson_id = l.lesson_id
-            JOIN University u ON l.university_id = u.university_id
-            WHERE LOWER(s.skill_name) LIKE %s
-        """
-
-        cursor.execute(query, [f"%{search_skill.lower()}%"])
-        results = cursor.fetchall()
+        if matches:
+            placeholders = ", ".join(["%s"] * len(matches))
+            cursor.execute(SKILL_LESSONS_QUERY.format(placeholders=placeholders), list(matches))
+            results = cursor.fetchall()
 
     except mysql.connector.Error as e:
         print(f"Database error: {e}")
@@ -304,8 +450,8 @@ def search_courses_by_skill_database(search_skill, db_config, university_name=No
 
     if university_name:
         matched_universities = {
-            row["university_name"]: fuzz.ratio(university_name.lower(), row["university_name"].lower())
-            for row in results
+            name: fuzz.ratio(university_name.lower(), name.lower())
+            for name in {row["university_name"] for row in results}
         }
         matched_universities = {k: v for k, v in matched_universities.items() if v >= threshold}
 
@@ -321,23 +467,21 @@ def search_courses_by_skill_database(search_skill, db_config, university_name=No
         university = row["university_name"]
         semester = row["semester"]
         lesson = row["lesson_name"]
-        skill = row["skill_name"]
-
-        if fuzz.ratio(search_skill.lower(), skill.lower()) >= threshold:
-            skill_frequency[skill] += 1
-
-            if university not in found_courses:
-                found_courses[university] = {}
-            if semester not in found_courses[university]:
-                found_courses[university][semester] = {}
-            if lesson not in found_courses[university][semester]:
-                found_courses[university][semester][lesson] = []
-
-            found_courses[university][semester][lesson].append({
-                "skill": skill,
-                "score": fuzz.ratio(search_skill.lower(), skill.lower()),
-                "frequency": skill_frequency[skill]
-            })
+        skill, score = matches[row["skill_id"]]  # scored once per skill, not per row
+        skill_frequency[skill] += 1
+
+        if university not in found_courses:
+            found_courses[university] = {}
+        if semester not in found_courses[university]:
+            found_courses[university][semester] = {}
+        if lesson not in found_courses[university][semester]:
+            found_courses[university][semester][lesson] = []
+
+        found_courses[university][semester][lesson].append({
+            "skill": skill,
+            "score": score,
+            "frequency": skill_frequency[skill]
+        })
 
     if found_courses:
         print(found_courses)
@@ -348,9 +492,9 @@ def search_courses_by_skill_database(search_skill, db_config, university_name=No
     return found_courses
 
 
-def search_courses_by_skill_url(search_skill_url, db_config, university_name=None):
+def search_courses_by_skill_url(search_skill_url, db_config, university_name=None, conn=None):
+    """conn: an already checked-out connection to use (and close) instead of checking one out."""
     from collections import Counter
-    from database import is_database_connected
     import mysql.connector
 
     if not search_skill_url:
@@ -363,27 +507,16 @@ def search_courses_by_skill_url(search_skill_url, db_config, university_name=Non
     found_courses = {}
     skill_frequency = Counter()
 
-    if is_database_connected(db_config):
+    conn = conn or try_db_connection(db_config)
+    if conn is not None:
         print("Database connected. Fetching skills from database...")
 
         try:
-            conn = mysql.connector.connect(**db_config)
             cursor = conn.cursor(dictionary=True)
 
-            query = """
-                SELECT u.university_name, l.semester, l.lesson_name, s.skill_name, s.skill_url 
-                FROM Skills s
-                JOIN Lessons l ON s.lesson_id = l.lesson_id
-                JOIN University u ON l.university_id = u.university_id
-                WHERE s.skill_url = %s
-            """
-            
-            params = [search_skill_url]
-            
-            cursor.execute(query, params)
+            cursor.execute(SKILL_URL_QUERY, [search_skill_url])
             results = cursor.fetchall()
             cursor.close()
-            conn.close()
 
             if university_name:
                 results = [row for row in results if row["university_name"].lower() == university_name.lower()]
@@ -411,6 +544,9 @@ def search_courses_by_skill_url(search_skill_url, db_config, university_name=Non
         except mysql.connector.Error as e:
             print(f"Database error: {e}")
             return {}
+
+        finally:
+            conn.close()
     else:
         print("Database not connected. Unable to fetch results.")
         return {}
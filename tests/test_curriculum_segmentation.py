@@ -0,0 +1,49 @@
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import helpers
+from pdf_utils import iter_semester_lessons
+
+CURRICULUM_DIR = "curriculum"
+EXPECTED_PATH = "tests/json/segmented_lessons_expected.json"
+MARKERS = ["Course Outlines", "Course Content"]
+
+
+def description_digest(description) -> str:
+    return hashlib.sha1(json.dumps(description, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def segment_curriculum(pdf_name: str) -> list:
+    """[[semester_number, [[lesson, description digest], ...]], ...] as the streaming pipeline produces them."""
+    return [[semester_number, [[lesson, description_digest(description)] for lesson, description in lessons.items()]]
+            for semester_number, lessons in iter_semester_lessons(os.path.join(CURRICULUM_DIR, pdf_name), MARKERS)]
+
+
+@unittest.skipUnless(os.path.isdir(CURRICULUM_DIR), "curriculum PDFs not available")
+class TestCurriculumSegmentation(unittest.TestCase):
+    """Pins the semesters and lessons segmented from every shipped curriculum PDF, so refactors are output-neutral."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        patcher = patch("helpers.PDF_CACHE_DIR", self.tmp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        helpers._known_shards.clear()
+
+    def test_lessons_match_the_recorded_output(self):
+        with open(EXPECTED_PATH, "r", encoding="utf-8") as f:
+            expected = json.load(f)
+
+        self.assertEqual(sorted(expected), sorted(name for name in os.listdir(CURRICULUM_DIR) if name.endswith(".pdf")))
+        for pdf_name, semesters in expected.items():
+            with self.subTest(pdf=pdf_name):
+                self.assertEqual(segment_curriculum(pdf_name), semesters)
+
+
+if __name__ == "__main__":
+    unittest.main()
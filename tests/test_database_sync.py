@@ -0,0 +1,281 @@
+import os
+import json
+import time
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock, patch
+
+import mysql.connector
+from mysql.connector import errorcode
+
+import database
+import universities
+from database import sync_university, skill_url_hash, load_cache_files
+from universities import UniversityIndex
+
+
+class FakeCursor:
+    """A tiny in-memory stand-in for the Lessons, SkillCatalog and LessonSkill tables that counts writes."""
+
+    def __init__(self):
+        self.lessons = {}   # lesson_id -> [semester, lesson_name, description, content_hash, university_id]
+        self.catalog = {}   # url_hash -> [skill_id, url, name]
+        self.links = set()
+        self.writes = []
+        self._result = []
+
+    def executemany(self, query, rows):
+        self.writes.append((query.split()[0], len(rows)))
+        if "INTO Lessons" in query:
+            for name, semester, description, content_hash, university_id in rows:
+                self.lessons[len(self.lessons) + 100] = [semester, name, description, content_hash, university_id]
+        elif "SET semester" in query:
+            for new_label, university_id, old_label in rows:
+                for lesson in self.lessons.values():
+                    if lesson[4] == university_id and lesson[0] == old_label:
+                        lesson[0] = new_label
+        elif "UPDATE Lessons" in query:
+            for description, content_hash, lesson_id in rows:
+                self.lessons[lesson_id][2:4] = [description, content_hash]
+        elif "INTO SkillCatalog" in query:
+            for url_hash, url, name in rows:
+                if url_hash not in self.catalog:
+                    self.catalog[url_hash] = [len(self.catalog) + 1, url, name]
+                elif name != "Unknown Skill":
+                    self.catalog[url_hash][2] = name
+        else:
+            self.links.update(rows)
+
+    def execute(self, query, params=()):
+        if query.startswith("DELETE FROM Lessons"):
+            self.writes.append(("DELETE", len(params)))
+            for lesson_id in params:
+                del self.lessons[lesson_id]
+            self.links = {link for link in self.links if link[0] not in params}
+        elif query.startswith("DELETE FROM LessonSkill"):
+            self.writes.append(("DELETE", len(params)))
+            self.links = {link for link in self.links if link[0] not in params}
+        elif "FROM SkillCatalog" in query:
+            self._result = [tuple(self.catalog[url_hash][:2]) for url_hash in params if url_hash in self.catalog]
+        else:
+            rows = [(lesson_id, lesson[0], lesson[1], lesson[3]) for lesson_id, lesson in sorted(self.lessons.items()) if lesson[4] == params[0]]
+            self._result = rows if "content_hash" in query else [row[:3] for row in rows]
+
+    def fetchall(self):
+        return self._result
+
+    def stored_skills(self):
+        names = {skill_id: name for skill_id, _url, name in self.catalog.values()}
+        return {(self.lessons[lesson_id][1], names[skill_id]) for lesson_id, skill_id in self.links}
+
+
+LESSONS = [("LESSON A", "Semester 1", "text a"), ("LESSON B", "Semester 2", "text b")]
+SKILLS = [
+    ("Semester 1", "LESSON A", "use databases", "url/1"),
+    ("Semester 1", "LESSON A", "think critically", "url/2"),
+    ("Semester 2", "LESSON B", "use databases", "url/1"),
+]
+
+
+class TestDatabaseSync(unittest.TestCase):
+
+    def test_first_sync_inserts_everything_in_batches(self):
+        cursor = FakeCursor()
+
+        counts = sync_university(cursor, 7, LESSONS, SKILLS, batch_size=2)
+
+        self.assertEqual(counts, {"inserted": 2, "updated": 0, "deleted": 0, "unchanged": 0, "skills": 3})
+        self.assertEqual(cursor.writes, [("INSERT", 2), ("INSERT", 2), ("INSERT", 2), ("INSERT", 1)])
+        self.assertEqual(len(cursor.catalog), 2)
+        self.assertEqual(cursor.stored_skills(), {("LESSON A", "use databases"), ("LESSON A", "think critically"), ("LESSON B", "use databases")})
+
+    def test_unchanged_corpus_writes_nothing(self):
+        cursor = FakeCursor()
+        sync_university(cursor, 7, LESSONS, SKILLS)
+        cursor.writes.clear()
+
+        counts = sync_university(cursor, 7, LESSONS, SKILLS)
+
+        self.assertEqual(counts, {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 2, "skills": 0})
+        self.assertEqual(cursor.writes, [])
+
+    def test_only_changed_lessons_are_rewritten(self):
+        cursor = FakeCursor()
+        sync_university(cursor, 7, LESSONS, SKILLS)
+        cursor.writes.clear()
+
+        lessons = [("LESSON A", "Semester 1", "text a"), ("LESSON C", "Semester 3", "text c")]
+        skills = [("Semester 1", "LESSON A", "use databases", "url/1"), ("Semester 3", "LESSON C", "think critically", "url/2")]
+        counts = sync_university(cursor, 7, lessons, skills)
+
+        self.assertEqual(counts, {"inserted": 1, "updated": 1, "deleted": 1, "unchanged": 0, "skills": 2})
+        self.assertEqual(cursor.stored_skills(), {("LESSON A", "use databases"), ("LESSON C", "think critically")})
+        self.assertEqual(sorted(lesson[1] for lesson in cursor.lessons.values()), ["LESSON A", "LESSON C"])
+
+    def test_duplicates_from_earlier_loads_are_removed(self):
+        cursor = FakeCursor()
+        sync_university(cursor, 7, LESSONS, SKILLS)
+        duplicate_id = max(cursor.lessons) + 1
+        cursor.lessons[duplicate_id] = list(cursor.lessons[min(cursor.lessons)])
+
+        counts = sync_university(cursor, 7, LESSONS, SKILLS)
+
+        self.assertEqual(counts["deleted"], 1)
+        self.assertNotIn(duplicate_id, cursor.lessons)
+        self.assertEqual(len(cursor.lessons), 2)
+
+    def test_adding_a_lesson_inserts_one_row(self):
+        cursor = FakeCursor()
+        lessons = [("LESSON A", "Semester 1 (2 lessons)", "text a"), ("LESSON B", "Semester 1 (2 lessons)", "text b")]
+        sync_university(cursor, 7, lessons, [])
+        kept_ids = set(cursor.lessons)
+        cursor.writes.clear()
+
+        lessons = [(name, "Semester 1 (3 lessons)", text) for name, _, text in lessons] + [("LESSON C", "Semester 1 (3 lessons)", "text c")]
+        counts = sync_university(cursor, 7, lessons, [("Semester 1 (3 lessons)", "LESSON C", "use databases", "url/1")])
+
+        self.assertEqual(counts, {"inserted": 1, "updated": 0, "deleted": 0, "unchanged": 2, "skills": 1})
+        self.assertEqual(cursor.writes, [("UPDATE", 1), ("INSERT", 1), ("INSERT", 1), ("INSERT", 1)])
+        self.assertTrue(kept_ids < set(cursor.lessons))
+        self.assertEqual({lesson[0] for lesson in cursor.lessons.values()}, {"Semester 1 (3 lessons)"})
+
+    def test_known_skill_names_are_not_erased(self):
+        cursor = FakeCursor()
+        sync_university(cursor, 7, LESSONS, SKILLS)
+
+        sync_university(cursor, 8, [("LESSON C", "Semester 1", "text")], [("Semester 1", "LESSON C", "Unknown Skill", "url/1")])
+
+        self.assertEqual(cursor.catalog[skill_url_hash("url/1")][2], "use databases")
+
+
+class TestParallelLoad(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def write_file(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content if isinstance(content, str) else json.dumps(content))
+        return path
+
+    def test_report_per_file_with_bounded_writes(self):
+        paths = [self.write_file(f"uni{i}_cache.json", {"university_name": f"Uni {i}", "university_country": "Greece", "Semester 1": {}})
+                 for i in range(6)]
+        paths.append(self.write_file("broken.json", "{not json"))
+        paths.append(self.write_file("nameless.json", {"university_name": "", "Semester 1": {}}))
+        paths.append(self.write_file("countryless.json", {"university_name": "Uni X", "university_country": "Unknown", "Semester 1": {}}))
+
+        active, peak, lock = [0], [0], threading.Lock()
+
+        def fake_sync(db_config, university_name, country, number_of_semesters, lesson_rows, skill_rows):
+            with lock:
+                active[0] += 1
+                peak[0] = max(peak[0], active[0])
+            time.sleep(0.02)
+            with lock:
+                active[0] -= 1
+            return {"inserted": 1, "updated": 0, "deleted": 0, "unchanged": 0, "skills": 2}
+
+        with patch("database.prepare_university_rows", return_value=([("L", "Semester 1", "text")], [])), \
+             patch("database._sync_to_database", side_effect=fake_sync):
+            report = load_cache_files(paths, {}, workers=8, write_connections=2)
+
+        self.assertEqual([entry["status"] for entry in report], ["saved"] * 6 + ["failed", "skipped", "skipped"])
+        self.assertEqual(report[0]["university_name"], "Uni 0")
+        self.assertEqual((report[0]["lessons"], report[0]["inserted"]), (1, 1))
+        self.assertIn("write_seconds", report[0])
+        self.assertLessEqual(peak[0], 2)
+
+    def test_malformed_file_is_reported_not_raised(self):
+        paths = [self.write_file("bad_cache.json", {"university_name": "Bad", "university_country": "Greece"}),
+                 self.write_file("list.json", "[1, 2]"),
+                 self.write_file("good_cache.json", {"university_name": "Good", "university_country": "Greece"})]
+
+        def prepare(data, university_name, cached_data=None):
+            if university_name == "Bad":
+                raise KeyError("description")
+            return [], []
+
+        with patch("database.prepare_university_rows", side_effect=prepare), \
+             patch("database._sync_to_database", return_value={"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0, "skills": 0}):
+            report = load_cache_files(paths, {})
+
+        self.assertEqual([entry["status"] for entry in report], ["failed", "failed", "saved"])
+        self.assertEqual(report[0]["error"], "KeyError: 'description'")
+        self.assertTrue(report[1]["error"].startswith("AttributeError"))
+
+    def test_unknown_country_is_resolved_again(self):
+        paths = [self.write_file("vu_cache.json", {"university_name": "VU University", "university_country": "Unknown", "Semester 1": {}}),
+                 self.write_file("x_cache.json", {"university_name": "Uni X", "university_country": "Unknown", "Semester 1": {}})]
+        index = UniversityIndex([{"name": "Vrije Universiteit Amsterdam", "country": "Netherlands", "aliases": ["VU University"]}])
+        universities.clear_memory()
+        self.addCleanup(universities.clear_memory)
+
+        with patch("universities.load_university_index", return_value=index), \
+             patch("skillcrawl.university_cache", {}), \
+             patch("database.prepare_university_rows", return_value=([], [])), \
+             patch("database._sync_to_database", return_value={"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0, "skills": 0}) as sync:
+            report = load_cache_files(paths, {})
+
+        self.assertEqual([entry["status"] for entry in report], ["saved", "skipped"])
+        self.assertEqual(sync.call_args[0][2], "Netherlands")
+
+    def test_cache_file_is_not_read_twice(self):
+        data = {"university_name": "Uni", "university_country": "Greece", "Semester 1": {}}
+        path = self.write_file("Uni_cache.json", data)
+
+        with patch("database.CACHE_DIR", self.tmp.name), \
+             patch("database.load_from_cache") as load_from_cache, \
+             patch("database._sync_to_database", return_value={"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0, "skills": 0}):
+            report = database.load_cache_file(path, {})
+
+        self.assertEqual(report["status"], "saved")
+        load_from_cache.assert_not_called()
+
+
+class TestDeadlockRetry(unittest.TestCase):
+
+    def connect(self):
+        connection = MagicMock()
+        connection.__enter__.return_value = connection
+        return connection
+
+    def test_deadlocked_transaction_is_retried(self):
+        connection = self.connect()
+        deadlock = mysql.connector.Error(msg="Deadlock found", errno=errorcode.ER_LOCK_DEADLOCK)
+        counts = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 1, "skills": 0}
+
+        with patch("db_pool.connect", return_value=connection), \
+             patch("database.get_university_id", return_value=1), \
+             patch("database.sync_university", side_effect=[deadlock, counts]), \
+             patch("database.time.sleep"):
+            self.assertEqual(database._sync_to_database({}, "Uni", "Greece", 1, [], []), counts)
+
+        connection.rollback.assert_called_once()
+        connection.commit.assert_called_once()
+
+    def test_other_errors_are_not_retried(self):
+        connection = self.connect()
+        error = mysql.connector.Error(msg="Table missing", errno=errorcode.ER_NO_SUCH_TABLE)
+
+        with patch("db_pool.connect", return_value=connection), \
+             patch("database.get_university_id", return_value=1), \
+             patch("database.sync_university", side_effect=error) as sync:
+            with self.assertRaises(mysql.connector.Error):
+                database._sync_to_database({}, "Uni", "Greece", 1, [], [])
+
+        self.assertEqual(sync.call_count, 1)
+
+    def test_catalog_rows_are_written_in_key_order(self):
+        cursor = FakeCursor()
+        database.upsert_skill_catalog(cursor, {f"url/{i}": f"skill {i}" for i in range(20)})
+
+        inserted = [url_hash for url_hash in cursor.catalog]
+        self.assertEqual(inserted, sorted(inserted))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import mysql.connector
+from mysql.connector import errors
+
+import db_pool
+
+DB_CONFIG = {"host": "db", "user": "root", "password": "", "database": "SkillCrawl"}
+
+
+class FakePool:
+    """Hands out up to pool_size mock connections, like MySQLConnectionPool."""
+
+    def __init__(self, pool_name, pool_size, **db_config):
+        self.pool_name = pool_name
+        self.pool_size = pool_size
+        self.free = [self._connection() for _ in range(pool_size)]
+
+    def _connection(self):
+        cnx = MagicMock()
+        cnx.close.side_effect = lambda: self.free.append(cnx)
+        return cnx
+
+    def get_connection(self):
+        if not self.free:
+            raise errors.PoolError("Failed getting connection; pool exhausted")
+        return self.free.pop()
+
+
+class TestDbPool(unittest.TestCase):
+
+    def setUp(self):
+        for target, value in (("db_pool._pools", {}),
+                              ("db_pool._metrics", dict(db_pool._metrics, checkouts=0, checkout_failures=0, reconnects=0,
+                                                        waits=0, wait_seconds=0.0, in_use=0, peak_in_use=0)),
+                              ("db_pool.pooling.MySQLConnectionPool", FakePool),
+                              ("db_pool.DB_POOL_SIZE", 2),
+                              ("db_pool.DB_POOL_TIMEOUT", 0.1)):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_connections_are_reused_and_pinged_on_checkout(self):
+        with db_pool.connect(DB_CONFIG) as first:
+            cnx = first._cnx
+        with db_pool.connect(DB_CONFIG) as second:
+            self.assertIs(second._cnx, cnx)
+
+        cnx.ping.assert_called_with(reconnect=False)
+        self.assertEqual(len(db_pool._pools), 1)
+        metrics = db_pool.pool_metrics()
+        self.assertEqual((metrics["checkouts"], metrics["in_use"], metrics["peak_in_use"]), (2, 0, 1))
+
+    def test_stale_connection_is_reconnected(self):
+        pool = db_pool.get_pool(DB_CONFIG)
+        pool.free[-1].ping.side_effect = mysql.connector.Error("gone away")
+
+        with db_pool.connect(DB_CONFIG) as conn:
+            conn._cnx.reconnect.assert_called_once()
+        self.assertEqual(db_pool.pool_metrics()["reconnects"], 1)
+
+    def test_exhausted_pool_waits_then_fails(self):
+        held = [db_pool.connect(DB_CONFIG), db_pool.connect(DB_CONFIG)]
+
+        with self.assertRaises(errors.PoolError):
+            db_pool.connect(DB_CONFIG)
+        self.assertEqual(db_pool.pool_metrics()["checkout_failures"], 1)
+
+        for conn in held:
+            conn.close()
+            conn.close()
+        self.assertEqual(db_pool.pool_metrics()["in_use"], 0)
+        self.assertFalse(held[0].is_connected())
+
+
+class TestEndpointCheckouts(unittest.TestCase):
+    """Endpoints check out one connection and use it, with no separate probe connection first."""
+
+    def test_search_uses_a_single_checkout(self):
+        import main
+
+        conn = MagicMock()
+        conn.__enter__.return_value = conn
+        conn.cursor.return_value.fetchall.return_value = []
+        with patch("main.db_connect", return_value=conn) as checkout, patch("db_pool.connect") as other_checkout:
+            self.assertEqual(main.search_skill(main.SkillSearchRequest(skill="databases")), {"results": {}})
+            self.assertEqual(main.search_skill_url(main.SkillSearchURLRequest(skill_url="http://x")), {"results": {}})
+
+        self.assertEqual(checkout.call_count, 2)
+        other_checkout.assert_not_called()
+
+    def test_unreachable_database_is_a_500(self):
+        import main
+        from fastapi import HTTPException
+
+        with patch("main.db_connect", side_effect=mysql.connector.Error("down")):
+            with self.assertRaises(HTTPException) as raised:
+                main.search_skill(main.SkillSearchRequest(skill="databases"))
+        self.assertEqual(raised.exception.status_code, 500)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,128 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+import helpers
+import embedding_store
+
+VECTORS = {
+    "alpha": [1.0, 0.0, 0.0],
+    "beta": [0.0, 1.0, 0.0],
+    "gamma": [0.0, 0.6, 0.8],
+    "delta": [0.7, 0.7, 0.14],
+}
+
+
+class FakeModel:
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode(self, sentences, **kwargs):
+        self.encoded.extend(sentences)
+        vectors = np.array([VECTORS[s.strip()] for s in sentences], dtype=np.float32)
+        return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+class FakeExtractor:
+    skills_threshold = 0.45
+    _skill_ids = np.array(["skill/a", "skill/b", "skill/c"])
+    _skill_embeddings = np.eye(3, dtype=np.float32)
+
+    def __init__(self):
+        self._model = FakeModel()
+
+    def _text_to_sentences(self, text):
+        return [s for s in text.strip().split(".") if s]
+
+    def get_skills(self, texts, threshold=None):
+        threshold = self.skills_threshold if threshold is None else threshold
+        results = []
+        for text in texts:
+            sentences = self._text_to_sentences(text)
+            if not sentences:
+                results.append([])
+                continue
+            scores = self._model.encode(sentences) @ self._skill_embeddings.T
+            matched = np.unique(scores.argmax(axis=1)[scores.max(axis=1) > threshold])
+            results.append(list(self._skill_ids[matched]))
+        return results
+
+
+class TestEmbeddingStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        for target, path in [("helpers.CACHE_DIR", self.tmp_dir.name),
+                             ("embedding_store.EMBEDDINGS_DIR", os.path.join(self.tmp_dir.name, "embeddings"))]:
+            patcher = patch(target, path)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        embedding_store._open_stores.clear()
+
+        self.extractor = FakeExtractor()
+        self.descriptions = {
+            "DATABASES": "alpha.beta",
+            "NETWORKS": "gamma",
+            "EMPTY": "",
+        }
+        self.save_university("Test University", self.descriptions)
+
+    def save_university(self, name, descriptions):
+        helpers.save_to_cache(name, {
+            "Semester 1": {lesson: {"description": desc} for lesson, desc in descriptions.items()},
+            "university_name": name,
+            "university_country": "Greece",
+        })
+
+    def test_vectors_are_memory_mapped_views(self):
+        embedding_store.build_embeddings("Test University", self.extractor)
+
+        vectors = embedding_store.lesson_embeddings("Test University", "Semester 1", "DATABASES")
+        matrix, index = embedding_store.load_embeddings("Test University")
+
+        self.assertIsInstance(matrix, np.memmap)
+        self.assertTrue(np.shares_memory(vectors, matrix))
+        self.assertEqual(vectors.shape, (2, 3))
+        self.assertEqual(index[("Semester 1", "EMPTY")]["count"], 0)
+
+    def test_reextraction_matches_the_extractor(self):
+        embedding_store.build_embeddings("Test University", self.extractor)
+        encoded = len(self.extractor._model.encoded)
+
+        for threshold in (0.45, 0.7, 0.9):
+            skills = embedding_store.reextract_skills("Test University", threshold, self.extractor)
+            for lesson, description in self.descriptions.items():
+                self.assertEqual(skills[("Semester 1", lesson)], self.extractor.get_skills([description], threshold)[0])
+
+        self.assertEqual(skills[("Semester 1", "NETWORKS")], [])
+        self.assertEqual(len(self.extractor._model.encoded), encoded + 3 * 3)  # only get_skills encoded again
+
+    def test_rebuild_only_encodes_changed_descriptions(self):
+        embedding_store.build_embeddings("Test University", self.extractor)
+        self.descriptions["NETWORKS"] = "delta"
+        self.save_university("Test University", self.descriptions)
+        self.extractor._model.encoded.clear()
+
+        self.assertEqual(embedding_store.build_embeddings("Test University", self.extractor), {"lessons": 3, "encoded": 1})
+        self.assertEqual(self.extractor._model.encoded, ["delta"])
+        self.assertEqual(embedding_store.build_embeddings("Test University", self.extractor)["encoded"], 0)
+
+    def test_similar_lessons_across_universities(self):
+        self.save_university("Other University", {"DATA SYSTEMS": "alpha", "OPTICS": "gamma"})
+        embedding_store.build_embeddings("Test University", self.extractor)
+        embedding_store.build_embeddings("Other University", self.extractor)
+
+        similar = embedding_store.similar_lessons("Other University", "Semester 1", "OPTICS", top_n=2)
+
+        self.assertEqual([(r["university_name"], r["lesson"]) for r in similar],
+                         [("Test University", "NETWORKS"), ("Test University", "DATABASES")])
+        self.assertAlmostEqual(similar[0]["similarity"], 1.0, places=4)
+
+
+if __name__ == "__main__":
+    unittest.main()
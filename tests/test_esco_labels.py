@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import esco_labels
+from skills import get_skill_titles, extract_and_get_title
+
+SKILL_A = "http://data.europa.eu/esco/skill/aaaa"
+SKILL_B = "http://data.europa.eu/esco/skill/bbbb"
+SKILL_UNKNOWN = "http://data.europa.eu/esco/skill/zzzz"
+
+CSV = (
+    "conceptType,conceptUri,skillType,reuseLevel,preferredLabel,altLabels,description\n"
+    f"KnowledgeSkillCompetence,{SKILL_A},knowledge,sector-specific,use databases,\"SQL\nqueries\",Work with databases.\n"
+    f"KnowledgeSkillCompetence,{SKILL_B},skill/competence,transversal,\"think critically, reason\",,Reason about things.\n"
+)
+
+
+class TestEscoLabels(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.csv_path = os.path.join(self.tmp_dir.name, "skills_en.csv")
+        with open(self.csv_path, "w", encoding="utf-8") as f:
+            f.write(CSV)
+        for name, value in (("ESCO_SKILLS_CSV", self.csv_path),
+                            ("ESCO_LABELS_DB", os.path.join(self.tmp_dir.name, "esco_labels.sqlite"))):
+            patcher = patch(f"esco_labels.{name}", value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        esco_labels._local.__dict__.clear()
+        self.addCleanup(esco_labels._local.__dict__.clear)
+
+    def test_index_is_built_from_the_csv_on_first_use(self):
+        self.assertEqual(esco_labels.get_label(SKILL_A), "use databases")
+        self.assertEqual(esco_labels.get_label(SKILL_B), "think critically, reason")
+        self.assertIsNone(esco_labels.get_label(SKILL_UNKNOWN))
+
+    def test_batch_lookup_leaves_out_unknown_urls(self):
+        labels = esco_labels.get_labels([SKILL_B, SKILL_A, SKILL_UNKNOWN, SKILL_A])
+        self.assertEqual(labels, {SKILL_A: "use databases", SKILL_B: "think critically, reason"})
+
+    def test_missing_dump_means_no_index(self):
+        with patch("esco_labels.ESCO_SKILLS_CSV", os.path.join(self.tmp_dir.name, "missing.csv")):
+            self.assertFalse(esco_labels.label_index_available())
+            self.assertEqual(esco_labels.get_labels([SKILL_A]), {})
+
+    @patch("label_resolver.resolve_labels", return_value={SKILL_UNKNOWN: "fetched label"})
+    def test_only_unknown_urls_reach_the_api(self, resolve_labels):
+        titles = get_skill_titles([SKILL_A, SKILL_UNKNOWN, SKILL_B])
+
+        self.assertEqual(titles, {SKILL_A: "use databases", SKILL_B: "think critically, reason", SKILL_UNKNOWN: "fetched label"})
+        resolve_labels.assert_called_once_with([SKILL_UNKNOWN])
+
+    @patch("label_resolver.resolve_label")
+    def test_single_lookup_uses_the_index(self, resolve_label):
+        self.assertEqual(extract_and_get_title(SKILL_A), "use databases")
+        self.assertEqual(extract_and_get_title("https://example.org/skill/1"), "Error: Invalid URL format")
+        resolve_label.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
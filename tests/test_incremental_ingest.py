@@ -0,0 +1,104 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import helpers
+import ingest
+import skill_memo
+
+
+class TestIncrementalIngest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        for target in ["helpers.PDF_CACHE_DIR", "helpers.CACHE_DIR"]:
+            patcher = patch(target, self.tmp_dir.name)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = patch("ingest.STORE_EMBEDDINGS", False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        helpers._known_shards.clear()
+        skill_memo.clear_memory()
+
+        self.pdf_path = os.path.join(self.tmp_dir.name, "Test_University.pdf")
+        with open(self.pdf_path, "wb") as f:
+            f.write(b"%PDF version one")
+
+        self.lessons = {"DATABASES": "Relational model", "ALGORITHMS": "Graphs"}
+        self.extractor = MagicMock(skills_threshold=0.45)
+        self.extractor.get_skills.side_effect = lambda descs: [[f"skill/{desc}"] for desc in descs]
+        for target, value in [("resources._skill_extractor", self.extractor),
+                              ("ingest.iter_semester_lessons", lambda *args, **kwargs: iter([(1, dict(self.lessons))]))]:
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def ingest(self, **kwargs):
+        return ingest._ingest(self.pdf_path, "Test University", "Greece", **kwargs)
+
+    def test_unchanged_pdf_is_skipped(self):
+        first, skipped = self.ingest()
+        self.assertFalse(skipped)
+        self.extractor.get_skills.assert_called_once_with(["Relational model", "Graphs"])
+
+        second, skipped = self.ingest()
+        self.assertTrue(skipped)
+        self.assertEqual(second, first)
+        self.assertEqual(self.extractor.get_skills.call_count, 1)
+
+        os.utime(self.pdf_path, ns=(1, 1))
+        self.assertTrue(self.ingest()[1])
+
+    def test_only_changed_lessons_are_reextracted(self):
+        self.ingest()
+        data = helpers.load_from_cache("Test University")
+        data["Semester 1 (2 lessons)"]["DATABASES"]["skill_names"] = ["databases"]
+        helpers.save_to_cache("Test University", data)
+
+        with open(self.pdf_path, "wb") as f:
+            f.write(b"%PDF version two")
+        self.lessons["ALGORITHMS"] = "Graphs and trees"
+        self.extractor.get_skills.reset_mock()
+
+        all_data, skipped = self.ingest()
+
+        self.assertFalse(skipped)
+        self.extractor.get_skills.assert_called_once_with(["Graphs and trees"])
+        semester = all_data["Semester 1 (2 lessons)"]
+        self.assertEqual(semester["DATABASES"]["skill_names"], ["databases"])
+        self.assertEqual(semester["ALGORITHMS"]["skills"], ["skill/Graphs and trees"])
+
+    def test_force_reextracts_everything(self):
+        self.ingest()
+        self.extractor.get_skills.reset_mock()
+
+        self.assertFalse(self.ingest(force=True)[1])
+        self.extractor.get_skills.assert_not_called()  # served by the skill memo
+
+        skill_memo.clear_memory()
+        self.extractor.skills_threshold = 0.6
+        self.assertFalse(self.ingest(force=True)[1])
+        self.extractor.get_skills.assert_called_once_with(["Relational model", "Graphs"])
+
+    def test_extractor_settings_change_invalidates_cached_skills(self):
+        self.ingest()
+        self.extractor.get_skills.reset_mock()
+
+        self.extractor.skills_threshold = 0.6
+        all_data, skipped = self.ingest()
+
+        self.assertFalse(skipped)
+        self.extractor.get_skills.assert_called_once_with(["Relational model", "Graphs"])
+
+        self.extractor.get_skills.reset_mock()
+        with patch("ingest.EXTRACTOR_VERSION", "2.0"), patch("skill_memo.EXTRACTOR_VERSION", "2.0"):
+            self.assertFalse(self.ingest()[1])
+        self.extractor.get_skills.assert_called_once_with(["Relational model", "Graphs"])
+        self.assertFalse(self.ingest()[1])  # back on the old version, which the manifest no longer records
+
+
+if __name__ == "__main__":
+    unittest.main()
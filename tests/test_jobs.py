@@ -0,0 +1,112 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+import jobs
+import main
+
+
+def wait_for(job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        job = jobs.get_job(job_id)
+        if job["status"] in ("done", "error"):
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job {job_id} did not finish")
+
+
+class TestJobs(unittest.TestCase):
+
+    def test_progress_and_result_are_reported(self):
+        release = threading.Event()
+
+        def target(pages, progress):
+            progress("pages_parsed", pages)
+            release.wait(5)
+            progress("lessons_found")
+            return {"lessons": 1}
+
+        job_id = jobs.submit_job(target, 3)
+        time.sleep(0.05)
+        self.assertEqual(jobs.get_job(job_id)["progress"], {"pages_parsed": 3})
+        release.set()
+
+        job = wait_for(job_id)
+        self.assertEqual(job["status"], "done")
+        self.assertEqual(job["progress"], {"pages_parsed": 3, "lessons_found": 1})
+        self.assertEqual(job["result"], {"lessons": 1})
+
+    def test_failures_are_recorded(self):
+        def target(progress):
+            raise ValueError("broken pdf")
+
+        job = wait_for(jobs.submit_job(target))
+        self.assertEqual((job["status"], job["error"]), ("error", "broken pdf"))
+        self.assertIsNone(jobs.get_job("missing"))
+
+
+class TestUploadEndpoint(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        for target, value in [("main.CURRICULUM_DIR", self.tmp_dir.name),
+                              ("main.UPLOAD_CHUNK_SIZE", 4),
+                              ("main.get_university_country", lambda name: "Greece")]:
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.client = TestClient(main.app)
+
+    def test_upload_is_written_to_disk_and_queued(self):
+        def fake_job(pdf_path, university_name, university_country, force=False, progress=None):
+            progress("pages_parsed", 2)
+            return {"university_name": university_name, "country": university_country}
+
+        with patch("main.ingest_pdf_job", fake_job):
+            response = self.client.post("/upload_pdf", files={"file": ("Test_University.pdf", b"%PDF-1.4 content", "application/pdf")})
+        self.assertEqual(response.status_code, 200)
+
+        with open(os.path.join(self.tmp_dir.name, "Test_University.pdf"), "rb") as f:
+            self.assertEqual(f.read(), b"%PDF-1.4 content")
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["Test_University.pdf"])
+
+        job = wait_for(response.json()["job_id"])
+        self.assertEqual(self.client.get(f"/jobs/{job['job_id']}").json()["result"],
+                         {"university_name": "Test University", "country": "Greece"})
+        self.assertEqual(job["progress"], {"pages_parsed": 2})
+
+    def test_existing_pdf_is_only_replaced_with_force(self):
+        path = os.path.join(self.tmp_dir.name, "Test_University.pdf")
+        with open(path, "wb") as f:
+            f.write(b"%PDF-1.4 original")
+        upload = {"file": ("Test_University.pdf", b"%PDF-1.4 replacement", "application/pdf")}
+
+        with patch("main.submit_job", return_value="job-1") as submit_job:
+            conflict = self.client.post("/upload_pdf", files=upload)
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), b"%PDF-1.4 original")
+
+            replaced = self.client.post("/upload_pdf", params={"force": "true"}, files=upload)
+            with open(path, "rb") as f:
+                self.assertEqual(f.read(), b"%PDF-1.4 replacement")
+
+        self.assertEqual(conflict.status_code, 409)
+        self.assertEqual(replaced.status_code, 200)
+        submit_job.assert_called_once()
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["Test_University.pdf"])
+
+    def test_rejects_non_pdf_and_unknown_jobs(self):
+        response = self.client.post("/upload_pdf", files={"file": ("notes.txt", b"text", "text/plain")})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get("/jobs/unknown").status_code, 404)
+
+
+if __name__ == "__main__":
+    unittest.main()
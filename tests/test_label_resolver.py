@@ -0,0 +1,166 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+import helpers
+import label_resolver
+
+LABELS = {
+    "http://data.europa.eu/esco/skill/aaaa": "use databases",
+    "http://data.europa.eu/esco/skill/bbbb": "think critically",
+}
+SKILL_UNKNOWN = "http://data.europa.eu/esco/skill/zzzz"
+SKILL_FLAKY = "http://data.europa.eu/esco/skill/flaky"
+SKILL_GARBLED = "http://data.europa.eu/esco/skill/garbled"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Stands in for the ESCO API and the Skillab tracker."""
+    requests_seen = []
+    flaky_failures = 0
+    page_size = None
+
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body=None):
+        payload = body if isinstance(body, bytes) else json.dumps(body or {}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        uri = parse_qs(url.query)["uri"][0]
+        StubHandler.requests_seen.append(("GET", uri))
+        if uri == SKILL_FLAKY and StubHandler.flaky_failures:
+            StubHandler.flaky_failures -= 1
+            return self._reply(503)
+        if uri == SKILL_FLAKY:
+            return self._reply(200, {"preferredLabel": {"en-us": "recovered"}})
+        if uri == SKILL_GARBLED:
+            return self._reply(200, b"<html>Bad gateway</html>")
+        if uri not in LABELS:
+            return self._reply(404)
+        self._reply(200, {"preferredLabel": {"en-us": LABELS[uri]}})
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        ids = parse_qs(self.rfile.read(length).decode("utf-8"))["ids"]
+        page = int(parse_qs(urlparse(self.path).query)["page"][0])
+        StubHandler.requests_seen.append(("POST", tuple(ids)))
+        items = [{"id": skill_id, "label": LABELS[skill_id]} for skill_id in ids if skill_id in LABELS]
+        page_size = StubHandler.page_size or len(ids)
+        items = items[(page - 1) * page_size:page * page_size]
+        self._reply(200, {"items": items})
+
+
+class TestLabelResolver(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        for target, value in (("helpers.PDF_CACHE_DIR", self.tmp_dir.name),
+                              ("label_resolver.ESCO_API_URL", self.base_url),
+                              ("label_resolver.SKILLAB_TRACKER_URL", self.base_url),
+                              ("label_resolver._session", None)):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        helpers._known_shards.clear()
+        label_resolver.clear_memory()
+        StubHandler.requests_seen = []
+        StubHandler.flaky_failures = 0
+        StubHandler.page_size = None
+
+    def test_labels_are_fetched_once_and_cached_on_disk(self):
+        urls = list(LABELS)
+        self.assertEqual(label_resolver.resolve_labels(urls), LABELS)
+
+        label_resolver.clear_memory()
+        self.assertEqual(label_resolver.resolve_labels(urls), LABELS)
+        self.assertEqual(len(StubHandler.requests_seen), 2)
+
+    def test_missing_urls_are_cached_negatively(self):
+        self.assertIsNone(label_resolver.resolve_label(SKILL_UNKNOWN))
+        self.assertIsNone(label_resolver.resolve_label(SKILL_UNKNOWN))
+        self.assertEqual(StubHandler.requests_seen, [("GET", SKILL_UNKNOWN)])
+
+    def test_expired_entries_are_fetched_again(self):
+        label_resolver.resolve_label(SKILL_UNKNOWN)
+        later = time.time() + (label_resolver.LABEL_NEGATIVE_TTL_HOURS + 1) * 3600
+        with patch("label_resolver.time.time", return_value=later):
+            label_resolver.resolve_label(SKILL_UNKNOWN)
+        self.assertEqual(len(StubHandler.requests_seen), 2)
+
+    def test_malformed_json_is_a_miss_that_is_not_cached(self):
+        self.assertIsNone(label_resolver.resolve_label(SKILL_GARBLED))
+        self.assertIsNone(label_resolver.resolve_label(SKILL_GARBLED))
+        self.assertEqual(StubHandler.requests_seen, [("GET", SKILL_GARBLED), ("GET", SKILL_GARBLED)])
+
+    def test_server_errors_are_retried(self):
+        StubHandler.flaky_failures = 2
+        self.assertEqual(label_resolver.resolve_label(SKILL_FLAKY), "recovered")
+        self.assertEqual(len(StubHandler.requests_seen), 3)
+
+    def test_server_errors_after_retries_are_not_cached(self):
+        StubHandler.flaky_failures = label_resolver.LABEL_RESOLVER_RETRIES + 1
+        self.assertIsNone(label_resolver.resolve_label(SKILL_FLAKY))
+        self.assertEqual(label_resolver.resolve_label(SKILL_FLAKY), "recovered")
+
+    def test_timeouts_are_cached_negatively(self):
+        with patch("requests.Session.get", side_effect=requests.Timeout("timed out")) as get:
+            self.assertIsNone(label_resolver.resolve_label(SKILL_FLAKY))
+            self.assertIsNone(label_resolver.resolve_label(SKILL_FLAKY))
+        get.assert_called_once()
+
+    def test_tracker_posts_only_uncached_ids(self):
+        urls = list(LABELS) + [SKILL_UNKNOWN]
+        first = label_resolver.track_skills(urls)
+        posted = len(StubHandler.requests_seen)
+        second = label_resolver.track_skills(urls)
+
+        self.assertEqual(list(first.items()), sorted(LABELS.items(), key=lambda item: item[1]))
+        self.assertEqual(first, second)
+        self.assertEqual(len(StubHandler.requests_seen), posted)
+        self.assertEqual({ids for _, ids in StubHandler.requests_seen}, {tuple(urls)})
+
+    def test_tracker_ids_are_chunked(self):
+        urls = list(LABELS) + [SKILL_UNKNOWN]
+        with patch("label_resolver.SKILLAB_TRACKER_BATCH_SIZE", 2):
+            labels = label_resolver.track_skills(urls)
+
+        self.assertEqual(dict(labels), LABELS)
+        self.assertEqual({ids for _, ids in StubHandler.requests_seen}, {tuple(urls[:2]), (SKILL_UNKNOWN,)})
+
+    def test_tracker_result_pages_are_followed(self):
+        StubHandler.page_size = 1
+        urls = list(LABELS) + [SKILL_UNKNOWN]
+        labels = label_resolver.track_skills(urls)
+
+        self.assertEqual(dict(labels), LABELS)
+        self.assertEqual(len(StubHandler.requests_seen), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+from unittest.mock import patch
+
+from segmentation import scan_markers
+from pdf_utils import extract_text_after_marker, split_by_semester, iter_text_after_marker
+from helpers import extract_description
+
+
+class TestMarkerScan(unittest.TestCase):
+
+    TEXT = ("Intro course content\nCOURSE OUTLINES\n1st Semester\nGeneral competences\nTeamwork\n"
+            "Assessment\nExams\n2nd Semester\nAssessment again")
+
+    def test_single_scan_finds_every_marker_kind(self):
+        scan = scan_markers(self.TEXT, ["Course Outlines", "Course Content"])
+
+        self.assertEqual(scan.outline_markers[0][0], self.TEXT.index("COURSE OUTLINES"))
+        self.assertEqual(scan.outline_markers[1][0], self.TEXT.index("course content"))
+        self.assertEqual(scan.semester_headers, [self.TEXT.index("1st"), self.TEXT.index("2nd")])
+        self.assertEqual(scan.sections["General competences"], [self.TEXT.index("General")])
+        self.assertEqual(len(scan.sections["Assessment"]), 2)
+
+    def test_callers_agree_with_scan(self):
+        markers = ["Course Outlines", "Course Content"]
+        after_marker = extract_text_after_marker([self.TEXT], markers)
+
+        self.assertTrue(after_marker.startswith("1st Semester"))
+        self.assertEqual("".join(iter_text_after_marker([self.TEXT], markers)), after_marker)
+        self.assertEqual(len(split_by_semester(after_marker, scan_markers(after_marker))), 2)
+        self.assertEqual(extract_description(self.TEXT), "Teamwork")
+
+    def test_pages_held_for_a_better_marker_are_bounded(self):
+        consumed = []
+
+        def pages(texts):
+            for text in texts:
+                consumed.append(text)
+                yield text
+
+        with patch("pdf_utils.MARKER_SCAN_PAGES", 3):
+            unmarked = iter_text_after_marker(pages([f"page {i}" for i in range(100)]), ["Course Outlines"])
+            self.assertEqual(next(unmarked), "page 0")
+            self.assertEqual(len(consumed), 4)
+
+            late = ["Course Content\nfirst"] + [f"page {i}" for i in range(5)] + ["Course Outlines\nlate"]
+            self.assertEqual(list(iter_text_after_marker(late, ["Course Outlines", "Course Content"]))[0], "first")
+
+    def test_section_markers_are_case_sensitive(self):
+        scan = scan_markers("general competences\nASSESSMENT")
+
+        self.assertEqual(scan.sections, {"General competences": [], "Assessment": []})
+        self.assertEqual(scan.shifted(5).semester_headers, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
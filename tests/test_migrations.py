@@ -0,0 +1,107 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import mysql.connector
+
+import db_pool
+import migrate
+from config import DB_CONFIG
+
+
+class TestMigrationRunner(unittest.TestCase):
+
+    def test_migrations_are_numbered_and_parse(self):
+        migrations = migrate.list_migrations()
+        versions = [version for version, _, _ in migrations]
+
+        self.assertEqual(versions, sorted(set(versions)))
+        self.assertEqual(versions[0], "0001")
+        for _, _, path in migrations:
+            with open(path, "r", encoding="utf-8") as f:
+                self.assertTrue(migrate.split_statements(f.read()))
+
+    def test_split_statements_drops_comments(self):
+        sql = "-- add an index\nCREATE INDEX a ON T (x);\n\n-- and another\nCREATE INDEX b ON T (y);\n"
+        self.assertEqual(migrate.split_statements(sql), ["CREATE INDEX a ON T (x)", "CREATE INDEX b ON T (y)"])
+
+    def connection(self, applied=("0001",), check_rows=0):
+        cursor = MagicMock()
+        cursor.fetchall.return_value = [(version,) for version in applied]
+        cursor.fetchone.return_value = (check_rows,)
+        conn = MagicMock()
+        conn.__enter__.return_value = conn
+        conn.cursor.return_value = cursor
+        return conn, cursor
+
+    def recorded(self, cursor):
+        return [call.args[1][0] for call in cursor.execute.call_args_list if "INSERT INTO schema_migrations" in call.args[0]]
+
+    def test_only_pending_migrations_are_applied(self):
+        conn, cursor = self.connection()
+
+        with patch("db_pool.connect", return_value=conn):
+            applied = migrate.apply_migrations({})
+
+        self.assertNotIn("0001", applied)
+        self.assertEqual(applied, [version for version, _, _ in migrate.list_migrations()][1:])
+        self.assertEqual(self.recorded(cursor), applied)
+
+    def test_destructive_migrations_wait_for_a_manual_run(self):
+        conn, cursor = self.connection()
+
+        with patch("db_pool.connect", return_value=conn):
+            applied = migrate.apply_migrations({}, destructive=False)
+
+        self.assertNotIn("0007", applied)
+        self.assertFalse(any("DROP TABLE Skills" in call.args[0] for call in cursor.execute.call_args_list))
+
+    def test_failed_check_stops_before_dropping(self):
+        conn, cursor = self.connection(applied=("0001", "0002", "0003", "0004", "0005", "0006"), check_rows=3)
+
+        with patch("db_pool.connect", return_value=conn):
+            with self.assertRaises(migrate.MigrationCheckError):
+                migrate.apply_migrations({})
+
+        self.assertEqual(self.recorded(cursor), [])
+        self.assertFalse(any("DROP TABLE Skills" in call.args[0] for call in cursor.execute.call_args_list))
+
+    def test_hot_queries_are_the_ones_the_code_runs(self):
+        import skills
+        import skill_counts
+
+        self.assertIs(migrate.HOT_QUERIES["get_top_skills"][0], skill_counts.TOP_SKILLS_UNIVERSITY_QUERY)
+        self.assertIs(migrate.HOT_QUERIES["search_courses_by_skill_url"][0], skills.SKILL_URL_QUERY)
+        for query, params in migrate.HOT_QUERIES.values():
+            self.assertEqual(query.count("%s"), len(params))
+
+    def test_full_scan_is_flagged_even_with_possible_keys(self):
+        cursor = MagicMock()
+        cursor.description = [("table",), ("type",), ("possible_keys",), ("key",)]
+        cursor.fetchall.return_value = [("u", "ref", "idx_university_name_country", "idx_university_name_country"),
+                                        ("ls", "ALL", "PRIMARY", None)]
+
+        regressions = migrate.full_scans(cursor)
+
+        self.assertEqual(set(regressions), set(migrate.HOT_QUERIES))
+        self.assertEqual(regressions["get_top_skills"], ["ls"])
+
+
+class TestQueryPlans(unittest.TestCase):
+    """Runs against the configured MySQL database; skipped when there is none."""
+
+    def setUp(self):
+        try:
+            self.conn = db_pool.connect(DB_CONFIG)
+        except mysql.connector.Error:
+            self.skipTest("no MySQL database available")
+        self.addCleanup(self.conn.close)
+        migrate.apply_migrations(DB_CONFIG)
+
+    def test_hot_queries_use_indexes(self):
+        cursor = self.conn.cursor()
+        self.addCleanup(cursor.close)
+        self.assertEqual(migrate.full_scans(cursor), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import helpers
+
+
+class TestPdfCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        patcher = patch("helpers.PDF_CACHE_DIR", self.tmp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        helpers._known_shards.clear()
+
+    def test_round_trip_is_one_shard_per_entry(self):
+        key = helpers.cache_key("text", "some pdf bytes")
+        self.assertIsNone(helpers.load_cache(key))
+        self.assertFalse(helpers.is_cached(key))
+
+        helpers.save_cache_entry(key, ["page one", "page two"])
+
+        self.assertTrue(helpers.is_cached(key))
+        self.assertEqual(helpers.load_cache(key), ["page one", "page two"])
+
+        shards = [f for _, _, files in os.walk(self.tmp_dir.name) for f in files]
+        self.assertEqual(len(shards), 1)
+        self.assertFalse(any(f.endswith(".tmp") for f in shards))
+
+    def test_key_follows_content_not_path(self):
+        with tempfile.NamedTemporaryFile(delete=False) as a, tempfile.NamedTemporaryFile(delete=False) as b:
+            a.write(b"%PDF same content")
+            b.write(b"%PDF same content")
+        self.addCleanup(os.remove, a.name)
+        self.addCleanup(os.remove, b.name)
+
+        self.assertEqual(helpers.file_hash(a.name), helpers.file_hash(b.name))
+        self.assertNotEqual(helpers.cache_key("text", "a"), helpers.cache_key("semesters", "a"))
+
+    def test_corrupt_pdf_is_not_cached_as_empty(self):
+        from pdf_utils import iter_pdf_pages, PDFReadError
+
+        pdf_path = os.path.join(self.tmp_dir.name, "corrupt.pdf")
+        with open(pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 this is not really a pdf")
+
+        for _ in range(2):  # the failure is not remembered as a zero-page PDF
+            with self.assertRaises(PDFReadError):
+                list(iter_pdf_pages(pdf_path))
+
+        self.assertFalse(helpers.is_cached(helpers.cache_key("text", helpers.file_hash(pdf_path))))
+        shards = [f for _, _, files in os.walk(self.tmp_dir.name) for f in files if f != "corrupt.pdf"]
+        self.assertEqual(shards, [])
+
+    def test_empty_stream_is_not_published(self):
+        key = helpers.cache_key("text", "no pages")
+        self.assertEqual(list(helpers.save_cache_stream(key, iter([]))), [])
+        self.assertIsNone(helpers.open_cache_stream(key))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from segmentation import segment_page, merge_page_lessons
+from pdf_utils import process_pages_by_lesson
+
+
+class TestSegmentation(unittest.TestCase):
+
+    def test_titles_are_filtered(self):
+        page = "OPERATING SYSTEMS\nProcesses and threads\nISBN 1234\nREAD THIS!\nCS101\nCOMPUTER NETWORKS (5 ECTS)\nRouting"
+        lessons = segment_page((0, page))
+
+        self.assertEqual(lessons, [
+            ("OPERATING SYSTEMS", "Processes and threads"),
+            ("COMPUTER NETWORKS", "Routing"),
+        ])
+
+    def test_zero_width_characters_do_not_hide_course_codes(self):
+        page = "S104\u200b\nS105\u200b\nMACHINE\u200b LEARNING\u200b\nRegression"
+        lessons = segment_page((0, page))
+
+        self.assertEqual(lessons, [("MACHINE LEARNING", "Regression")])
+
+    def test_duplicate_titles_resolve_in_page_order(self):
+        pages = [
+            "DATABASES\nFirst version",
+            "ALGORITHMS\nGraphs",
+            "DATABASES\nSecond version",
+        ]
+
+        for _ in range(5):
+            lessons = process_pages_by_lesson(pages)
+            self.assertEqual(list(lessons), ["DATABASES", "ALGORITHMS"])
+            self.assertEqual(lessons["DATABASES"], "Second version")
+
+        self.assertEqual(merge_page_lessons([segment_page(p) for p in enumerate(pages)]), lessons)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,36 @@
+import unittest
+
+from pdf_utils import split_by_semester, iter_semesters, iter_text_after_marker
+
+
+PAGES = [
+    "Faculty handbook\nWelcome",
+    "Course Outlines\nYear 1\nPROGRAMMING\nLoops and functions",
+    "DISCRETE MATHS\nSets and logic",
+    "ALGORITHMS\nSorting and searching",
+    "Year 2\nDATABASES\nRelational model",
+    "NETWORKS\nProtocols\nYear 3\nMACHINE LEARNING",
+    "Regression and classification",
+    "COMPILERS\nParsing",
+]
+
+
+class TestSemesterIndex(unittest.TestCase):
+
+    def test_split_by_semester_returns_offsets(self):
+        text = "\n".join(PAGES)
+        spans = split_by_semester(text)
+
+        self.assertEqual([text[start:end].split("\n")[0] for start, end in spans], ["Year 1", "Year 2", "Year 3"])
+        self.assertEqual(spans[-1][1], len(text))
+
+    def test_streaming_split_groups_pages_by_semester(self):
+        pages = list(iter_text_after_marker(PAGES, ["Course Outlines"]))
+
+        self.assertEqual(pages[0], "Year 1\nPROGRAMMING\nLoops and functions")
+        # The page holding the Year 3 header also ends Year 2, so it belongs to no semester.
+        self.assertEqual(list(iter_semesters(pages)), [pages[0:3], pages[3:4], pages[5:7]])
+
+
+if __name__ == "__main__":
+    unittest.main()
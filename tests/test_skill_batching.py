@@ -0,0 +1,49 @@
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import helpers
+import skill_memo
+from skills import extract_skills_batch, extract_skills_by_key, lesson_description_text
+
+
+class TestSkillBatching(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        patcher = patch("helpers.PDF_CACHE_DIR", self.tmp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        helpers._known_shards.clear()
+        skill_memo.clear_memory()
+
+        self.extractor = MagicMock(skills_threshold=0.45)
+        self.extractor.get_skills.side_effect = lambda descs: [[f"skill/{desc}", f"skill/{desc}"] for desc in descs]
+
+    def test_batches_preserve_input_order(self):
+        descriptions = ["a", "b", "", "c", "a", None, "d", "e"]
+
+        results = extract_skills_batch(descriptions, batch_size=2, extractor=self.extractor)
+
+        self.assertEqual(results, [["skill/a"], ["skill/b"], [], ["skill/c"], ["skill/a"], [], ["skill/d"], ["skill/e"]])
+        self.assertEqual([call.args[0] for call in self.extractor.get_skills.call_args_list],
+                         [["a", "b"], ["c", "d"], ["e"]])
+
+    def test_results_map_back_to_keys(self):
+        lessons = {("Semester 1", "DATABASES"): "sql", ("Semester 2", "NETWORKS"): "routing"}
+
+        self.assertEqual(extract_skills_by_key(lessons, extractor=self.extractor), {
+            ("Semester 1", "DATABASES"): ["skill/sql"],
+            ("Semester 2", "NETWORKS"): ["skill/routing"],
+        })
+        self.assertEqual(self.extractor.get_skills.call_count, 1)
+
+    def test_description_text(self):
+        self.assertEqual(lesson_description_text({"description": {"text": "nested"}}), "nested")
+        self.assertEqual(lesson_description_text({"description": 3}), "")
+        self.assertEqual(lesson_description_text("plain"), "plain")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,85 @@
+import unittest
+
+from skill_counts import count_deltas, refresh_university
+
+
+class FakeCursor:
+    """Serves the per-university recount from `links` and keeps the three aggregates in dicts."""
+
+    def __init__(self):
+        self.links = {}            # university_id -> {skill_id: lesson_count}, i.e. the current LessonSkill state
+        self.university = {}       # (university_id, skill_id) -> lesson_count
+        self.skill = {}            # skill_id -> [lesson_count, university_count]
+        self.country = {}          # (country, skill_id) -> [lesson_count, university_count]
+        self._result = []
+
+    def execute(self, query, params=()):
+        if query.startswith("SELECT skill_id, lesson_count FROM UniversitySkillCount"):
+            self._result = [(skill_id, count) for (university_id, skill_id), count in self.university.items() if university_id == params[0]]
+        elif query.startswith("SELECT ls.skill_id"):
+            self._result = list(self.links.get(params[0], {}).items())
+        elif query.startswith("DELETE FROM UniversitySkillCount"):
+            for skill_id in params[1:]:
+                self.university.pop((params[0], skill_id), None)
+        elif query.startswith("DELETE FROM SkillCount"):
+            for skill_id in params:
+                if skill_id in self.skill and self.skill[skill_id][0] <= 0:
+                    del self.skill[skill_id]
+        elif query.startswith("DELETE FROM CountrySkillCount"):
+            for skill_id in params[1:]:
+                key = (params[0], skill_id)
+                if key in self.country and self.country[key][0] <= 0:
+                    del self.country[key]
+
+    def executemany(self, query, rows):
+        for row in rows:
+            if "INTO UniversitySkillCount" in query:
+                self.university[(row[0], row[1])] = row[2]
+            elif "INTO SkillCount" in query:
+                counts = self.skill.setdefault(row[0], [0, 0])
+                counts[0] += row[1]
+                counts[1] += row[2]
+            else:
+                counts = self.country.setdefault((row[0], row[1]), [0, 0])
+                counts[0] += row[2]
+                counts[1] += row[3]
+
+    def fetchall(self):
+        return self._result
+
+
+class TestSkillCounts(unittest.TestCase):
+
+    def test_count_deltas(self):
+        self.assertEqual(count_deltas({1: 2, 2: 1, 3: 4}, {1: 2, 2: 3, 4: 1}), [(2, 2, 0), (3, -4, -1), (4, 1, 1)])
+        self.assertEqual(count_deltas({1: 2}, {1: 2}), [])
+
+    def test_aggregates_follow_each_university(self):
+        cursor = FakeCursor()
+        cursor.links = {1: {10: 3, 11: 1}, 2: {10: 2}}
+        refresh_university(cursor, 1, "Greece")
+        refresh_university(cursor, 2, "Greece")
+
+        self.assertEqual(cursor.skill, {10: [5, 2], 11: [1, 1]})
+        self.assertEqual(cursor.country, {("Greece", 10): [5, 2], ("Greece", 11): [1, 1]})
+
+        # University 1 drops skill 11 and teaches skill 10 in one more lesson.
+        cursor.links[1] = {10: 4}
+        changed = refresh_university(cursor, 1, "Greece")
+
+        self.assertEqual(changed, 2)
+        self.assertEqual(cursor.university, {(1, 10): 4, (2, 10): 2})
+        self.assertEqual(cursor.skill, {10: [6, 2]})
+        self.assertEqual(cursor.country, {("Greece", 10): [6, 2]})
+
+    def test_unchanged_university_is_not_rewritten(self):
+        cursor = FakeCursor()
+        cursor.links = {1: {10: 3}}
+        refresh_university(cursor, 1, "Greece")
+
+        self.assertEqual(refresh_university(cursor, 1, "Greece"), 0)
+        self.assertEqual(cursor.skill, {10: [3, 1]})
+
+
+if __name__ == "__main__":
+    unittest.main()
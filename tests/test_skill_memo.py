@@ -0,0 +1,72 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+import helpers
+import skill_memo
+from skills import extract_skills_batch
+
+
+class TestSkillMemo(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        patcher = patch("helpers.PDF_CACHE_DIR", self.tmp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        helpers._known_shards.clear()
+        skill_memo.clear_memory()
+        skill_memo._disk_bytes = None
+        self.addCleanup(setattr, skill_memo, "_disk_bytes", None)
+
+        self.extractor = MagicMock(skills_threshold=0.45)
+        self.extractor.get_skills.side_effect = lambda descs: [[f"skill/{len(desc)}"] for desc in descs]
+
+    def test_repeat_extraction_is_a_lookup(self):
+        first = extract_skills_batch(["Intro to  SQL \r\nJoins"], extractor=self.extractor)
+        skill_memo.clear_memory()
+        second = extract_skills_batch([" Intro to SQL\nJoins "], extractor=self.extractor)
+
+        self.assertEqual(first, second)
+        self.assertEqual(self.extractor.get_skills.call_count, 1)
+
+    def test_threshold_is_part_of_the_key(self):
+        extract_skills_batch(["Routing"], extractor=self.extractor)
+        self.extractor.skills_threshold = 0.6
+        extract_skills_batch(["Routing"], extractor=self.extractor)
+
+        self.assertEqual(self.extractor.get_skills.call_count, 2)
+        self.assertNotEqual(skill_memo.memo_key("Routing", 0.45), skill_memo.memo_key("Routing", 0.6))
+        self.assertNotEqual(skill_memo.memo_key("a\nb", 0.45), skill_memo.memo_key("a b", 0.45))
+
+    def test_disk_store_evicts_least_recently_used(self):
+        keys = [skill_memo.memo_key(f"description {i}", 0.45) for i in range(3)]
+        for i, key in enumerate(keys):
+            helpers.save_cache_entry(key, ["x" * 100])
+            os.utime(helpers._shard_path(key), (i, i))
+        helpers.touch_cache_entry(keys[0])
+
+        remaining = helpers.trim_cache_namespace(skill_memo.NAMESPACE, 250)
+
+        self.assertLessEqual(remaining, 250)
+        self.assertIsNotNone(helpers.load_cache(keys[0]))
+        self.assertIsNone(helpers.load_cache(keys[1]))
+        self.assertIsNotNone(helpers.load_cache(keys[2]))
+
+    def test_concurrent_puts_keep_an_exact_size(self):
+        skill_memo._disk_bytes = 0
+
+        def put(i):
+            skill_memo.put_skills(skill_memo.memo_key(f"description {i}", 0.45), ["x" * 10])
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            list(executor.map(put, range(200)))
+
+        self.assertEqual(skill_memo._disk_bytes, 200 * len('["xxxxxxxxxx"]'))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,124 @@
+import re
+import unittest
+from unittest.mock import patch
+
+import skills
+from skills import match_skill_names, search_courses_by_skill_database
+
+
+def ngrams(text, size=2):
+    return {word[i:i + size] for word in re.findall(r"\w+", text.lower()) for i in range(len(word) - size + 1)}
+
+
+def like(pattern, name):
+    regex = "".join(".*" if char == "%" else re.escape(char) for char in re.sub(r"\\(.)", r"\1", pattern))
+    return re.fullmatch(regex, name, re.IGNORECASE) is not None
+
+
+class FakeCursor:
+    """Answers the candidate queries from `catalog` (FULLTEXT like the ngram parser) and the lesson query from `lessons`."""
+
+    def __init__(self, catalog, lessons):
+        self.catalog = catalog      # {skill_id: name}
+        self.lessons = lessons      # [(university_name, semester, lesson_name, skill_id)]
+        self.queries = []
+        self.params = []
+        self._result = []
+
+    def execute(self, query, params=()):
+        self.queries.append(query)
+        self.params.append(params)
+        if "MATCH(name)" in query:
+            phrase, pattern, max_length = params
+            self._result = [{"skill_id": skill_id, "name": name} for skill_id, name in self.catalog.items()
+                            if ngrams(phrase.strip('"')) <= ngrams(name) and like(pattern, name) and len(name) <= max_length]
+        elif "name = %s" in query:
+            self._result = [{"skill_id": skill_id, "name": name} for skill_id, name in self.catalog.items() if name.lower() == params[0].lower()]
+        elif "name LIKE %s" in query:
+            pattern, max_length = params
+            self._result = [{"skill_id": skill_id, "name": name} for skill_id, name in self.catalog.items()
+                            if like(pattern, name) and len(name) <= max_length]
+        else:
+            self._result = [{"university_name": u, "semester": s, "lesson_name": l, "skill_id": skill_id}
+                            for u, s, l, skill_id in self.lessons if skill_id in params]
+
+    def fetchall(self):
+        return self._result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self, dictionary=False):
+        return self._cursor
+
+    def close(self):
+        pass
+
+
+CATALOG = {1: "use databases", 2: "manage databases", 3: "think critically"}
+LESSONS = [
+    ("Uni A", "Semester 1", "DATABASES I", 1),
+    ("Uni A", "Semester 2", "DATABASES II", 1),
+    ("Uni B", "Semester 1", "DATA SYSTEMS", 2),
+    ("Uni B", "Semester 1", "LOGIC", 3),
+]
+
+
+class TestSkillSearch(unittest.TestCase):
+
+    def test_candidates_are_scored_once_and_filtered(self):
+        cursor = FakeCursor(CATALOG, [])
+        with patch("skills.fuzz.ratio", wraps=skills.fuzz.ratio) as ratio:
+            matches = match_skill_names(cursor, "Use Databases", threshold=70)
+
+        self.assertEqual(ratio.call_count, 1)  # only names containing the query are scored
+        self.assertEqual(matches, {1: ("use databases", 100)})
+
+    def test_short_and_symbol_names_are_found(self):
+        cursor = FakeCursor({1: "C++", 2: "C#", 3: "C", 4: "R", 5: "use C++ compilers"}, [])
+
+        self.assertEqual(match_skill_names(cursor, "C++", threshold=100), {1: ("C++", 100)})
+        self.assertEqual(match_skill_names(cursor, "c#", threshold=100), {2: ("C#", 100)})
+        self.assertEqual(match_skill_names(cursor, "R", threshold=100), {4: ("R", 100)})
+        self.assertIn(1, match_skill_names(cursor, "C", threshold=50))
+
+    def test_every_substring_match_is_returned(self):
+        catalog = {skill_id: f"sql {skill_id}" for skill_id in range(1, 501)}
+        catalog.update({1000: "mysql", 1001: "nosql", 1002: "use sql databases for reporting", 1003: "sequel"})
+        cursor = FakeCursor(catalog, [])
+
+        matches = match_skill_names(cursor, "sql", threshold=52)
+
+        expected = {skill_id for skill_id, name in catalog.items()
+                    if "sql" in name and skills.fuzz.ratio("sql", name) >= 52}
+        self.assertEqual(len(expected), 502)
+        self.assertEqual(set(matches), expected)
+        self.assertNotIn(1003, matches)  # an ngram neighbour, not a substring
+
+    def test_fulltext_without_rows_falls_back_to_like(self):
+        cursor = FakeCursor({1: "use databases"}, [])
+        with patch.object(FakeCursor, "fetchall", side_effect=[[], [], [{"skill_id": 1, "name": "use databases"}]]):
+            matches = match_skill_names(cursor, "use databases", threshold=90)
+
+        self.assertEqual(matches, {1: ("use databases", 100)})
+        self.assertIn("%use databases%", cursor.params[-1][0])
+
+    def test_database_search_groups_lessons_without_rescoring(self):
+        cursor = FakeCursor(CATALOG, LESSONS)
+        with patch("skills.try_db_connection", return_value=FakeConnection(cursor)), \
+             patch("skills.fuzz.ratio", wraps=skills.fuzz.ratio) as ratio:
+            found = search_courses_by_skill_database("use databases", {}, threshold=70)
+
+        self.assertEqual(ratio.call_count, 1)
+        self.assertIn("MATCH(name)", " ".join(cursor.queries))
+        self.assertEqual(sorted(found), ["Uni A"])  # "manage databases" does not contain the query
+        self.assertEqual(found["Uni A"]["Semester 2"]["DATABASES II"], [{"skill": "use databases", "score": 100, "frequency": 2}])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+import requests
+
+import universities
+from universities import UniversityIndex
+
+ENTRIES = [
+    {"name": "Technical University of Munich", "country": "Germany", "alpha_two_code": "DE", "aliases": ["Technische Universität München"]},
+    {"name": "Swiss Federal Institute of Technology Lausanne", "country": "Switzerland", "alpha_two_code": "CH", "aliases": ["EPFL"]},
+    {"name": "University of Groningen", "country": "Netherlands", "alpha_two_code": "NL"},
+    {"name": "University of Macedonia", "country": "Greece", "alpha_two_code": "GR"},
+]
+
+
+class TestUniversityIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = UniversityIndex(ENTRIES)
+
+    def test_exact_and_alias_matches_ignore_case_and_accents(self):
+        self.assertEqual(self.index.find_country("university of GRONINGEN"), "Netherlands")
+        self.assertEqual(self.index.find_country("Technische Universitat Munchen"), "Germany")
+        self.assertEqual(self.index.find_country("EPFL"), "Switzerland")
+
+    def test_fuzzy_match_needs_a_distinctive_word(self):
+        self.assertEqual(self.index.find_country("Univ. of Groningen"), "Netherlands")
+        self.assertIsNone(self.index.find_country("University of Technology"))
+        self.assertIsNone(self.index.find_country("University of Nowhere"))
+
+
+class TestOnlineFallback(unittest.TestCase):
+
+    def setUp(self):
+        universities.clear_memory()
+        self.addCleanup(universities.clear_memory)
+        for target, value in (("universities.load_university_index", lambda: UniversityIndex(ENTRIES)),
+                              ("universities.UNIVERSITY_ONLINE_LOOKUP", True)):
+            patcher = patch(target, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_dataset_misses_are_looked_up_online(self):
+        response = MagicMock()
+        response.json.return_value = [{"name": "University of Crete", "country": "Greece"}]
+        with patch("universities.requests.get", return_value=response) as get:
+            self.assertEqual(universities.lookup_country("University of Crete"), "Greece")
+            self.assertEqual(universities.lookup_country("EPFL"), "Switzerland")
+            self.assertEqual(universities.lookup_country("University of Crete"), "Greece")
+        get.assert_called_once()
+
+    def test_failed_lookups_are_not_memoized(self):
+        with patch("universities.requests.get", side_effect=requests.ConnectionError("offline")) as get:
+            self.assertEqual(universities.lookup_country("University of Crete"), "Unknown")
+            self.assertEqual(universities.lookup_country("University of Crete"), "Unknown")
+        self.assertEqual(get.call_count, 2)
+        self.assertFalse(universities.is_known_country("Unknown"))
+        self.assertTrue(universities.is_known_country("Greece"))
+
+
+class TestListPdfs(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        os.makedirs(os.path.join(self.tmp_dir.name, "curriculum"))
+        for name in ("University_of_Groningen.pdf", "EPFL.pdf"):
+            open(os.path.join(self.tmp_dir.name, "curriculum", name), "wb").close()
+
+        cwd = os.getcwd()
+        os.chdir(self.tmp_dir.name)
+        self.addCleanup(os.chdir, cwd)
+        universities.clear_memory()
+        self.addCleanup(universities.clear_memory)
+
+    def test_listing_is_offline_and_writes_the_cache_once(self):
+        import main
+
+        with patch("universities.load_university_index", return_value=UniversityIndex(ENTRIES)), \
+             patch("skillcrawl.university_cache", {}), \
+             patch("helpers.university_cache", {}), \
+             patch("helpers.save_cache") as save_cache, \
+             patch("requests.Session.request", side_effect=AssertionError("network call")):
+            first = main.list_pdfs()
+            second = main.list_pdfs()
+
+        self.assertEqual(first, second)
+        self.assertEqual(
+            [(pdf["university_name"], pdf["university_country"]) for pdf in first["pdf_files"]],
+            [("EPFL", "Switzerland"), ("University of Groningen", "Netherlands")],
+        )
+        save_cache.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import helpers
+
+
+class TestUniversityDetection(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        patcher = patch("helpers.PDF_CACHE_DIR", self.tmp_dir.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        helpers._known_shards.clear()
+        helpers._detected_universities.clear()
+
+        self.pdf_path = os.path.join(self.tmp_dir.name, "handbook.pdf")
+        with open(self.pdf_path, "wb") as f:
+            f.write(b"%PDF handbook")
+
+    def test_only_first_pages_are_read_when_name_is_there(self):
+        read = []
+
+        def pages():
+            for page in ["Welcome to Groningen University\nHandbook", "page two", "page three", "page four"]:
+                read.append(page)
+                yield page
+
+        self.assertEqual(helpers.detect_university_name(pages()), "Groningen University")
+        self.assertEqual(len(read), helpers.UNIVERSITY_SCAN_PAGES)
+
+    def test_falls_back_to_later_pages(self):
+        pages = ["intro", "", "contents", "more", "University of Crete"]
+        self.assertEqual(helpers.detect_university_name(pages), "University of Crete")
+        self.assertIsNone(helpers.detect_university_name(["no names here"]))
+
+    def test_result_is_memoized_by_file_hash(self):
+        name = helpers.find_possible_university(self.pdf_path, pages=["Aalto University"])
+        self.assertEqual(name, "Aalto University")
+
+        with patch("pdf_utils.iter_pdf_pages") as iter_pages:
+            self.assertEqual(helpers.find_possible_university(self.pdf_path), "Aalto University")
+            helpers._detected_universities.clear()
+            self.assertEqual(helpers.find_possible_university(self.pdf_path), "Aalto University")
+        iter_pages.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import re
+import json
+import unicodedata
+from collections import defaultdict
+from functools import lru_cache
+
+import requests
+from fuzzywuzzy import fuzz
+
+from config import UNIVERSITIES_DATASET, UNIVERSITY_MATCH_THRESHOLD, UNIVERSITY_ONLINE_LOOKUP, UNIVERSITY_API_URL
+
+# Offline university -> country lookup over a bundled dataset (data/universities.json, in the
+# Hipo university-domains-list format plus optional "aliases"). The full world list can be
+# dropped in through UNIVERSITIES_DATASET. Names are matched exactly after normalisation, then
+# fuzzily against the entries sharing a distinctive word with the query. Names the dataset does not
+# know can be looked up on the Hipo universities API by setting UNIVERSITY_ONLINE_LOOKUP=1.
+
+COMMON_WORDS = {"university", "universite", "universitat", "universiteit", "universidad", "universita", "universitet",
+                "of", "the", "and", "de", "di", "du", "la", "der", "van", "in", "at", "for", "college", "institute",
+                "technology", "technical", "school", "academy", "state", "national"}
+
+UNKNOWN_COUNTRY = "Unknown"
+
+_countries = {}
+
+
+def is_known_country(country) -> bool:
+    """False for a missing, empty or 'Unknown' country, which must not be stored with a university."""
+    return bool(country) and country.strip() not in ("", UNKNOWN_COUNTRY)
+
+
+def normalise_name(name: str) -> str:
+    """Lowercase, accent-free, punctuation-free form of a university name."""
+    name = unicodedata.normalize('NFKD', name)
+    name = ''.join(char for char in name if not unicodedata.combining(char))
+    return re.sub(r'[\W_]+', ' ', name.lower()).strip()
+
+
+class UniversityIndex:
+    def __init__(self, entries: list):
+        self.names = []          # normalised name or alias
+        self.countries = []      # country of the matching entry
+        self.exact = {}
+        self.by_word = defaultdict(list)
+
+        for entry in entries:
+            for name in [entry["name"]] + entry.get("aliases", []):
+                normalised = normalise_name(name)
+                if not normalised or normalised in self.exact:
+                    continue
+                self.exact[normalised] = entry["country"]
+                position = len(self.names)
+                self.names.append(normalised)
+                self.countries.append(entry["country"])
+                for word in set(normalised.split()) - COMMON_WORDS:
+                    self.by_word[word].append(position)
+
+    def find_country(self, university_name: str, threshold: int = None):
+        """Returns the country of the best match for the name, or None if nothing scores above the threshold."""
+        threshold = threshold or UNIVERSITY_MATCH_THRESHOLD
+        normalised = normalise_name(university_name)
+        if normalised in self.exact:
+            return self.exact[normalised]
+
+        candidates = {position for word in set(normalised.split()) - COMMON_WORDS for position in self.by_word.get(word, ())}
+        best_score, best_country = 0, None
+        for position in candidates:
+            score = fuzz.token_set_ratio(normalised, self.names[position])
+            if score > best_score:
+                best_score, best_country = score, self.countries[position]
+        return best_country if best_score >= threshold else None
+
+
+@lru_cache(maxsize=None)
+def load_university_index(dataset_path: str = None) -> UniversityIndex:
+    with open(dataset_path or UNIVERSITIES_DATASET, 'r', encoding='utf-8') as f:
+        return UniversityIndex(json.load(f))
+
+
+def fetch_online_country(university_name: str):
+    """
+    Asks the Hipo universities API and matches its answers like the offline dataset.
+    Returns the country, None if nothing matched, or raises requests.RequestException/ValueError.
+    """
+    response = requests.get(UNIVERSITY_API_URL, params={"name": university_name}, timeout=5)
+    response.raise_for_status()
+    entries = [entry for entry in response.json() if entry.get("name") and entry.get("country")]
+    return UniversityIndex(entries).find_country(university_name)
+
+
+def lookup_country(university_name: str) -> str:
+    """
+    Memoized lookup; 'Unknown' when the dataset has no confident match. With UNIVERSITY_ONLINE_LOOKUP
+    set, misses fall back to the online API; a failed request is not memoized.
+    """
+    if university_name not in _countries:
+        try:
+            country = load_university_index().find_country(university_name)
+        except FileNotFoundError:
+            print(f"[WARNING] University dataset {UNIVERSITIES_DATASET} not found")
+            country = None
+        if country is None and UNIVERSITY_ONLINE_LOOKUP:
+            try:
+                country = fetch_online_country(university_name)
+            except (requests.RequestException, ValueError) as e:
+                print(f"[WARNING] Online university lookup failed for {university_name}: {e}")
+                return UNKNOWN_COUNTRY
+        _countries[university_name] = country or UNKNOWN_COUNTRY
+    return _countries[university_name]
+
+
+def clear_memory():
+    _countries.clear()
+    load_university_index.cache_clear()